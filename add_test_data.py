@@ -12,6 +12,8 @@ import pytz
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+from attendance_log import AttendanceLog
+
 # 한국 시간대 설정
 KST = pytz.timezone('Asia/Seoul')
 
@@ -69,11 +71,10 @@ def add_test_attendance():
         admin_ref.set(attendance_data)
         print(f"관리자 컬렉션에도 데이터 추가 완료: {date_period_key}")
         
-        # 3. CSV도 업데이트
-        with open('attendance.csv', 'w', encoding='utf-8') as f:
-            f.write('출석일,교시,학번,이름,공강좌석번호\n')
-            f.write(f'{datetime_str},1교시,20202,곽환준,346\n')
-        print("CSV 파일도 업데이트 완료")
+        # 3. 날짜별 출석 로그도 업데이트
+        AttendanceLog(os.environ.get('ATTENDANCE_LOG_DIR', 'attendance_log')).append(
+            datetime_str, '1교시', '20202', '곽환준', '346')
+        print("출석 로그 파일도 업데이트 완료")
         
     except Exception as e:
         print(f"출석 데이터 추가 실패: {e}")
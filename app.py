@@ -1,51 +1,87 @@
 import os
+import time
+
+# 앱 시작 시간 측정 기준 (startup_timings)
+_startup_origin = time.perf_counter()
+
+import contextlib
 import json
 import logging
-import time
+import threading
+import zlib
+from bisect import bisect_right
 from datetime import datetime, timedelta
-from collections import Counter
 
 import pytz
-import pandas as pd
 from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_from_directory
 from dotenv import load_dotenv
 
-# Firebase 관련 라이브러리
-import firebase_admin
-from firebase_admin import credentials, firestore
-
-# 환경 변수 로드
+from attendance_store import AttendanceStore, record_key
+from attendance_log import AttendanceLog
+from attendance_day_loader import FirestoreDayLoader
+from attendance_rollups import week_start, week_starts
+from checkin_journal import CheckinJournal
+from attendance_query import query_records
+from search_index import SearchIndex
+from roster_cache import RosterCache, RosterFallback
+from firestore_watchers import watchers_enabled, start_watchers, watch_active
+from firestore_fanout import READ_TIMEOUT, fan_out, reset_executor as reset_fanout_executor
+from firestore_status import FirestoreStatus
+from firestore_client import LazyFirestoreClient
+from ttl_cache import TTLCache
+from warning_registry import WarningRegistry
+
+# 환경 변수 로드 (아래 모듈 수준 설정값이 .env를 읽으므로 import 시점에 실행)
 load_dotenv(override=True)
 
 # 한국 시간대 설정
 KST = pytz.timezone('Asia/Seoul')
 
 # Firebase 초기화
-db = None
-try:
+def firebase_credentials():
+    """
+    FIREBASE_CREDENTIALS_JSON 환경변수의 서비스 계정 인증 정보 (firebase_admin Certificate)
+    - init_firestore()와 asgi.py의 AsyncClient가 같은 인증 정보를 사용
+    """
     FIREBASE_CREDENTIALS_JSON = os.environ.get("FIREBASE_CREDENTIALS_JSON")
     if not FIREBASE_CREDENTIALS_JSON:
         raise ValueError("FIREBASE_CREDENTIALS_JSON 환경변수가 없습니다.")
     
-    # JSON 문자열을 딕셔너리로 변환
-    firebase_config = json.loads(FIREBASE_CREDENTIALS_JSON)
-    
-    # Firebase 인증 정보 생성
-    cred = credentials.Certificate(firebase_config)
+    # Firebase 관련 라이브러리 (google-cloud-firestore, gRPC 포함 import 비용이 커서 처음 사용할 때 로드)
+    from firebase_admin import credentials
     
-    # Firebase 앱 초기화 (이미 초기화되었는지 확인)
-    if not firebase_admin._apps:
-        firebase_admin.initialize_app(cred)
-    
-    # Firestore 클라이언트 설정
-    db = firestore.client()
-    print("Firebase 초기화 성공")
-except Exception as e:
-    print(f"Firebase 초기화 오류: {e}")
+    # JSON 문자열을 딕셔너리로 변환하여 Firebase 인증 정보 생성
+    return credentials.Certificate(json.loads(FIREBASE_CREDENTIALS_JSON))
+
+def init_firestore():
+    """
+    Firebase 앱을 초기화하고 Firestore 클라이언트 반환 (실패 시 None)
+    - db(LazyFirestoreClient)가 Firestore를 처음 사용할 때 호출
+    - 이미 Firebase 앱이 있으면(gunicorn fork 이전 부모 프로세스에서 생성) 지우고 새로 생성
+    """
+    try:
+        cred = firebase_credentials()
+        
+        import firebase_admin
+        from firebase_admin import firestore
+        
+        if firebase_admin._apps:
+            firebase_admin.delete_app(firebase_admin.get_app())
+        
+        # Firebase 앱 초기화 (이미 초기화되었는지 확인)
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(cred)
+        
+        # Firestore 클라이언트 설정
+        client = firestore.client()
+        print("Firebase 초기화 성공")
+        return client
+    except Exception as e:
+        print(f"Firebase 초기화 오류: {e}")
+        return None
 
-# 로깅 설정    
-logging.basicConfig(level=logging.DEBUG, 
-                   format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Firestore 클라이언트 (처음 사용할 때 생성)
+db = LazyFirestoreClient(init_firestore)
 
 # Flask 앱 초기화
 app = Flask(__name__)
@@ -68,52 +104,136 @@ class KoreanJSONProvider(DefaultJSONProvider):
 
 app.json = KoreanJSONProvider(app)
 
-# 캐싱을 위한 전역 변수
-_student_data_cache = None
-_last_student_data_load_time = None
+# 학생 명단 캐시 (students.xlsx 변경 시에만 다시 로드)
+student_roster = RosterCache('students.xlsx', lambda: _parse_student_file())
+
+# Firestore 배치 쓰기 한 번에 담을 수 있는 최대 작업 수
+FIRESTORE_BATCH_LIMIT = 500
+
+# 학생 명단 검색 색인 (명단이 교체되면 바뀐 학생만 다시 색인)
+roster_search_index = SearchIndex({'student_id': 'prefix', 'name': 'hangul', 'seat': 'substring'})
+_roster_indexed = {}  # 색인에 반영된 {학번: (이름, 좌석번호)}
+_roster_index_lock = threading.Lock()
+STUDENT_SEARCH_LIMIT = 20
+
+# 출석 기록 인메모리 저장소 (한 번 구축 후 증분 갱신)
+attendance_store = AttendanceStore()
+ATTENDANCE_STORE_REFRESH = int(os.environ.get('ATTENDANCE_STORE_REFRESH', 600))  # 다른 워커 변경 반영용 재구축 주기 (초)
+
+# 날짜별 출석 로그 파일 (attendance_log/YYYY/MM/YYYY-MM-DD.csv)
+ATTENDANCE_LOG_DIR = os.environ.get('ATTENDANCE_LOG_DIR', 'attendance_log')
+LEGACY_ATTENDANCE_CSV = 'attendance.csv'
+ATTENDANCE_ARCHIVE_AFTER_DAYS = int(os.environ.get('ATTENDANCE_ARCHIVE_AFTER_DAYS', 14))  # 이 기간이 지난 날짜는 열 단위 보관 파일로 압축
+attendance_log = AttendanceLog(ATTENDANCE_LOG_DIR)
+
+# 출석 교시 목록 (admin/{날짜}_{교시} 문서 이름에 사용)
+ATTENDANCE_PERIODS = ['1교시', '2교시', '3교시', '4교시', '5교시', '6교시', '7교시', '8교시', '9교시', '10교시', '시간 외']
+
+# 교시별 출석 현황용 날짜 단위 Firestore 조회 (지난 날짜는 계속 캐시)
+ATTENDANCE_DAY_TTL = int(os.environ.get('ATTENDANCE_DAY_TTL', 10))  # 오늘 날짜 조회 결과 캐시 시간 (초)
+day_loader = FirestoreDayLoader(ATTENDANCE_PERIODS, today_ttl=ATTENDANCE_DAY_TTL)
+
+# Firestore 연결 상태 (실패하면 잠시 Firestore를 건너뛰고 출석 로그와 명단 스냅샷으로 응답)
+FIRESTORE_RETRY_AFTER = int(os.environ.get('FIRESTORE_RETRY_AFTER', 30))  # 실패 후 다시 연결을 확인하기까지 대기 시간 (초)
+FIRESTORE_CHECK_TIMEOUT = float(os.environ.get('FIRESTORE_CHECK_TIMEOUT', 3))  # 출석 확인 경로의 Firestore 읽기 제한 시간 (초)
+firestore_status = FirestoreStatus(retry_after=FIRESTORE_RETRY_AFTER)
+
+# 출석 등록 저널 (fsync 후 바로 응답, Firestore에는 백그라운드에서 배치로 반영)
+CHECKIN_JOURNAL_DIR = os.environ.get('CHECKIN_JOURNAL_DIR', 'checkin_journal')
 
 # ================== [UTILITY 함수] ==================
 
 def get_schedule_from_firebase():
     """Firebase에서 시간표 설정을 가져옴 (없으면 기본값 반환)"""
     try:
-        if not db:
+        if not firestore_status.available(db):
             return None
         
         schedule_ref = db.collection('settings').document('schedule')
-        schedule_doc = schedule_ref.get()
+        schedule_doc = schedule_ref.get(timeout=FIRESTORE_CHECK_TIMEOUT)
+        firestore_status.mark_success()
         
         if schedule_doc.exists:
             schedule_data = schedule_doc.to_dict()
-            periods = schedule_data.get('periods', [])
-            
-            # Firebase 시간표를 Python time 객체로 변환
-            from datetime import time
-            converted_periods = []
-            for p in periods:
-                try:
-                    start_parts = p['start'].split(':')
-                    end_parts = p['end'].split(':')
-                    converted_periods.append((
-                        time(int(start_parts[0]), int(start_parts[1])),
-                        time(int(end_parts[0]), int(end_parts[1])),
-                        p['period_num']
-                    ))
-                except Exception as e:
-                    logging.error(f"시간표 변환 오류: {e}")
-                    continue
-            
-            return converted_periods if converted_periods else None
+            return convert_schedule_periods(schedule_data.get('periods', []))
         
         return None
     except Exception as e:
+        firestore_status.mark_failure(e)
         logging.error(f"Firebase 시간표 로드 실패: {e}")
         return None
 
+def convert_schedule_periods(periods):
+    """Firebase 시간표를 Python time 객체로 변환 (없으면 None)"""
+    from datetime import time
+    converted_periods = []
+    for p in periods:
+        try:
+            start_parts = p['start'].split(':')
+            end_parts = p['end'].split(':')
+            converted_periods.append((
+                time(int(start_parts[0]), int(start_parts[1])),
+                time(int(end_parts[0]), int(end_parts[1])),
+                p['period_num']
+            ))
+        except Exception as e:
+            logging.error(f"시간표 변환 오류: {e}")
+            continue
+    
+    return converted_periods if converted_periods else None
+
+# 시간표 캐시 (Firebase settings/schedule 조회를 매 요청마다 하지 않도록)
+SCHEDULE_CACHE_TTL = int(os.environ.get('SCHEDULE_CACHE_TTL', 300))  # 5분
+schedule_cache = {
+    'last_updated': 0,
+    'starts': [],    # 교시 시작 시간 (정렬됨, bisect용)
+    'periods': [],   # (start, end, period_num) - starts와 같은 순서
+}
+
+def _default_periods():
+    """기본 시간표 (Firebase 없을 때 fallback)"""
+    from datetime import time
+    return [
+        (time(7, 50), time(8, 50), 1),   # 1교시
+        (time(8, 50), time(9, 50), 2),   # 2교시
+        (time(9, 50), time(10, 50), 3),  # 3교시
+        (time(10, 50), time(11, 50), 4), # 4교시
+        (time(11, 50), time(12, 30), 0), # 점심시간 (도서실 이용 불가)
+        (time(12, 30), time(13, 50), 5), # 5교시
+        (time(13, 50), time(14, 50), 6), # 6교시
+        (time(14, 50), time(15, 50), 7), # 7교시
+    ]
+
+def set_schedule_cache(periods):
+    """변환된 시간표로 캐시 갱신 (periods가 없으면 기본 시간표 사용)"""
+    global schedule_cache
+    sorted_periods = sorted(periods or _default_periods(), key=lambda p: p[0])
+    schedule_cache = {
+        'last_updated': time.time(),
+        'starts': [p[0] for p in sorted_periods],
+        'periods': sorted_periods
+    }
+
+def invalidate_schedule_cache():
+    """시간표 변경 시 즉시 캐시 무효화 (다음 조회 때 Firebase에서 다시 로드)"""
+    schedule_cache['last_updated'] = 0
+
+def get_cached_schedule():
+    """TTL 내에서는 캐시된 시간표 사용, 만료 시에만 Firebase 조회 (실시간 감시가 동작 중이면 TTL 무시)"""
+    if schedule_cache['last_updated'] == 0 or (
+            not watch_active('settings/schedule') and
+            time.time() - schedule_cache['last_updated'] >= SCHEDULE_CACHE_TTL):
+        if schedule_cache['periods'] and not firestore_status.available(db):
+            # 오프라인 모드에서는 기본 시간표로 바꾸지 않고 마지막으로 받은 시간표 계속 사용
+            schedule_cache['last_updated'] = time.time()
+        else:
+            set_schedule_cache(get_schedule_from_firebase())
+    return schedule_cache
+
 def get_current_period():
     """
     현재 시간 기준으로 교시를 결정하는 함수
-    Firebase에서 시간표를 먼저 확인하고, 없으면 기본 시간표 사용
+    Firebase 시간표(캐시)를 먼저 확인하고, 없으면 기본 시간표 사용
     
     Returns:
         int: 1~10 교시, -1 (시간 외), 0 (4교시)
@@ -125,32 +245,12 @@ def get_current_period():
     if now.weekday() > 4:  # 토요일(5), 일요일(6)
         return -1
     
-    # Firebase에서 시간표 가져오기 시도
-    firebase_periods = get_schedule_from_firebase()
-    
-    if firebase_periods:
-        # Firebase 시간표 사용
-        for start, end, period in firebase_periods:
-            if start <= current_time < end:
-                return period
-        return -1
-    
-    # 기본 시간표 (Firebase 없을 때 fallback)
-    from datetime import time
-    periods = [
-        (time(7, 50), time(8, 50), 1),   # 1교시
-        (time(8, 50), time(9, 50), 2),   # 2교시
-        (time(9, 50), time(10, 50), 3),  # 3교시
-        (time(10, 50), time(11, 50), 4), # 4교시
-        (time(11, 50), time(12, 30), 0), # 점심시간 (도서실 이용 불가)
-        (time(12, 30), time(13, 50), 5), # 5교시
-        (time(13, 50), time(14, 50), 6), # 6교시
-        (time(14, 50), time(15, 50), 7), # 7교시
-    ]
-    
-    # 현재 시간이 어느 교시에 해당하는지 확인
-    for start, end, period in periods:
-        if start <= current_time < end:
+    # 시작 시간 배열에서 현재 시간 이전에 시작한 마지막 교시 찾기
+    schedule = get_cached_schedule()
+    idx = bisect_right(schedule['starts'], current_time) - 1
+    if idx >= 0:
+        start, end, period = schedule['periods'][idx]
+        if current_time < end:
             return period
     
     # 어느 교시에도 해당하지 않으면 시간 외로 처리
@@ -161,138 +261,160 @@ def load_student_data(force_reload=False):
     Load student data from Excel file with caching
     Returns a dictionary with student_id as key and (name, seat) as value
     
+    - 파일의 수정 시간/크기가 바뀐 경우에만 백그라운드에서 다시 로드
+    - 요청 처리 중에는 엑셀 파싱을 기다리지 않음 (최초 1회 제외)
+    
     Args:
         force_reload: 강제로 새로 로딩할지 여부 (기본값: False)
+                      앱에서 students.xlsx를 직접 수정한 뒤 True로 호출
     """
-    global _student_data_cache, _last_student_data_load_time
-    now = datetime.now()
-    
-    # 캐시 완전 제거 (문제 해결을 위해)
     if force_reload:
-        _student_data_cache = None
-        logging.debug("학생 데이터 캐시 강제 초기화")
-    
-    # 캐시가 없거나 5초 이상 지난 경우 새로 로드 (개선된 방식)
-    if (_student_data_cache is None or 
-            _last_student_data_load_time is None or 
-            (now - _last_student_data_load_time).seconds > 5):
-        logging.debug("학생 데이터 새로 로딩")
+        logging.debug("학생 데이터 캐시 강제 새로고침")
+        return student_roster.reload()
+    return student_roster.get()
+
+def search_students(query, limit=STUDENT_SEARCH_LIMIT):
+    """
+    학생 명단 검색 (학번 앞자리, 이름 부분/초성, 좌석번호)
+
+    Returns:
+        학번순 [{'student_id', 'name', 'seat'}, ...] (최대 limit명)
+    """
+    global _roster_indexed
+    student_data = load_student_data()
+    with _roster_index_lock:
+        if student_data is not _roster_indexed:
+            # 명단이 교체된 경우 추가/변경/삭제된 학생만 색인 갱신
+            for student_id in _roster_indexed.keys() - student_data.keys():
+                roster_search_index.remove(student_id)
+            for student_id, (name, seat) in student_data.items():
+                if tuple(_roster_indexed.get(student_id, ())) != (name, seat):
+                    roster_search_index.add(student_id, {'student_id': student_id, 'name': name, 'seat': seat})
+            _roster_indexed = student_data
+        matches = sorted(roster_search_index.search(query))[:limit]
+    return [{'student_id': student_id, 'name': student_data[student_id][0], 'seat': student_data[student_id][1]}
+            for student_id in matches if student_id in student_data]
+
+def _parse_student_file():
+    """students.xlsx를 읽어 {학번: (이름, 좌석번호)} 딕셔너리 생성"""
+    logging.debug("학생 데이터 새로 로딩")
+    try:
+        # openpyxl을 직접 사용하여 엑셀 파일 읽기 (헤더 없는 구조 대응)
         try:
-            # openpyxl을 직접 사용하여 엑셀 파일 읽기 (헤더 없는 구조 대응)
+            import openpyxl
+            wb = openpyxl.load_workbook('students.xlsx')
+            ws = wb.active
+            
+            student_data = {}
+            
+            # 첫 번째 행 확인하여 헤더 유무 판단
+            first_row = [cell.value for cell in ws[1]]
+            has_header = False
+            
+            # 첫 번째 행이 숫자(학번)로 시작하면 헤더 없음
+            if first_row[0] and str(first_row[0]).isdigit():
+                has_header = False
+                start_row = 1
+                logging.info("Excel 파일: 헤더 없는 구조 감지")
+            else:
+                has_header = True
+                start_row = 2
+                logging.info("Excel 파일: 헤더 있는 구조 감지")
+            
+            # 학생 데이터 읽기 (구조: 학번, 이름, 좌석번호)
+            for row in ws.iter_rows(min_row=start_row, values_only=True):
+                if row and len(row) >= 2:  # 최소 학번, 이름은 있어야 함
+                    student_id = row[0]
+                    name = row[1] 
+                    seat = row[2] if len(row) > 2 else ''
+                    
+                    # 값이 모두 있는 경우만 추가
+                    if student_id and name:
+                        student_id = str(student_id).strip()
+                        # 이름 인코딩 문제 해결
+                        name = str(name).strip()
+                        # 한국어 깨짐 문제 수정 시도
+                        if '�' in name:
+                            logging.warning(f"인코딩 문제 발견된 이름: {repr(name)} (학번: {student_id})")
+                            # 기본 이름으로 대체
+                            name = f"학생_{student_id}"
+                        seat = str(seat).strip() if seat else ''
+                        student_data[student_id] = (name, seat)
+            
+            logging.info(f"Excel에서 로드된 학생 수: {len(student_data)}")
+            
+        except Exception as excel_error:
+            logging.error(f"엑셀 파일 직접 읽기 실패: {excel_error}")
+            
+            # pandas 방식으로 시도 (대체 방식)
             try:
-                import openpyxl
-                wb = openpyxl.load_workbook('students.xlsx')
-                ws = wb.active
+                import pandas as pd
+                df = pd.read_excel('students.xlsx', dtype={'학번': str})
+                # 컬럼명 확인 (좌석번호 또는 공강좌석번호)
+                seat_column = '공강좌석번호' if '공강좌석번호' in df.columns else '좌석번호'
                 
                 student_data = {}
+                for _, row in df.iterrows():
+                    # 학번이 있는 경우만 처리
+                    if pd.notna(row['학번']) and pd.notna(row['이름']):
+                        student_id = str(row['학번']).strip()
+                        name = str(row['이름']).strip()
+                        # 좌석번호 가져오기 (없으면 빈 문자열)
+                        seat = str(row.get(seat_column, '')) if pd.notna(row.get(seat_column, '')) else ''
+                        student_data[student_id] = (name, seat)
                 
-                # 첫 번째 행 확인하여 헤더 유무 판단
-                first_row = [cell.value for cell in ws[1]]
-                has_header = False
-                
-                # 첫 번째 행이 숫자(학번)로 시작하면 헤더 없음
-                if first_row[0] and str(first_row[0]).isdigit():
-                    has_header = False
-                    start_row = 1
-                    logging.info("Excel 파일: 헤더 없는 구조 감지")
-                else:
-                    has_header = True
-                    start_row = 2
-                    logging.info("Excel 파일: 헤더 있는 구조 감지")
-                
-                # 학생 데이터 읽기 (구조: 학번, 이름, 좌석번호)
-                for row in ws.iter_rows(min_row=start_row, values_only=True):
-                    if row and len(row) >= 2:  # 최소 학번, 이름은 있어야 함
-                        student_id = row[0]
-                        name = row[1] 
-                        seat = row[2] if len(row) > 2 else ''
-                        
-                        # 값이 모두 있는 경우만 추가
-                        if student_id and name:
-                            student_id = str(student_id).strip()
-                            # 이름 인코딩 문제 해결
-                            name = str(name).strip()
-                            # 한국어 깨짐 문제 수정 시도
-                            if '�' in name:
-                                logging.warning(f"인코딩 문제 발견된 이름: {repr(name)} (학번: {student_id})")
-                                # 기본 이름으로 대체
-                                name = f"학생_{student_id}"
-                            seat = str(seat).strip() if seat else ''
-                            student_data[student_id] = (name, seat)
-                
-                logging.info(f"Excel에서 로드된 학생 수: {len(student_data)}")
-                
-                # 30431 학생 확인 로그
-                if '30431' in student_data:
-                    logging.info(f"30431 학생 데이터 확인: {student_data['30431']}")
-                else:
-                    logging.warning("30431 학생 데이터를 찾을 수 없음")
-                
-            except Exception as excel_error:
-                logging.error(f"엑셀 파일 직접 읽기 실패: {excel_error}")
-                
-                # pandas 방식으로 시도 (대체 방식)
-                try:
-                    df = pd.read_excel('students.xlsx', dtype={'학번': str})
-                    # 컬럼명 확인 (좌석번호 또는 공강좌석번호)
-                    seat_column = '공강좌석번호' if '공강좌석번호' in df.columns else '좌석번호'
-                    
-                    student_data = {}
-                    for _, row in df.iterrows():
-                        # 학번이 있는 경우만 처리
-                        if pd.notna(row['학번']) and pd.notna(row['이름']):
-                            student_id = str(row['학번']).strip()
-                            name = str(row['이름']).strip()
-                            # 좌석번호 가져오기 (없으면 빈 문자열)
-                            seat = str(row.get(seat_column, '')) if pd.notna(row.get(seat_column, '')) else ''
-                            student_data[student_id] = (name, seat)
-                    
-                    logging.debug(f"pandas로 로드된 학생 수: {len(student_data)}")
-                    
-                except Exception as pandas_error:
-                    logging.error(f"pandas 읽기 실패: {pandas_error}")
-                    # 임시 학생 데이터 제공 (테스트용)
-                    student_data = {
-                        "10307": ("박지호", "387"),
-                        "20101": ("강지훈", "331"),
-                        "30107": ("김리나", "175"),
-                        "30207": ("김유담", "281"),
-                        "20240101": ("홍길동", "A1"),
-                        "10701": ("한가람", "600"),  # 테스트 학생 추가
-                        # 추가 데이터...
-                    }
-            
-            _student_data_cache = student_data
-            _last_student_data_load_time = now
-            
-            # 디버깅을 위해 캐시에 10701 학번이 있는지 확인
-            if '10701' in _student_data_cache:
-                logging.debug(f"10701 학번 데이터 있음: {_student_data_cache.get('10701')}")
-            else:
-                logging.debug("10701 학번 데이터 없음")
+                logging.debug(f"pandas로 로드된 학생 수: {len(student_data)}")
                 
-            return student_data
-            
-        except Exception as e:
-            logging.error(f"학생 데이터 로딩 중 오류: {e}")
-            return {}
-    else:
-        logging.debug("학생 데이터 캐시 사용")
-        return _student_data_cache
+            except Exception as pandas_error:
+                logging.error(f"pandas 읽기 실패: {pandas_error}")
+                # 임시 학생 데이터 제공 (테스트용)
+                student_data = {
+                    "10307": ("박지호", "387"),
+                    "20101": ("강지훈", "331"),
+                    "30107": ("김리나", "175"),
+                    "30207": ("김유담", "281"),
+                    "20240101": ("홍길동", "A1"),
+                    "10701": ("한가람", "600"),  # 테스트 학생 추가
+                    # 추가 데이터...
+                }
+                # 대체 명단은 원본 파일 해시로 스냅샷을 만들지 않도록 알림
+                raise RosterFallback(student_data, pandas_error)
+        
+        return student_data
+        
+    except RosterFallback:
+        raise
+    except Exception as e:
+        logging.error(f"학생 데이터 로딩 중 오류: {e}")
+        raise RosterFallback({}, e)
 
-def save_attendance(student_id, name, seat, period_text, admin_override=False):
+def get_week_bounds(now):
+    """주어진 시각이 속한 주의 일요일~토요일 날짜 문자열 (일요일이면 그날부터 시작)"""
+    days_to_sunday = now.weekday() + 1
+    if days_to_sunday == 7:
+        days_to_sunday = 0
+        
+    sunday = now - timedelta(days=days_to_sunday)
+    saturday = sunday + timedelta(days=6)
+    return sunday.strftime('%Y-%m-%d'), saturday.strftime('%Y-%m-%d')
+
+def check_in(student_id, name, seat, period_text, admin_override=False):
     """
-    출석 기록을 학번별로 조직화하여 저장 (한국 시간 기준)
-    구조: students/{student_id}/attendance/{date}
-    - 읽기 횟수 대폭 감소
-    - admin_override: 관리자 권한으로 중복 출석 허용 여부
+    출석 등록 파이프라인 (주간 제한 확인 + 저장을 한 번에 처리)
+    구조: attendance/{student_id}/records/{date}, admin/{date}_{period}/students/{student_id}
+    - 주간 확인과 출석 기록을 출석 로그 파일 잠금 안에서 함께 처리 (워커 간 동시 요청 중복 방지)
+      주간 확인은 출석 로그 + Firestore(연결 시, 다른 기기/관리자 등록) - Firestore 조회는 잠금 전에 실행
+    - 출석 저널에 fsync한 뒤 출석 로그에 추가하고 바로 응답, Firestore 저장은 저널 반영 스레드가 배치로 처리
+      (Firestore 연결이 없거나 끊겨도 그대로 등록 - 연결되면 저널에서 반영)
+      출석 로그 추가가 실패해도 저널 반영 시 출석 로그에 다시 추가
+    - 3학년/관리자 추가 출석: 주간 확인 없이 저장
+    
+    Returns:
+        (result, attendance_date):
+        - result: 'saved', 'exceeded'(이번 주 이미 출석), 'error'
+        - attendance_date: 'exceeded'인 경우 기존 출석일
     """
     try:
-        # Firebase 연결 확인
-        if not db:
-            flash("Firebase 설정이 완료되지 않았습니다.", "danger")
-            return False
-        
         # 현재 시간으로 출석 기록 생성
         now_kst = datetime.now(KST)
         date_str = now_kst.strftime('%Y-%m-%d')
@@ -300,144 +422,435 @@ def save_attendance(student_id, name, seat, period_text, admin_override=False):
         
         # 3학년 학생 확인 (학번 첫 자리가 3인 경우)
         is_third_grade = str(student_id).startswith('3')
-        
-        # 관리자 모드가 아니고, 3학년이 아닌 경우에만 중복 체크
-        if not admin_override and not is_third_grade:
-            # 현재 주 범위 계산 (일~토)
-            days_to_sunday = now_kst.weekday() + 1
-            if days_to_sunday == 7:
-                days_to_sunday = 0
-                
-            sunday = now_kst - timedelta(days=days_to_sunday)
-            sunday_str = sunday.strftime('%Y-%m-%d')
-            
-            saturday = sunday + timedelta(days=6)
-            saturday_str = saturday.strftime('%Y-%m-%d')
-            
-            # 새 구조에서 학번별 출석 기록만 확인 (매우 효율적)
-            student_ref = db.collection('attendance').document(student_id).collection('records')
-            
-            # 이번 주 범위의 출석 기록만 조회
-            week_records = student_ref.where('date_only', '>=', sunday_str).where('date_only', '<=', saturday_str).get()
-            
-            if len(week_records) > 0:
-                # 이미 출석한 날짜 찾기
-                attendance_date = week_records[0].to_dict().get('date_only', '')
-                flash(f'이미 이번 주에 출석 기록이 있습니다. (출석일: {attendance_date})', 'warning')
-                return False
-        elif is_third_grade and not admin_override:
+        enforce_weekly_limit = not admin_override and not is_third_grade
+        if is_third_grade and not admin_override:
             logging.info(f"3학년 학생 {student_id} 중복 출석 허용")
         
-        # 새로운 이중 구조로 출석 기록 저장
         attendance_data = {
             'student_id': student_id,
             'name': name,
             'seat': seat,
             'period': period_text,
             'date': datetime_str,
-            'date_only': date_str,
-            'timestamp': firestore.SERVER_TIMESTAMP
+            'date_only': date_str
         }
         
-        # 1. 학생별 출석 기록 저장 (학생 중복 체크용)
-        try:
-            student_attendance_ref = db.collection('attendance').document(student_id).collection('records').document(date_str)
-            student_attendance_ref.set(attendance_data)
-            logging.info(f"attendance/{student_id}/records/{date_str} 저장 성공")
-        except Exception as e:
-            logging.error(f"attendance 저장 실패: {e}")
-            return False
-        
-        # 2. 관리자용 날짜+교시별 출석 기록 저장 (관리자 현황 파악용)
         try:
-            date_period_key = f"{date_str}_{period_text}"
-            admin_ref = db.collection('admin').document(date_period_key).collection('students').document(student_id)
-            admin_ref.set({
-                'student_id': student_id,
-                'name': name,
-                'seat': seat,
-                'date': datetime_str,
-                'date_only': date_str,
-                'period': period_text,
-                'timestamp': firestore.SERVER_TIMESTAMP
-            })
-            logging.info(f"admin/{date_period_key}/students/{student_id} 저장 성공")
+            validate_checkin(attendance_data)
+            sunday_str, saturday_str = get_week_bounds(now_kst)
+            # 같은 학생의 동시 요청은 워커 내에서는 학생별 잠금으로, 워커 간에는 출석 로그 파일 잠금으로 차단
+            with get_student_lock(student_id):
+                # Firestore 조회가 느려도 다른 학생의 등록을 막지 않도록 출석 로그 잠금 전에 조회
+                remote_dates = firestore_week_dates(student_id, sunday_str, saturday_str) if enforce_weekly_limit else None
+                with attendance_log.locked():
+                    if enforce_weekly_limit:
+                        week_dates = local_week_dates(student_id, sunday_str, saturday_str) | (remote_dates or set())
+                        week_dates.discard('')
+                        if week_dates:
+                            return 'exceeded', max(week_dates)
+                    
+                    # 통계 집계 변경분(이 출석 1건)과 함께 저널에 먼저 기록 (fsync) - 이후 단계가 실패해도 출석은 보존
+                    checkin_journal.append([{
+                        'data': attendance_data,
+                        'rollups': [[date_str, period_text, student_id, 1]]
+                    }])
+                    try:
+                        attendance_log.append(datetime_str, period_text, student_id, name, seat)
+                    except Exception as log_error:
+                        logging.error(f"출석 로그 추가 실패 (저널 반영 시 다시 추가): {log_error}")
+            logging.info(f"출석 저널과 출석 로그({date_str})에 출석 기록 추가: {name}")
         except Exception as e:
-            logging.error(f"admin 저장 실패: {e}")
-            return False
+            logging.error(f"출석 저장 실패: {e}")
+            return 'error', ''
         
-        # CSV 파일에도 즉시 저장 (교시별 출석 현황 즉시 반영용)
-        try:
-            csv_path = 'attendance.csv'
-            
-            # 기존 CSV 파일이 있으면 읽어서 추가
-            if os.path.exists(csv_path):
-                # 기존 CSV 파일에 새 행 추가 (한글 헤더 사용)
-                with open(csv_path, 'a', encoding='utf-8', newline='') as f:
-                    f.write(f'"{datetime_str}","{period_text}","{student_id}","{name}","{seat}"\n')
-                logging.info(f"CSV 파일에 출석 기록 추가: {name}")
-            else:
-                # 새 CSV 파일 생성 (한글 헤더 포함)
-                with open(csv_path, 'w', encoding='utf-8', newline='') as f:
-                    f.write('출석일,교시,학번,이름,공강좌석번호\n')
-                    f.write(f'"{datetime_str}","{period_text}","{student_id}","{name}","{seat}"\n')
-                logging.info(f"새 CSV 파일 생성 및 출석 기록 추가: {name}")
-                
-        except Exception as csv_error:
-            logging.warning(f"CSV 저장 실패 (Firebase 저장은 성공): {csv_error}")
+        # 출석 저장소에 즉시 반영 (저장소가 구축된 경우만)
+        if attendance_store.loaded:
+            attendance_store.add(dict(attendance_data, id=f"csv_{student_id}_{datetime_str}", source='csv'))
         
         # 저장 완료
-        logging.info(f"출석 기록 저장 완료: {student_id} ({name}) - {period_text}")
+        logging.info(f"학생 {student_id}({name})의 출석이 성공적으로 등록되었습니다. 좌석: {seat}, 날짜: {date_str}, 교시: {period_text}")
         
-        logging.info(f"학생 {student_id}({name})의 출석이 성공적으로 등록되었습니다. 좌석: {seat}, 날짜: {date_str}")
+        # 해당 학생의 출석 상태 캐시만 무효화
+        attendance_status_cache.invalidate(student_id)
         
-        # 캐시 초기화
-        global attendance_status_cache
-        attendance_status_cache.clear()
-        
-        return True
+        return 'saved', ''
         
     except Exception as e:
         logging.error(f"출석 저장 중 오류 발생: {e}")
+        return 'error', ''
+
+def validate_checkin(data):
+    """
+    출석 저널 항목 확인 (Firestore 문서 경로로 쓸 수 없는 값이면 ValueError)
+    - student_id: 비어 있지 않고 '/' 없음, __이름__ 형식 아님
+    - date_only: YYYY-MM-DD
+    - period: 비어 있지 않고 '/' 없음
+    """
+    student_id = str(data.get('student_id') or '')
+    period = str(data.get('period') or '')
+    if not student_id or '/' in student_id or (student_id.startswith('__') and student_id.endswith('__')) or len(student_id) > 100:
+        raise ValueError(f"잘못된 학번: {student_id!r}")
+    if not period or '/' in period:
+        raise ValueError(f"잘못된 교시: {period!r}")
+    try:
+        datetime.strptime(str(data.get('date_only') or ''), '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"잘못된 출석 날짜: {data.get('date_only')!r}")
+
+def is_permanent_checkin_error(error):
+    """저널 항목 반영 오류 중 재시도해도 같은 결과인 오류 (잘못된 항목 데이터, Firestore 잘못된 인자)"""
+    if isinstance(error, (ValueError, TypeError, KeyError)):
+        return True
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
         return False
+    return isinstance(error, api_exceptions.InvalidArgument)
 
-def load_attendance():
+def ensure_logged(entries):
+    """
+    저널 항목 중 출석 로그에 없는 항목을 다시 추가
+    (저널 기록 후 출석 로그 추가 전에 중단되었거나 추가가 실패한 경우)
+    
+    Returns:
+        다시 추가한 항목 수
+    """
+    added = 0
+    with attendance_log.locked():
+        for entry in entries:
+            data = entry['data']
+            rows = attendance_log.find_student(data['student_id'], data['date_only'], data['date_only'])
+            if not any(row.get('출석일') == data['date'] for row in rows):
+                attendance_log.append(data['date'], data['period'], data['student_id'], data['name'], data['seat'])
+                added += 1
+    return added
+
+def write_checkins_to_firestore(entries):
+    """
+    출석 저널 항목을 Firestore 배치 쓰기로 반영 (저널 반영 스레드에서 호출, 실패 시 예외)
+    - 출석 로그에 없는 항목은 먼저 출석 로그에 추가
+    - admin/{날짜}_{교시}/students/{학번}은 없을 때만 생성 (다른 기기/관리자가 먼저 등록한 기록은 덮어쓰지 않음)
+      이미 있으면 문서도 통계 집계도 쓰지 않음 (다시 반영한 같은 출석이거나 Firestore에 없는 출석)
+    - attendance/{학번}/records/{날짜}와 통계 집계 변경분(rollups 컬렉션)도 같은 배치에 포함
+    - 배치당 쓰기 FIRESTORE_BATCH_LIMIT건을 넘지 않도록 항목을 나눠 커밋
+      (항목당 문서 2건 + 날짜/주 집계 문서 최대 2건, 커밋된 묶음은 다시 반영해도 건너뜀)
+    """
+    if not db:
+        raise RuntimeError("Firebase DB 연결이 설정되지 않았습니다.")
+    for entry in entries:
+        validate_checkin(entry['data'])
+    try:
+        ensure_logged(entries)
+    except Exception as e:
+        logging.error(f"저널 항목 출석 로그 대조 실패: {e}")
+    
+    chunk_size = FIRESTORE_BATCH_LIMIT // 4
+    for start in range(0, len(entries), chunk_size):
+        _write_checkin_batch(entries[start:start + chunk_size])
+    firestore_status.mark_success()
+
+def _write_checkin_batch(entries):
+    """write_checkins_to_firestore()의 배치 하나 (쓰기 FIRESTORE_BATCH_LIMIT건 이내)"""
+    from firebase_admin import firestore
+    admin_refs = [db.collection('admin').document(f"{entry['data']['date_only']}_{entry['data']['period']}")
+                  .collection('students').document(entry['data']['student_id']) for entry in entries]
+    try:
+        existing = {snapshot.reference.path
+                    for snapshot in db.get_all(admin_refs, timeout=READ_TIMEOUT) if snapshot.exists}
+    except Exception as e:
+        firestore_status.mark_failure(e)
+        raise
+    
+    batch = db.batch()
+    rollup_changes = {}
+    writes = 0
+    for entry, admin_ref in zip(entries, admin_refs):
+        data = entry['data']
+        if admin_ref.path in existing:
+            logging.debug(f"이미 등록된 출석 유지 (Firestore 문서 덮어쓰지 않음): {data['student_id']} {data['date_only']} {data['period']}")
+            continue
+        data = dict(data, timestamp=firestore.SERVER_TIMESTAMP)
+        batch.set(db.collection('attendance').document(data['student_id']).collection('records')
+                  .document(data['date_only']), data)
+        batch.create(admin_ref, data)
+        existing.add(admin_ref.path)
+        writes += 2
+        for date_only, period, rollup_student_id, delta in entry.get('rollups', ()):
+            key = (date_only, period, rollup_student_id)
+            rollup_changes[key] = rollup_changes.get(key, 0) + delta
+    if not writes:
+        return
+    _add_rollup_writes(batch, {key: delta for key, delta in rollup_changes.items() if delta})
+    try:
+        batch.commit(timeout=READ_TIMEOUT)
+    except Exception as e:
+        firestore_status.mark_failure(e)
+        raise
+
+checkin_journal = CheckinJournal(CHECKIN_JOURNAL_DIR, write_checkins_to_firestore,
+                                 permanent_error=is_permanent_checkin_error)
+
+def replay_checkin_journal():
+    """
+    앱 시작 시 아직 Firestore에 반영되지 않은 저널 항목을 출석 로그와 대조
+    (저널 기록 직후 중단되어 출석 로그에 없는 항목은 다시 추가)
+    """
+    replayed = ensure_logged(checkin_journal.pending())
+    if replayed:
+        logging.info(f"출석 저널에서 출석 로그에 없는 {replayed}건 다시 추가")
+
+def reconcile_after_offline(offline_since):
+    """
+    Firestore 연결 복구 후 오프라인 구간의 출석을 기록 키(학번, 날짜, 교시)로 맞춤
+    - 저널 반영 스레드를 바로 깨워 오프라인 중 등록된 출석부터 반영
+    - 출석 로그에만 있고 저널에도 없는 기록은 저널에 다시 추가 (Firestore 문서 set이므로 중복 반영해도 같은 결과)
+    - Firestore에만 있는 기록(다른 기기/관리자 등록)은 출석 저장소에 추가하고 해당 학생의 주간 상태 캐시 무효화
+    - 같은 키가 양쪽에 있으면 같은 출석으로 보고 출석 로그 기록을 유지
+    
+    Args:
+        offline_since: 오프라인이 된 시각 (epoch 초)
+    """
+    checkin_journal.wake()
+    today = datetime.now(KST).date()
+    day = min(datetime.fromtimestamp(offline_since, KST).date(), today)
+    pending_keys = {record_key(entry['data']) for entry in checkin_journal.pending()}
+    requeued = []
+    fetched = 0
+    while day <= today:
+        date_only = day.strftime('%Y-%m-%d')
+        local = {}
+        for row in attendance_log.read_partition(date_only):
+            record = _log_row_to_record(row)
+            local[record_key(record)] = record
+        day_loader.invalidate(date_only)
+        remote = {record_key(record): record for record in day_loader.load(
+            db, date_only, today.strftime('%Y-%m-%d'), attendance_log.day_signature(date_only))}
+        
+        for key, record in local.items():
+            if key not in remote and key not in pending_keys:
+                requeued.append({'data': {field: record[field] for field in
+                                          ('student_id', 'name', 'seat', 'period', 'date', 'date_only')},
+                                 'rollups': []})
+        for key, record in remote.items():
+            if key not in local:
+                if attendance_store.loaded:
+                    attendance_store.add(record)
+                attendance_status_cache.invalidate(record.get('student_id', ''))
+                fetched += 1
+        day += timedelta(days=1)
+    
+    if requeued:
+        checkin_journal.append(requeued)
+    logging.info(f"오프라인 구간 재동기화 완료: Firestore 반영 대기 {len(requeued)}건 추가, Firestore 기록 {fetched}건 반영")
+
+def save_attendance(student_id, name, seat, period_text, admin_override=False):
+    """
+    출석 기록 저장 후 결과 메시지 표시 (한국 시간 기준)
+    - check_in() 결과를 flash 메시지로 변환
+    - admin_override: 관리자 권한으로 중복 출석 허용 여부
+    """
+    result, attendance_date = check_in(student_id, name, seat, period_text, admin_override=admin_override)
+    if result == 'exceeded':
+        flash(f'이미 이번 주에 출석 기록이 있습니다. (출석일: {attendance_date})', 'warning')
+    return result == 'saved'
+
+def _add_rollup_writes(batch, changes):
+    """
+    통계 집계 변경분을 Firestore 배치에 추가
+    - rollups/{날짜}: 교시별 횟수와 합계
+    - rollups/week_{월요일}: 학생별 주간 횟수
+    
+    Args:
+        changes: {(날짜, 교시, 학번): 증감} - AttendanceLog.append()/rewrite_partition() 반환값
+    """
+    from firebase_admin import firestore
+    day_updates = {}
+    week_updates = {}
+    for (date_only, period, student_id), delta in changes.items():
+        day = day_updates.setdefault(date_only, {'periods': {}, 'total': 0})
+        day['periods'][period] = day['periods'].get(period, 0) + delta
+        day['total'] += delta
+        if student_id:
+            week = week_updates.setdefault(week_start(date_only), {})
+            week[student_id] = week.get(student_id, 0) + delta
+    
+    for date_only, day in day_updates.items():
+        batch.set(db.collection('rollups').document(date_only), {
+            'date': date_only,
+            'periods': {period: firestore.Increment(n) for period, n in day['periods'].items()},
+            'total': firestore.Increment(day['total']),
+            'updated_at': firestore.SERVER_TIMESTAMP
+        }, merge=True)
+    for monday, students in week_updates.items():
+        batch.set(db.collection('rollups').document(f"week_{monday}"), {
+            'week_start': monday,
+            'students': {student_id: firestore.Increment(n) for student_id, n in students.items()},
+            'updated_at': firestore.SERVER_TIMESTAMP
+        }, merge=True)
+
+def mirror_rollups(changes):
+    """통계 집계 변경분을 Firestore rollups 컬렉션에 반영 (실패해도 로컬 집계는 유지)"""
+    if not db or not changes:
+        return
+    try:
+        batch = db.batch()
+        _add_rollup_writes(batch, changes)
+        batch.commit()
+    except Exception as e:
+        logging.warning(f"Firestore 통계 집계 반영 실패: {e}")
+
+def load_attendance(force_reload=False):
+    """
+    출석 기록을 인메모리 저장소에서 반환
+    - 저장소가 비어 있거나 ATTENDANCE_STORE_REFRESH가 지난 경우에만 전체 로드
+    - 이후에는 save_attendance(), delete_records()가 증분으로 갱신
+    
+    Args:
+        force_reload: 강제로 CSV와 Firebase에서 다시 구축할지 여부 (기본값: False)
+    """
+    refresh_attendance_store(force_reload)
+    return attendance_store.all()
+
+def refresh_attendance_store(force_reload=False):
+    """
+    출석 저장소가 비어 있거나 ATTENDANCE_STORE_REFRESH가 지난 경우에만 전체 구축
+    - 저장소 인덱스만 사용하는 화면은 전체 목록을 복사하는 load_attendance() 대신 사용
+    """
+    age = attendance_store.age()
+    if force_reload or age is None or age > ATTENDANCE_STORE_REFRESH:
+        attendance_store.build(_scan_attendance_sources())
+        logging.info(f"출석 저장소 구축 완료: {len(attendance_store)}개 기록")
+
+def firestore_only_counts(start_date, end_date):
+    """
+    기간 내 출석 로그에 없는 Firebase 기록의 집계값 (통계용)
+    - 출석 저장소가 이미 구축되어 있으면 저장소의 Firebase 기록으로 계산 (통계 화면 때문에 전체 재구축하지 않음)
+    - 아니면 Firestore 통계 집계 미러에서 로컬 집계를 뺀 값 (다른 기기에서 등록한 출석)
+      날짜×교시는 rollups/{날짜} 문서, 학생별은 기간에 통째로 포함된 주의 rollups/week_{월요일} 문서를
+      범위 쿼리 한 번씩으로 읽고, 일부만 포함된 처음/마지막 주만 날짜별 기록(load_day_records)을 조회
+    
+    Returns:
+        ({(날짜, 교시): 횟수}, {학번: [횟수, 이름]})
+    """
+    if attendance_store.loaded:
+        from attendance_stats import count_columns, records_to_columns
+        records = [record for source in attendance_store.sources() if source != 'csv'
+                   for record in attendance_store.by_source(source)
+                   if start_date <= record.get('date_only', '') <= end_date]
+        return count_columns(records_to_columns(records))
+    if not firestore_status.available(db):
+        return {}, {}
+    
+    full_weeks, partial_weeks = [], []
+    for monday in week_starts(start_date, end_date):
+        sunday = (datetime.strptime(monday, '%Y-%m-%d').date() + timedelta(days=6)).strftime('%Y-%m-%d')
+        (full_weeks if start_date <= monday and sunday <= end_date else partial_weeks).append((monday, sunday))
+    try:
+        rollups_ref = db.collection('rollups')
+        day_docs = rollups_ref.where('date', '>=', start_date).where('date', '<=', end_date).get(timeout=READ_TIMEOUT)
+        week_docs = rollups_ref.where('week_start', '>=', full_weeks[0][0]).where(
+            'week_start', '<=', full_weeks[-1][0]).get(timeout=READ_TIMEOUT) if full_weeks else []
+        firestore_status.mark_success()
+    except Exception as e:
+        firestore_status.mark_failure(e)
+        logging.warning(f"Firestore 통계 집계 조회 실패 (출석 로그 집계만 사용): {e}")
+        return {}, {}
+    
+    local_days = attendance_log.rollups.day_counts(start_date, end_date)
+    day_counts = {}
+    for doc in day_docs:
+        data = doc.to_dict() or {}
+        for period, count in (data.get('periods') or {}).items():
+            extra = int(count) - local_days.get((data.get('date'), period), 0)
+            if extra > 0:
+                day_counts[(data.get('date'), period)] = extra
+    
+    student_counts = {}
+    roster = load_student_data()
+    for doc in week_docs:
+        data = doc.to_dict() or {}
+        local_students = attendance_log.rollups.student_counts(data.get('week_start'))
+        for student_id, count in (data.get('students') or {}).items():
+            extra = int(count) - local_students.get(student_id, [0])[0]
+            if extra > 0:
+                student_counts[student_id] = [extra, roster.get(student_id, ('',))[0]]
+    
+    today = datetime.now(KST).strftime('%Y-%m-%d')
+    for monday, sunday in partial_weeks:
+        day = datetime.strptime(max(start_date, monday), '%Y-%m-%d').date()
+        last_day = datetime.strptime(min(end_date, sunday, today), '%Y-%m-%d').date()
+        while day <= last_day and firestore_status.available(db):
+            for record in load_day_records(day.strftime('%Y-%m-%d')):
+                if record.get('source') != 'csv':
+                    entry = student_counts.setdefault(record.get('student_id', ''), [0, record.get('name', '')])
+                    entry[0] += 1
+            day += timedelta(days=1)
+    return day_counts, student_counts
+
+def _log_row_to_record(row):
+    """출석 로그 행(한글 헤더)을 출석 기록 딕셔너리로 변환"""
+    # 한글 헤더로 접근
+    student_id = str(row.get('학번') or '')
+    date = str(row.get('출석일') or '')
+    return {
+        'id': f"csv_{student_id}_{date}",
+        'student_id': student_id,
+        'name': str(row.get('이름') or ''),
+        'seat': str(row.get('공강좌석번호') or ''),
+        'period': str(row.get('교시') or ''),
+        'date': date,
+        'date_only': date[:10],
+        'source': 'csv'
+    }
+
+def load_day_records(date_only):
+    """
+    하루치 출석 기록 (교시별 출석 현황용, 날짜 내림차순)
+    - 출석 로그의 해당 날짜 파티션 + Firestore의 해당 날짜 admin 문서만 조회
+    - 병합 규칙은 _scan_attendance_sources()와 같음 (로그 우선, 같은 키가 없는 Firebase 기록만 추가)
+    """
+    records = [_log_row_to_record(row) for row in attendance_log.read_partition(date_only)]
+    seen_keys = {record_key(record) for record in records}
+    if firestore_status.available(db):
+        today = datetime.now(KST).strftime('%Y-%m-%d')
+        try:
+            firebase_records = day_loader.load(db, date_only, today, attendance_log.day_signature(date_only))
+        except Exception as e:
+            logging.warning(f"Firebase {date_only} 출석 조회 실패 (출석 로그만 사용): {e}")
+            firebase_records = []
+        for data in firebase_records:
+            key = record_key(data)
+            if key not in seen_keys:
+                records.append(data)
+                seen_keys.add(key)
+    return sorted(records, key=lambda r: r.get('date', ''), reverse=True)
+
+def _scan_attendance_sources():
     """
     출석 기록을 CSV 파일과 Firebase에서 로드하는 통합 방식
     Firebase가 실패하는 경우 CSV를 백업으로 사용
+    
+    병합 규칙 (정규 키: 학번, 날짜, 교시):
+    1. CSV 기록이 우선 - CSV의 모든 행을 그대로 사용 (3학년 중복 출석 행 포함)
+    2. Firebase admin 기록은 CSV에 같은 키가 없을 때만 추가
+    3. 오늘 교시별 조회 결과는 앞의 두 단계에 같은 키가 없을 때만 추가
     """
     try:
         attendance_records = []
+        seen_keys = set()  # 이미 추가된 기록의 정규 키
         
-        # 1. CSV 파일에서 출석 기록 로드 (백업 시스템)
-        csv_path = 'attendance.csv'
-        if os.path.exists(csv_path):
-            try:
-                df = pd.read_csv(csv_path, encoding='utf-8')
-                logging.info(f"CSV에서 {len(df)}개 출석 기록 로드")
+        # 1. 날짜별 출석 로그 파일에서 출석 기록 로드 (백업 시스템)
+        try:
+            rows = attendance_log.read_range()
+            logging.info(f"출석 로그에서 {len(rows)}개 출석 기록 로드")
+            
+            for row in rows:
+                record = _log_row_to_record(row)
+                attendance_records.append(record)
+                seen_keys.add(record_key(record))
                 
-                for _, row in df.iterrows():
-                    # 한글 헤더로 접근
-                    student_id = str(row.get('학번', ''))
-                    name = str(row.get('이름', ''))
-                    seat = str(row.get('공강좌석번호', ''))
-                    period = str(row.get('교시', ''))
-                    date = str(row.get('출석일', ''))
-                    
-                    record = {
-                        'id': f"csv_{student_id}_{date}",
-                        'student_id': student_id,
-                        'name': name,
-                        'seat': seat,
-                        'period': period,
-                        'date': date,
-                        'date_only': date[:10] if pd.notna(row.get('출석일')) else '',
-                        'source': 'csv'
-                    }
-                    attendance_records.append(record)
-                    
-            except Exception as csv_error:
-                logging.error(f"CSV 로드 실패: {csv_error}")
+        except Exception as csv_error:
+            logging.error(f"출석 로그 로드 실패: {csv_error}")
         
         # 2. Firebase에서 추가 데이터 로드 (가능한 경우)
         if db:
@@ -447,54 +860,55 @@ def load_attendance():
                 admin_docs = list(db.collection('admin').get())
                 logging.info(f"Firebase admin 컬렉션: {len(admin_docs)}개 문서 (전체 조회)")
                 
-                # admin 컬렉션에서 데이터 추가
-                for admin_doc in admin_docs:
+                # admin 문서별 students 하위 컬렉션을 병렬로 조회 (결과는 문서 순서대로 병합)
+                for admin_doc, students, error in fan_out(
+                        lambda doc, timeout: list(doc.reference.collection('students').get(timeout=timeout)),
+                        admin_docs):
+                    if error:
+                        logging.warning(f"Firebase {admin_doc.id} 조회 실패: {error}")
+                        continue
                     date_period = admin_doc.id
-                    students = list(admin_doc.reference.collection('students').get())
                     
                     for student_doc in students:
                         data = student_doc.to_dict()
                         if data:
                             # CSV에 동일한 기록이 없는 경우만 추가
-                            record_id = f"{data.get('student_id')}_{data.get('date_only')}"
-                            existing = any(r['id'].endswith(record_id) for r in attendance_records)
-                            
-                            if not existing:
+                            key = record_key(data)
+                            if key not in seen_keys:
                                 data['id'] = f"firebase_{date_period}_{student_doc.id}"
                                 data['source'] = 'firebase'
                                 attendance_records.append(data)
+                                seen_keys.add(key)
                                 logging.debug(f"Firebase admin에서 추가: {data.get('name')}")
                 
                 # attendance CSV 파일에서 누락된 최신 기록을 Firebase admin 컬렉션에서 직접 추가
                 try:
-                    # 오늘 날짜의 모든 교시별 기록을 admin 컬렉션에서 직접 조회
+                    # 오늘 날짜의 모든 교시별 기록을 admin 컬렉션에서 직접 조회 (교시별 병렬)
                     today = datetime.now(KST).strftime('%Y-%m-%d')
-                    periods = ['1교시', '2교시', '3교시', '4교시', '5교시', '6교시', '7교시', '8교시', '9교시', '10교시', '시간 외']
                     
-                    for period in periods:
-                        date_period_key = f"{today}_{period}"
-                        try:
-                            admin_doc = db.collection('admin').document(date_period_key).get()
-                            if admin_doc.exists:
-                                # 해당 교시의 모든 학생 조회
-                                students_collection = admin_doc.reference.collection('students')
-                                students_docs = list(students_collection.get())
-                                
-                                for student_doc in students_docs:
-                                    data = student_doc.to_dict()
-                                    if data:
-                                        # CSV에 동일한 기록이 없는 경우만 추가
-                                        record_id = f"{data.get('student_id')}_{today}"
-                                        existing = any(record_id in r.get('id', '') for r in attendance_records)
-                                        
-                                        if not existing:
-                                            data['id'] = f"firebase_admin_{date_period_key}_{student_doc.id}"
-                                            data['source'] = 'firebase_admin'
-                                            attendance_records.append(data)
-                                            logging.info(f"Firebase admin에서 {period} 추가: {data.get('name')}")
-                        
-                        except Exception as period_error:
+                    def fetch_period(date_period_key, timeout):
+                        admin_doc = db.collection('admin').document(date_period_key).get(timeout=timeout)
+                        if not admin_doc.exists:
+                            return []
+                        return list(admin_doc.reference.collection('students').get(timeout=timeout))
+                    
+                    for date_period_key, students_docs, period_error in fan_out(
+                            fetch_period, [f"{today}_{period}" for period in ATTENDANCE_PERIODS]):
+                        if period_error:
                             logging.debug(f"Firebase {date_period_key} 조회 실패: {period_error}")
+                            continue
+                        
+                        for student_doc in students_docs:
+                            data = student_doc.to_dict()
+                            if data:
+                                # CSV에 동일한 기록이 없는 경우만 추가
+                                key = record_key(data)
+                                if key not in seen_keys:
+                                    data['id'] = f"firebase_admin_{date_period_key}_{student_doc.id}"
+                                    data['source'] = 'firebase_admin'
+                                    attendance_records.append(data)
+                                    seen_keys.add(key)
+                                    logging.info(f"Firebase admin에서 {data.get('period')} 추가: {data.get('name')}")
                             
                 except Exception as admin_error:
                     logging.warning(f"Firebase admin 세부 조회 실패: {admin_error}")
@@ -512,14 +926,24 @@ def load_attendance():
         logging.error(f"출석 기록 로딩 중 치명적 오류: {e}")
         return []
 
-# 출석 상태 캐싱을 위한 딕셔너리와 캐시 만료 시간 (초)
-attendance_status_cache = {}
-CACHE_EXPIRY = 5  # 5초로 대폭 감소 (중복 출석 방지 강화)
+# 출석 상태 캐싱 (학번별 LRU + 만료 시간, 초) - 출석 확인 화면용, Firestore에서 받은 이번 주 날짜만 저장
+# - 출석 로그 부분은 매번 다시 확인하므로 어느 워커의 출석 등록/삭제든 바로 반영 (cached_weekly_status)
+# - 다른 기기의 Firestore 등록만 최대 CACHE_EXPIRY 동안 늦게 보일 수 있음
+# - 중복 출석 방지는 캐시와 무관 (check_in이 출석 로그 잠금 안에서 이번 주 기록을 다시 확인)
+CACHE_EXPIRY = 60
+ATTENDANCE_STATUS_CACHE_SIZE = 4096
+attendance_status_cache = TTLCache(maxsize=ATTENDANCE_STATUS_CACHE_SIZE, ttl=CACHE_EXPIRY)
 student_data_cache = {}  # 학생 정보 캐시
 STUDENT_CACHE_EXPIRY = 600  # 학생 정보는 10분 동안 캐시 (성능 향상)
 
 # 중복 출석 방지를 위한 잠금 메커니즘 (동시 요청 처리용)
-attendance_locks = {}
+# 학번 해시로 고정 개수의 잠금 중 하나를 선택 (학생 수와 무관하게 메모리 일정)
+ATTENDANCE_LOCK_STRIPES = 64
+attendance_locks = [threading.Lock() for _ in range(ATTENDANCE_LOCK_STRIPES)]
+
+def get_student_lock(student_id):
+    """학번에 해당하는 출석 잠금 반환 (같은 학번은 항상 같은 잠금)"""
+    return attendance_locks[zlib.crc32(str(student_id).encode('utf-8')) % ATTENDANCE_LOCK_STRIPES]
 
 # 이번 주 날짜 범위 정보 캐싱 (매번 계산하지 않도록)
 current_week_info = {
@@ -566,85 +990,199 @@ def get_current_week_range():
 
 def check_weekly_attendance_limit(student_id):
     """
-    학번별 구조에서 학생의 이번 주 출석 확인 (초고속)
-    구조: students/{student_id}/attendance/{date}
-    - Firebase 읽기 횟수 최소화 (해당 학생만 조회)
+    학생의 이번 주 출석 확인 (초고속)
+    - 출석 로그의 이번 주 파티션에서 해당 학생 행만 확인 (저널에만 있고 아직 Firestore에 반영되지 않은 출석 포함)
+    - Firestore 연결 시 attendance/{student_id}/records의 이번 주 문서도 함께 확인 (다른 기기/관리자 등록)
+    - Firestore가 없거나 시간 초과되면 출석 로그만으로 응답 (오프라인 모드)
+    - 출석 로그를 읽지 못하면 예외 (확인할 수 없는 상태는 캐시하지 않음)
+    - asgi.py는 같은 순서로 Firestore만 AsyncClient로 조회
     
     Returns:
         (exceeded, count, recent_dates): 
         - exceeded: 주 1회 초과 여부 (True/False)
-        - count: 이번 주 출석 횟수
+        - count: 이번 주 출석 횟수 (출석한 날짜 수)
         - recent_dates: 최근 출석 날짜 목록
     """
-    global attendance_status_cache
+    # 캐시 확인 (Firestore 부분만 캐시, 출석 로그는 다시 확인)
+    status = cached_weekly_status(student_id)
+    if status is not None:
+        logging.debug(f"학생 {student_id}의 출석 상태 캐시 사용")
+        return status
     
-    # 캐시 확인
-    cache_key = f"weekly_limit_{student_id}"
-    if cache_key in attendance_status_cache:
-        cache_entry = attendance_status_cache[cache_key]
-        if time.time() - cache_entry['timestamp'] < CACHE_EXPIRY:
-            logging.debug(f"학생 {student_id}의 출석 상태 캐시 사용")
-            return cache_entry['exceeded'], cache_entry['count'], cache_entry['recent_dates']
+    # 현재 주 범위 계산 (Firestore 전용 기록 변경 번호는 조회 전에 읽어 조회 중 변경도 다음 확인 때 반영)
+    sunday_str, saturday_str = get_week_bounds(datetime.now(KST))
+    remote_changes = attendance_log.remote_changes(sunday_str, saturday_str)
+    local_dates = local_week_dates(student_id, sunday_str, saturday_str)
+    remote_dates = firestore_week_dates(student_id, sunday_str, saturday_str)
     
+    return store_weekly_status(student_id, (sunday_str, saturday_str), remote_changes, local_dates, remote_dates)
+
+def cached_weekly_status(student_id):
+    """
+    캐시된 Firestore 날짜 + 출석 로그로 계산한 이번 주 출석 상태 (캐시가 없거나 무효화되었으면 None)
+    - 주가 바뀌었거나 어느 워커에서든 이번 주 Firestore 전용 기록을 바꿨으면(remote_changes) 무효
+    - 출석 로그를 읽지 못하면 예외
+    """
+    cache_entry = attendance_status_cache.get(student_id)
+    if cache_entry is None:
+        return None
+    sunday_str, saturday_str = cache_entry['week']
+    if (get_week_bounds(datetime.now(KST)) != cache_entry['week'] or
+            attendance_log.remote_changes(sunday_str, saturday_str) != cache_entry['remote_changes']):
+        attendance_status_cache.invalidate(student_id)
+        return None
+    return summarize_week_dates(local_week_dates(student_id, sunday_str, saturday_str) | cache_entry['remote_dates'])
+
+def local_week_dates(student_id, sunday_str, saturday_str):
+    """
+    출석 로그에서 학생의 이번 주 출석 날짜 집합
+    - 출석 로그를 읽지 못하면 예외 그대로 (빈 집합으로 '출석 없음'을 캐시하지 않도록 - 호출한 곳에서 오류 응답)
+    """
+    logging.debug(f"학생 {student_id}의 이번 주({sunday_str} ~ {saturday_str}) 출석 기록 확인 중")
+    return {str(row.get('출석일') or '')[:10]
+            for row in attendance_log.find_student(student_id, sunday_str, saturday_str)}
+
+def firestore_week_dates(student_id, sunday_str, saturday_str):
+    """Firestore의 이번 주 출석 날짜 집합 (연결이 없거나 재시도 대기 중이거나 실패하면 None)"""
+    if not firestore_status.available(db):
+        return None
     try:
-        if not db:
-            logging.error("Firebase DB 연결이 설정되지 않았습니다.")
-            return False, 0, []
-        
-        # 현재 주 범위 계산
-        now = datetime.now(KST)
-        days_to_sunday = now.weekday() + 1
-        if days_to_sunday == 7:
-            days_to_sunday = 0
-            
-        sunday = now - timedelta(days=days_to_sunday)
-        sunday_str = sunday.strftime('%Y-%m-%d')
-        
-        saturday = sunday + timedelta(days=6)
-        saturday_str = saturday.strftime('%Y-%m-%d')
-        
-        logging.debug(f"학생 {student_id}의 이번 주({sunday_str} ~ {saturday_str}) 출석 기록 확인 중")
-        
-        # 새 구조에서 학번별 출석 기록만 조회 (매우 효율적)
-        student_ref = db.collection('attendance').document(student_id).collection('records')
-        week_records = student_ref.where('date_only', '>=', sunday_str).where('date_only', '<=', saturday_str).get()
-        
-        # 결과 처리
-        count = len(week_records)
-        recent_dates = []
-        
-        for record in week_records:
-            data = record.to_dict()
-            date_only = data.get('date_only', '')
-            recent_dates.append(date_only)
-        
-        # 결과 정리
-        recent_dates = sorted(recent_dates, reverse=True)
-        exceeded = count >= 1  # 1회 이상 출석했으면 제한
-        
-        # 캐시 저장
-        attendance_status_cache[cache_key] = {
-            'exceeded': exceeded,
-            'count': count,
-            'recent_dates': recent_dates,
-            'timestamp': time.time()
-        }
-        
-        logging.debug(f"학생 {student_id}의 이번 주 출석 횟수: {count}, 초과 여부: {exceeded}")
-        return exceeded, count, recent_dates
-        
+        week_records = week_records_query(db, student_id, sunday_str, saturday_str).get(timeout=FIRESTORE_CHECK_TIMEOUT)
     except Exception as e:
-        logging.error(f"주간 출석 제한 확인 중 오류: {e}")
-        return False, 0, []
+        firestore_status.mark_failure(e)
+        logging.warning(f"Firestore 주간 출석 확인 실패, 출석 로그로 확인: {e}")
+        return None
+    firestore_status.mark_success()
+    return {record.to_dict().get('date_only', '') for record in week_records}
+
+def week_records_query(client, student_id, sunday_str, saturday_str):
+    """학번별 출석 기록 중 이번 주 범위 쿼리 (동기/비동기 Firestore 클라이언트 공통)"""
+    student_ref = client.collection('attendance').document(student_id).collection('records')
+    return student_ref.where('date_only', '>=', sunday_str).where('date_only', '<=', saturday_str)
+
+def summarize_week_dates(dates):
+    """출석 날짜 집합을 (exceeded, count, recent_dates)로 정리"""
+    recent_dates = sorted((date for date in dates if date), reverse=True)
+    count = len(recent_dates)
+    exceeded = count >= 1  # 1회 이상 출석했으면 제한
+    return exceeded, count, recent_dates
+
+def store_weekly_status(student_id, week, remote_changes, local_dates, remote_dates):
+    """
+    이번 주 출석 상태 계산, Firestore에서 받은 날짜는 캐시에 저장 (Firestore를 조회하지 못했으면 저장하지 않음)
+    
+    Args:
+        week: (일요일, 토요일) 날짜 문자열
+        remote_changes: Firestore 조회 전에 읽은 attendance_log.remote_changes() 값
+        local_dates: 출석 로그의 이번 주 출석 날짜 집합
+        remote_dates: Firestore의 이번 주 출석 날짜 집합 (조회하지 못했으면 None)
+    """
+    if remote_dates is not None:
+        attendance_status_cache.set(student_id, {
+            'week': tuple(week),
+            'remote_changes': remote_changes,
+            'remote_dates': set(remote_dates)
+        })
+    exceeded, count, recent_dates = summarize_week_dates(local_dates | (remote_dates or set()))
+    
+    logging.debug(f"학생 {student_id}의 이번 주 출석 횟수: {count}, 초과 여부: {exceeded}")
+    return exceeded, count, recent_dates
+
+# ================== [실시간 캐시 감시] ==================
+
+# 활성 경고 학생 목록 (출석 확인 시 Firestore 조회 없이 사용)
+active_warnings = WarningRegistry()
+WARNINGS_REFRESH = int(os.environ.get('WARNINGS_REFRESH', 300))  # 실시간 감시가 없을 때 전체 목록 재로드 주기 (초)
+# 경고 변경 표시 파일 - 경고를 추가/해제/삭제한 워커가 수정 시간을 갱신하면 다른 워커가 다음 확인 때 다시 로드
+WARNINGS_STAMP_PATH = os.environ.get('WARNINGS_STAMP_PATH', 'warnings.stamp')
+
+def touch_warnings_stamp():
+    """경고 변경 후 표시 파일의 수정 시간 갱신 (다른 워커의 활성 경고 목록 무효화)"""
+    try:
+        with open(WARNINGS_STAMP_PATH, 'a'):
+            pass
+        os.utime(WARNINGS_STAMP_PATH)
+    except OSError as e:
+        logging.warning(f"경고 변경 표시 파일 갱신 실패: {e}")
+
+def warnings_changed_since(loaded_at):
+    """마지막 로드 이후 어느 워커에서든 경고가 바뀌었는지 여부"""
+    try:
+        return os.stat(WARNINGS_STAMP_PATH).st_mtime >= loaded_at
+    except OSError:
+        return False
+
+def _on_schedule_snapshot(snapshots):
+    """settings/schedule 변경 시 시간표 캐시 즉시 교체"""
+    doc = snapshots[0] if snapshots else None
+    periods = convert_schedule_periods(doc.to_dict().get('periods', [])) if doc and doc.exists else None
+    set_schedule_cache(periods)
+
+def _on_warnings_snapshot(snapshots):
+    """warnings 컬렉션 변경 시 활성 경고 목록 재구성"""
+    active_warnings.load([(doc.id, doc.to_dict()) for doc in snapshots])
+
+def _on_students_backup_snapshot(snapshots):
+    """
+    다른 서버/관리자가 학생 명단을 백업하면 auto_restore_on_startup()과 같은 기준으로 스냅샷 데이터에서 바로 복원
+    - 워커마다 감시가 동작하므로 출석 로그 잠금 안에서 다시 확인 (한 워커만 파일을 쓰고
+      나머지 워커는 명단 캐시가 파일 변경을 감지)
+    """
+    doc = snapshots[0] if snapshots else None
+    backup_data = doc.to_dict() if doc and doc.exists else None
+    if not backup_data or not backup_data.get('backup_date'):
+        return
+    with attendance_log.locked():
+        if students_backup_is_newer(backup_data):
+            logging.info("☁️ 다른 곳에서 백업한 학생 명단이 더 최신 - 복원 시작")
+            restore_students_from_firebase(backup_data)
+
+def start_cache_watchers():
+    """워커별 Firestore 실시간 감시 시작 (FIRESTORE_WATCHERS=1일 때만)"""
+    if not watchers_enabled():
+        return []
+    return start_watchers(db, [
+        ('settings/schedule', lambda client: client.collection('settings').document('schedule'), _on_schedule_snapshot),
+        ('warnings', lambda client: client.collection('warnings'), _on_warnings_snapshot),
+        ('backups/students_backup', lambda client: client.collection('backups').document('students_backup'), _on_students_backup_snapshot),
+    ])
 
 # ================== [ROUTES] ==================
 
+def load_active_warnings():
+    """warnings 컬렉션의 활성 경고 전체를 메모리 목록으로 로드"""
+    if not db:
+        return
+    started = time.time()
+    warning_docs = db.collection('warnings').where('active', '==', True).get(timeout=READ_TIMEOUT)
+    active_warnings.load([(doc.id, doc.to_dict()) for doc in warning_docs], loaded_at=started)
+    logging.info(f"활성 경고 목록 로드: {len(active_warnings.student_ids())}명")
+
+def find_active_warning(student_id):
+    """
+    학생의 활성 경고 조회 (없으면 None) - 네트워크 조회 없이 메모리 목록 사용
+    - 실시간 감시가 동작 중이 아니면(미사용, 오류로 종료) WARNINGS_REFRESH마다,
+      또는 다른 워커가 경고를 바꿔 표시 파일이 갱신되면 전체 목록을 다시 로드
+    - 만료된 경고는 목록에서 자동으로 제외됨
+    """
+    age = active_warnings.age()
+    stale = age is None or age > WARNINGS_REFRESH or warnings_changed_since(active_warnings.loaded_at)
+    if not watch_active('warnings') and stale and firestore_status.available(db):
+        try:
+            load_active_warnings()
+            firestore_status.mark_success()
+        except Exception as e:
+            # 오프라인 모드에서는 마지막으로 로드한 경고 목록 사용
+            firestore_status.mark_failure(e)
+            logging.warning(f"활성 경고 목록 로드 실패, 기존 목록 사용: {e}")
+    return active_warnings.get(student_id)
+
 @app.route('/api/check_attendance', methods=['GET', 'POST'])
 def api_check_attendance():
     """
-    학생 ID로 해당 주에 출석 기록이 있는지 직접 확인하는 API
-    - 정확한 기록 확인을 위해 캐시 없이 DB에서 직접 조회
-    - 중복 출석 방지를 위한 실시간 검증
+    학생 ID로 해당 주에 출석 기록이 있는지 확인하는 API
+    - 출석 로그와 attendance/{student_id}/records에서 이번 주 범위만 조회 (Firestore 연결이 없으면 출석 로그만)
+    - 학생별 주간 출석 상태 캐시 사용 (저장/삭제 시 해당 학생만 무효화)
     - 경고받은 학생 출석 제한 기능 추가
     """
     student_id = request.args.get('student_id')
@@ -653,113 +1191,75 @@ def api_check_attendance():
     if not student_id and request.method == 'POST':
         student_id = request.form.get('student_id')
     
-    # 타임스탬프 확인 (캐시 방지)
-    timestamp = request.args.get('t')
-    
     if not student_id:
         return jsonify({'error': '학번이 필요합니다.', 'has_attendance': False})
     
-    # 경고받은 학생인지 확인 (추가)
-    try:
-        # 'warnings' 컬렉션에서 해당 학생 ID에 대한 활성화된 경고 확인
-        if db:
-            warnings_query = db.collection('warnings').where('student_id', '==', student_id).where('active', '==', True)
-            warning_docs = warnings_query.get()
-            
-            # 활성화된 경고가 있는지 확인
-            for doc in warning_docs:
-                warning_data = doc.to_dict()
-                # 경고 상태인 경우 출석 제한
-                return jsonify({
-                    'warning': True,
-                    'has_attendance': False,
-                    'message': '경고 상태로 인해 출석이 제한되었습니다. 관리자에게 문의하세요.',
-                    'warning_reason': warning_data.get('reason', '경고 상태')
-                })
-    except Exception as e:
-        logging.error(f"경고 확인 오류: {e}")
-        # 경고 확인 실패 시에도 계속 진행하여 출석은 확인
+    warning_response = attendance_warning_response(student_id)
+    if warning_response:
+        return jsonify(warning_response)
     
     try:
-        # 현재 주의 범위 계산 (일요일부터 토요일까지)
-        now = datetime.now(KST)
-        
-        # 이번 주 일요일(주 시작) 계산
-        days_to_sunday = now.weekday() + 1  # 월=0, 일=6이므로 역으로 계산
-        if days_to_sunday == 7:  # 일요일인 경우
-            days_to_sunday = 0
-            
-        sunday = now - timedelta(days=days_to_sunday)
-        sunday = sunday.replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # 토요일(주 마지막) 계산
-        days_to_saturday = (5 - now.weekday()) % 7  # 토요일까지 남은 일수
-        saturday = now + timedelta(days=days_to_saturday)
-        saturday = saturday.replace(hour=23, minute=59, second=59, microsecond=999999)
+        cached = attendance_status_cache.peek(student_id) is not None
         
-        sunday_str = sunday.strftime('%Y-%m-%d')
-        saturday_str = saturday.strftime('%Y-%m-%d')
-        
-        # Firebase 직접 쿼리
-        if not db:
-            logging.error("Firebase DB 연결이 설정되지 않았습니다.")
-            return jsonify({'error': 'Firebase 연결 오류', 'has_attendance': False})
-            
-        try:
-            # 학생 ID로 필터링하여 쿼리 실행 (인덱스 오류 없는 단순 쿼리)
-            records = db.collection('attendances').where('student_id', '==', student_id).get()
-            
-            # 이번 주에 해당하는 기록만 필터링 (직접 확인)
-            has_attendance = False
-            attendance_date = ""
-            recent_dates = []
-            
-            for record in records:
-                data = record.to_dict()
-                date_only = data.get('date_only', '')
-                
-                # 이번 주 날짜 범위에 있는지 확인 
-                if sunday_str <= date_only <= saturday_str:
-                    has_attendance = True
-                    attendance_date = date_only
-                    recent_dates.append(date_only)
-            
-            # 결과 정리 (캐시 사용 안함)
-            recent_dates = sorted(recent_dates, reverse=True)  # 최신 날짜 먼저
-            
-            # 한국어 요일 추가
-            formatted_date = ""
-            if attendance_date:
-                try:
-                    # yyyy-mm-dd 형식의 날짜 문자열에서 datetime 객체로 변환
-                    date_obj = datetime.strptime(attendance_date, '%Y-%m-%d')
-                    # 한국어 요일
-                    weekdays = ['월', '화', '수', '목', '금', '토', '일']
-                    weekday_kr = weekdays[date_obj.weekday()]
-                    # 날짜 형식: 5월 18일 (토)
-                    formatted_date = f"{date_obj.month}월 {date_obj.day}일 ({weekday_kr})"
-                except Exception as e:
-                    logging.error(f"날짜 변환 중 오류: {e}")
-                    formatted_date = attendance_date
-            
-            logging.info(f"학생 {student_id}의 이번 주 출석 상태: {has_attendance}, 출석일: {recent_dates}")
-            
-            return jsonify({
-                'has_attendance': has_attendance,
-                'attendance_date': attendance_date,
-                'formatted_date': formatted_date,
-                'cached': False,
-                'timestamp': str(datetime.now(KST))
-            })
-            
-        except Exception as db_error:
-            logging.error(f"Firebase 쿼리 실행 중 오류: {db_error}")
-            raise
+        # 이번 주 범위의 기록만 조회 (기록이 많아도 비용 일정)
+        return jsonify(attendance_check_response(student_id, check_weekly_attendance_limit(student_id), cached))
         
     except Exception as e:
         logging.error(f"출석 확인 API 오류: {e}")
         return jsonify({'error': str(e), 'has_attendance': False})
 
+def attendance_warning_response(student_id):
+    """경고받은 학생이면 출석 제한 응답, 아니면 None (/api/check_attendance)"""
+    try:
+        warning_data = find_active_warning(student_id)
+        if warning_data:
+            # 경고 상태인 경우 출석 제한
+            return {
+                'warning': True,
+                'has_attendance': False,
+                'message': '경고 상태로 인해 출석이 제한되었습니다. 관리자에게 문의하세요.',
+                'warning_reason': warning_data.get('reason', '경고 상태')
+            }
+    except Exception as e:
+        logging.error(f"경고 확인 오류: {e}")
+        # 경고 확인 실패 시에도 계속 진행하여 출석은 확인
+    return None
+
+def attendance_check_response(student_id, weekly_status, cached):
+    """주간 출석 상태를 /api/check_attendance 응답으로 변환"""
+    exceeded, count, recent_dates = weekly_status
+    
+    # 3학년 학생들은 중복 출석 가능 (학번이 3으로 시작)
+    is_third_grade = str(student_id).startswith('3')
+    has_attendance = exceeded and not is_third_grade
+    attendance_date = recent_dates[0] if has_attendance and recent_dates else ""
+    
+    # 한국어 요일 추가
+    formatted_date = ""
+    if attendance_date:
+        try:
+            # yyyy-mm-dd 형식의 날짜 문자열에서 datetime 객체로 변환
+            date_obj = datetime.strptime(attendance_date, '%Y-%m-%d')
+            # 한국어 요일
+            weekdays = ['월', '화', '수', '목', '금', '토', '일']
+            weekday_kr = weekdays[date_obj.weekday()]
+            # 날짜 형식: 5월 18일 (토)
+            formatted_date = f"{date_obj.month}월 {date_obj.day}일 ({weekday_kr})"
+        except Exception as e:
+            logging.error(f"날짜 변환 중 오류: {e}")
+            formatted_date = attendance_date
+    
+    logging.info(f"학생 {student_id}의 이번 주 출석 상태: {has_attendance}, 출석일: {recent_dates}")
+    
+    return {
+        'has_attendance': has_attendance,
+        'attendance_date': attendance_date,
+        'formatted_date': formatted_date,
+        'is_third_grade': is_third_grade,
+        'cached': cached,
+        'timestamp': str(datetime.now(KST))
+    }
+
 @app.route('/check_attendance_status')
 def check_attendance_status():
     """학생의 출석 상태를 확인하는 API (주간 출석 제한용)"""
@@ -769,42 +1269,46 @@ def check_attendance_status():
     
     try:
         # 주간 출석 상태 확인
-        exceeded, count, recent_dates = check_weekly_attendance_limit(student_id)
-        
-        # 디버깅용 로그 추가
-        logging.info(f"check_attendance_status: 학생 {student_id} - exceeded: {exceeded}, count: {count}, recent_dates: {recent_dates}")
-        
-        # 최근 출석일 포맷팅
-        last_attendance_date = ""
-        if recent_dates:
-            last_attendance_date = recent_dates[0]  # 가장 최근 출석일
-        
-        # 3학년 학생들은 중복 출석 가능 (학번이 3으로 시작)
-        is_third_grade = str(student_id).startswith('3')
-        
-        # 3학년 학생의 경우 중복 출석 허용
-        if is_third_grade:
-            # 3학년 학생은 항상 출석 가능 (중복 출석 무제한)
-            return jsonify({
-                'already_attended': False,  # 항상 출석 가능
-                'attendance_count': count,
-                'last_attendance_date': last_attendance_date,
-                'is_third_grade': True,
-                'show_third_grade_popup': count > 0  # 이미 출석한 적이 있으면 알림 표시
-            })
-        else:
-            # 1-2학년 학생 (주 1회만) - 이미 출석한 경우 즉시 차단
-            return jsonify({
-                'already_attended': exceeded,  # 1회 출석 후 True가 됨
-                'attendance_count': count,
-                'last_attendance_date': last_attendance_date,
-                'is_third_grade': False,
-                'show_third_grade_popup': False
-            })
+        return jsonify(attendance_status_response(student_id, check_weekly_attendance_limit(student_id)))
     except Exception as e:
         logging.error(f"출석 상태 확인 중 오류: {e}")
         return jsonify({'error': str(e), 'already_attended': False})
 
+def attendance_status_response(student_id, weekly_status):
+    """주간 출석 상태를 /check_attendance_status 응답으로 변환"""
+    exceeded, count, recent_dates = weekly_status
+    
+    # 디버깅용 로그 추가
+    logging.info(f"check_attendance_status: 학생 {student_id} - exceeded: {exceeded}, count: {count}, recent_dates: {recent_dates}")
+    
+    # 최근 출석일 포맷팅
+    last_attendance_date = ""
+    if recent_dates:
+        last_attendance_date = recent_dates[0]  # 가장 최근 출석일
+    
+    # 3학년 학생들은 중복 출석 가능 (학번이 3으로 시작)
+    is_third_grade = str(student_id).startswith('3')
+    
+    # 3학년 학생의 경우 중복 출석 허용
+    if is_third_grade:
+        # 3학년 학생은 항상 출석 가능 (중복 출석 무제한)
+        return {
+            'already_attended': False,  # 항상 출석 가능
+            'attendance_count': count,
+            'last_attendance_date': last_attendance_date,
+            'is_third_grade': True,
+            'show_third_grade_popup': count > 0  # 이미 출석한 적이 있으면 알림 표시
+        }
+    else:
+        # 1-2학년 학생 (주 1회만) - 이미 출석한 경우 즉시 차단
+        return {
+            'already_attended': exceeded,  # 1회 출석 후 True가 됨
+            'attendance_count': count,
+            'last_attendance_date': last_attendance_date,
+            'is_third_grade': False,
+            'show_third_grade_popup': False
+        }
+
 @app.route('/')
 def index():
     """관리자 로그인 여부에 따라 적절한 페이지로 리다이렉트"""
@@ -850,33 +1354,6 @@ def attendance():
             flash('학번을 입력해주세요.', 'danger')
             return redirect(url_for('attendance'))
         
-        # 3학년 학생 확인 (학번이 3으로 시작하는 경우 중복 출석 허용)
-        is_third_grade = str(student_id).startswith('3')
-        
-        # 주간 출석 제한 확인 (3학년 제외, 1-2학년만 1회 제한)
-        # 출석 API로 직접 확인 (자바스크립트에서 이미 확인했지만 더블체크)
-        if not is_third_grade:  # 3학년이 아닌 경우만 제한 확인
-            try:
-                # 직접 함수 호출로 변경 (API 호출 방식 문제 수정)
-                exceeded, count, recent_dates = check_weekly_attendance_limit(student_id)
-                
-                if exceeded:
-                    # 이미 출석한 학생 (주 1회 초과)
-                    attendance_date = recent_dates[0] if recent_dates else ""
-                    flash(f'이번 주에 이미 출석했습니다. 출석일: {attendance_date}', 'danger')
-                    return redirect(url_for('attendance'))
-            except Exception as e:
-                # 확인 중 오류 발생 시 기존 방식으로 확인
-                logging.error(f"출석 확인 중 오류: {e}")
-                exceeded, count, recent_dates = check_weekly_attendance_limit(student_id)
-                if exceeded:
-                    # 주간 1회 초과 출석 제한
-                    formatted_dates = ', '.join(recent_dates)
-                    flash(f'주간 출석 제한 (1회/주)을 초과했습니다. 최근 출석일: {formatted_dates}', 'danger')
-                    return redirect(url_for('attendance'))
-        else:
-            logging.info(f"3학년 학생 {student_id} 중복 출석 허용")
-        
         # name과 seat이 비어있는 경우 학생 정보 찾기
         if not name or not seat:
             student_data = load_student_data()
@@ -903,37 +1380,21 @@ def attendance():
                     flash('해당 학번의 학생 정보를 찾을 수 없습니다.', 'danger')
                     return redirect(url_for('attendance'))
         
-        # 마지막으로 한번 더 중복 출석 확인 (3학년 제외)
-        # 다른 탭이나 브라우저에서 동시에 요청이 들어올 경우 대비
-        if not is_third_grade:  # 3학년이 아닌 경우만 다시 확인
-            try:
-                # 다시 한번 더 확인
-                exceeded, count, recent_dates = check_weekly_attendance_limit(student_id)
-                
-                if exceeded:
-                    # 이미 출석한 학생
-                    attendance_date = recent_dates[0] if recent_dates else ""
-                    flash(f'이번 주에 이미 출석했습니다. 출석일: {attendance_date}', 'danger')
-                    return redirect(url_for('attendance'))
-            except Exception as e:
-                flash(f'출석 등록 중 오류가 발생했습니다: {str(e)}', 'danger')
-                return redirect(url_for('attendance'))
-                
         # 출석 정보 저장
+        # 주간 출석 제한 확인(3학년 제외)과 저장을 check_in()의 출석 로그 잠금 안에서 한 번에 처리
+        # (다른 탭이나 브라우저에서 동시에 요청이 들어와도 잠금이 중복을 막음, Firestore 연결이 끊겨도 등록)
         try:
             # 교시 텍스트 설정
             period_text_for_db = period_text
             if period_text == "4교시 (도서실 이용 불가)":
                 period_text_for_db = "4교시"
             
-            # 출석 정보 저장
-            if save_attendance(student_id, name, seat, period_text_for_db):
-                # 캐시 갱신을 위해 캐시 키 삭제 (강제 새로고침)
-                cache_key = f"weekly_limit_{student_id}" 
-                if cache_key in attendance_status_cache:
-                    del attendance_status_cache[cache_key]
-                    
+            result, attendance_date = check_in(student_id, name, seat, period_text_for_db)
+            if result == 'saved':
                 flash('출석이 성공적으로 등록되었습니다!', 'success')
+            elif result == 'exceeded':
+                # 이미 출석한 학생 (주 1회 초과)
+                flash(f'이번 주에 이미 출석했습니다. 출석일: {attendance_date}', 'danger')
             else:
                 flash('출석 등록에 실패했습니다.', 'danger')
         except Exception as e:
@@ -949,9 +1410,12 @@ def attendance():
 @app.route('/lookup_name')
 def lookup_name():
     """학생 정보 조회 API"""
-    student_id = request.args.get('student_id', '').strip()
+    return jsonify(lookup_student(request.args.get('student_id', '').strip()))
+
+def lookup_student(student_id):
+    """학번으로 학생 이름과 좌석 조회 (/lookup_name 응답)"""
     if not student_id:
-        return jsonify({'error': '학번이 없습니다.'})
+        return {'error': '학번이 없습니다.'}
     
     # 학생 데이터 로드 (Excel 파일에서)
     student_data = load_student_data()
@@ -959,11 +1423,11 @@ def lookup_name():
     
     if student_info:
         # Excel 파일에서 찾은 정보 반환
-        return jsonify({
+        return {
             'success': True,
             'name': student_info[0],
             'seat': student_info[1]
-        })
+        }
     else:
         # 테스트용 하드코딩 데이터 (Excel 파일에서 찾지 못한 경우)
         test_data = {
@@ -975,14 +1439,26 @@ def lookup_name():
         }
         
         if student_id in test_data:
-            return jsonify({
+            return {
                 'success': True,
                 'name': test_data[student_id]["name"],
                 'seat': test_data[student_id]["seat"]
-            })
+            }
             
         # 어디에서도 찾지 못한 경우
-        return jsonify({'error': '학번에 해당하는 학생 정보가 없습니다.'})
+        return {'error': '학번에 해당하는 학생 정보가 없습니다.'}
+
+@app.route('/search_students')
+def search_students_api():
+    """관리자 검색창 자동 완성용 학생 검색 API"""
+    if not session.get('admin'):
+        return jsonify({"error": "관리자 권한이 필요합니다."}), 403
+
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': True, 'students': []})
+    limit = min(max(request.args.get('limit', STUDENT_SEARCH_LIMIT, type=int), 1), 100)
+    return jsonify({'success': True, 'students': search_students(query, limit)})
 
 @app.route('/list', methods=['GET'])
 def list_attendance():
@@ -995,67 +1471,39 @@ def list_attendance():
         search_query = request.args.get('search', '').strip()
         search_field = request.args.get('search_field', 'all')
         
-        # 모든 출석 기록 로드
-        all_records = load_attendance()
-        total_count = len(all_records)
-        
-        # 디버깅: 로드된 기록 수 로그
-        logging.info(f"관리자 페이지 - 로드된 출석 기록: {total_count}개")
-        
-        # 검색 기능 적용
-        if search_query:
-            filtered_records = []
-            search_query = search_query.lower()
-            
-            for record in all_records:
-                # 검색 필드에 따른 필터링
-                if search_field == 'all':
-                    # 모든 필드에서 검색
-                    if (
-                        search_query in str(record.get('student_id', '')).lower() or
-                        search_query in str(record.get('name', '')).lower() or
-                        search_query in str(record.get('seat', '')).lower() or
-                        search_query in str(record.get('period', '')).lower() or
-                        search_query in str(record.get('date', '')).lower()
-                    ):
-                        filtered_records.append(record)
-                else:
-                    # 특정 필드에서만 검색
-                    field_value = str(record.get(search_field, '')).lower()
-                    if search_query in field_value:
-                        filtered_records.append(record)
-            
-            all_records = filtered_records
-            total_count = len(all_records)
-        
-        # 정렬 처리
-        if sort_by and all_records:
-            reverse = sort_direction.lower() == 'desc'
-            
-            def get_sort_key(record):
-                value = record.get(sort_by)
-                # 날짜는 특별 처리
-                if sort_by == 'date':
-                    try:
-                        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
-                    except:
-                        return datetime.min
-                return str(value).lower() if value is not None else ""
-                
-            all_records = sorted(all_records, key=get_sort_key, reverse=reverse)
-        
-        # 간단한 페이지네이션
-        total_pages = (len(all_records) + limit - 1) // limit if all_records else 1
-        current_page = min(max(1, current_page), total_pages)
-        start_idx = (current_page - 1) * limit
-        end_idx = start_idx + limit
-        paged_records = all_records[start_idx:end_idx] if all_records else []
+        # 정확히 일치하는 조건 (저장소 인덱스로 필터)
+        filter_student_id = request.args.get('student_id', '').strip()
+        filter_date = request.args.get('date', '').strip()
+        filter_period = request.args.get('period', '').strip()
+        
+        # 저장소 인덱스로 필터/정렬 후 한 페이지만 조회 (이전/다음은 커서 사용)
+        refresh_attendance_store()
+        result = query_records(attendance_store,
+                               sort_by=sort_by,
+                               sort_direction=sort_direction,
+                               page=current_page,
+                               limit=limit,
+                               search=search_query,
+                               search_field=search_field,
+                               student_id=filter_student_id,
+                               date_only=filter_date,
+                               period=filter_period,
+                               after=request.args.get('after'),
+                               before=request.args.get('before'))
+        
+        # 페이지 링크에 유지할 조건
+        filter_args = {k: v for k, v in (('student_id', filter_student_id),
+                                         ('date', filter_date),
+                                         ('period', filter_period)) if v}
         
         return render_template('list_simple.html', 
-                              records=paged_records, 
-                              current_page=current_page, 
-                              total_pages=total_pages, 
-                              total_count=total_count,
+                              records=result['records'], 
+                              current_page=result['current_page'], 
+                              total_pages=result['total_pages'], 
+                              total_count=result['total_count'],
+                              next_cursor=result['next_cursor'],
+                              prev_cursor=result['prev_cursor'],
+                              filter_args=filter_args,
                               limit=limit,
                               sort_by=sort_by,
                               sort_direction=sort_direction,
@@ -1076,15 +1524,19 @@ def by_period():
     today = datetime.now(KST).strftime('%Y-%m-%d')
     selected_date = request.args.get('date', today)
     
+    # 날짜 형식 확인 (출석 로그 파티션 경로와 Firestore 문서 이름에 쓰므로 조회 전에 정규화)
+    try:
+        selected_date = datetime.strptime(selected_date, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        flash('날짜 형식이 올바르지 않습니다. (YYYY-MM-DD)', 'warning')
+        selected_date = today
+    
     # 정렬 옵션 (기본: 좌석번호 오름차순)
     sort_by = request.args.get('sort_by', 'seat')
     sort_direction = request.args.get('sort_direction', 'asc')
     
-    # 모든 기록 로드
-    all_records = load_attendance()
-    
-    # 날짜로 필터링
-    day_records = [r for r in all_records if r.get('date_only') == selected_date]
+    # 선택한 날짜의 출석 로그 파티션과 Firestore 문서만 조회 (삭제용 ID를 붙이므로 복사본 사용)
+    day_records = [dict(r) for r in load_day_records(selected_date)]
     
     # 교시별로 그룹화 (삭제용 ID 추가)
     grouped_records = {}
@@ -1215,8 +1667,8 @@ def admin_add_attendance():
             # 출석 체크를 위한 확인 로직
             # 이미 출석했는지 확인 (결과를 무시하고 attended 플래그만 추출)
             # 관리자 권한으로 추가 시 출석 제한을 무시하기 위해 admin_override=True 전달
-            all_records = load_attendance()
-            student_records = [r for r in all_records if r.get('student_id') == student_id]
+            refresh_attendance_store()
+            student_records = attendance_store.by_student(student_id)
             
             # 이번 주 출석 여부 확인
             sunday_str, saturday_str = get_current_week_range()
@@ -1304,15 +1756,21 @@ def admin_add_attendance_confirm():
 @app.route('/admin/warnings')
 def admin_warnings():
     """경고 학생 관리 페이지 (관리자만 접근 가능)"""
+    from firebase_admin import firestore
     if not session.get('admin'):
         flash('관리자 로그인이 필요합니다.', 'warning')
         return redirect(url_for('admin_login'))
     
     try:
         # 모든 경고 기록 가져오기
+        started = time.time()
         warnings_ref = db.collection('warnings').order_by('warning_date', direction=firestore.Query.DESCENDING)
         warnings_docs = warnings_ref.get()
         
+        # 전체 경고를 읽은 김에 활성 경고 목록도 갱신 (만료 판단은 목록이 담당)
+        if not watch_active('warnings'):
+            active_warnings.load([(doc.id, doc.to_dict()) for doc in warnings_docs], loaded_at=started)
+        
         warnings = []
         for doc in warnings_docs:
             warning_data = doc.to_dict()
@@ -1324,11 +1782,8 @@ def admin_warnings():
             if 'expiry_date' in warning_data and warning_data['expiry_date']:
                 warning_data['expiry_date'] = warning_data['expiry_date'].replace(tzinfo=pytz.UTC).astimezone(KST)
             
-            # 경고가 만료되었는지 확인
-            now = datetime.now(KST)
-            warning_data['active'] = warning_data.get('active', False)
-            if warning_data.get('expiry_date') and warning_data['expiry_date'] < now:
-                warning_data['active'] = False
+            # 활성 경고 목록 기준으로 만료 여부 표시
+            warning_data['active'] = active_warnings.is_active(doc.id)
             
             warnings.append(warning_data)
         
@@ -1340,6 +1795,7 @@ def admin_warnings():
 @app.route('/admin/warnings/add', methods=['POST'])
 def add_warning():
     """학생 경고 추가 처리"""
+    from firebase_admin import firestore
     if not session.get('admin'):
         flash('관리자 로그인이 필요합니다.', 'warning')
         return redirect(url_for('admin_login'))
@@ -1373,7 +1829,9 @@ def add_warning():
             'created_at': firestore.SERVER_TIMESTAMP
         }
         
-        db.collection('warnings').add(warning_data)
+        _, warning_ref = db.collection('warnings').add(warning_data)
+        active_warnings.add(warning_ref.id, warning_data)
+        touch_warnings_stamp()
         
         flash(f'학생(학번: {student_id})에게 {days}일 동안의 경고가 추가되었습니다.', 'success')
     except Exception as e:
@@ -1384,6 +1842,7 @@ def add_warning():
 @app.route('/admin/warnings/remove/<warning_id>')
 def remove_warning(warning_id):
     """학생 경고 해제 처리"""
+    from firebase_admin import firestore
     if not session.get('admin'):
         flash('관리자 로그인이 필요합니다.', 'warning')
         return redirect(url_for('admin_login'))
@@ -1405,6 +1864,8 @@ def remove_warning(warning_id):
             'active': False,
             'updated_at': firestore.SERVER_TIMESTAMP
         })
+        active_warnings.remove(warning_id)
+        touch_warnings_stamp()
         
         flash(f'학생(학번: {student_id})의 경고가 해제되었습니다.', 'success')
     except Exception as e:
@@ -1433,6 +1894,8 @@ def delete_warning(warning_id):
         
         # 경고 완전 삭제
         warning_ref.delete()
+        active_warnings.remove(warning_id)
+        touch_warnings_stamp()
         
         flash(f'학생(학번: {student_id})의 경고가 완전히 삭제되었습니다.', 'success')
     except Exception as e:
@@ -1468,6 +1931,8 @@ def delete_all_warnings():
         # 남은 배치 커밋
         if batch_size > 0:
             batch.commit()
+        active_warnings.clear()
+        touch_warnings_stamp()
         
         flash('모든 경고가 성공적으로 삭제되었습니다.', 'success')
     except Exception as e:
@@ -1547,10 +2012,8 @@ def update_seat():
         # 변경 사항 저장
         wb.save(excel_path)
         
-        # 학생 데이터 캐시 초기화 (새로고침)
-        global _student_data_cache, _student_data_timestamp
-        _student_data_cache = None
-        _student_data_timestamp = None
+        # 학생 데이터 캐시 새로고침
+        load_student_data(force_reload=True)
         
         # Firebase에 백업 (재시작 시 덮어쓰임 방지)
         backup_success, backup_message = backup_students_to_firebase()
@@ -1605,8 +2068,6 @@ def add_direct_student():
         
         if success:
             # 데이터를 강제로 새로 로딩하여 캐시 갱신
-            global _student_data_cache
-            _student_data_cache = None
             load_student_data(force_reload=True)
             
             # Firebase에도 즉시 백업 (강화된 버전)
@@ -1652,8 +2113,6 @@ def delete_student_api():
         
         if success:
             # 데이터를 강제로 새로 로딩하여 캐시 갱신
-            global _student_data_cache
-            _student_data_cache = None
             load_student_data(force_reload=True)
             
             # Firebase에도 즉시 백업
@@ -1847,8 +2306,6 @@ def api_bulk_update_seats():
         wb.save(excel_path)
         
         # 학생 데이터 캐시 강제 새로고침
-        global _student_data_cache
-        _student_data_cache = None
         load_student_data(force_reload=True)
         
         # Firebase에도 즉시 백업 (강화된 버전)
@@ -1890,6 +2347,85 @@ def api_bulk_update_seats():
     except Exception as e:
         return jsonify({"error": f"학생 정보 일괄 업데이트 중 오류가 발생했습니다: {str(e)}"}), 500
 
+def _parse_record_id(record_id):
+    """
+    삭제 요청으로 받은 기록 ID 해석
+    - "학번|날짜|교시" (교시별 출석현황)
+    - "csv_학번_출석일시" (출석 목록의 출석 로그 기록)
+    - "firebase_날짜_교시_학번", "firebase_admin_날짜_교시_학번" (Firebase에만 있는 기록)
+    
+    Returns:
+        (학번, 날짜, 출석일시 또는 None, 교시 또는 None, 'log' 또는 'firebase') - 해석할 수 없으면 None
+    """
+    try:
+        if '|' in record_id:
+            student_id, date_part, period = record_id.split('|')
+            return student_id, date_part, None, period, 'log'
+        if record_id.startswith('csv_'):
+            student_id, datetime_str = record_id[4:].split('_', 1)
+            return student_id, datetime_str[:10], datetime_str, None, 'log'
+        for prefix in ('firebase_admin_', 'firebase_'):
+            if record_id.startswith(prefix):
+                date_period, student_id = record_id[len(prefix):].rsplit('_', 1)
+                date_part, period = date_period.split('_', 1)
+                return student_id, date_part, None, period, 'firebase'
+    except ValueError:
+        pass
+    return None
+
+def logged_rows(keys):
+    """
+    (학번, 날짜, 교시) 키들의 날짜에 출석 로그에 남아 있는 행 기준 ({(학번, 날짜, 교시)}, {(학번, 날짜)})
+    - 3학년은 같은 날 여러 번 출석할 수 있으므로 일부 행만 삭제한 경우 Firestore 문서를 유지하는 데 사용
+    """
+    logged_keys, logged_days = set(), set()
+    for date_only in {key[1] for key in keys}:
+        for row in attendance_log.read_partition(date_only):
+            key = record_key(_log_row_to_record(row))
+            logged_keys.add(key)
+            logged_days.add(key[:2])
+    return logged_keys, logged_days
+
+def delete_firestore_records(keys):
+    """
+    출석 기록의 Firestore 문서를 배치 쓰기로 삭제 (배치당 최대 FIRESTORE_BATCH_LIMIT건)
+    - admin/{날짜}_{교시}/students/{학번} (출석 로그에 같은 학번/날짜/교시 행이 남아 있으면 유지)
+    - attendance/{학번}/records/{날짜} (출석 로그나 저장소에 그 날짜의 다른 출석이 남아 있으면 유지)
+    
+    Args:
+        keys: [(학번, 날짜, 교시), ...]
+    Returns:
+        삭제한 문서 수
+    """
+    logged_keys, logged_days = logged_rows(keys)
+    refs = []
+    record_dates = set()
+    for student_id, date_only, period in keys:
+        if (student_id, date_only, period) in logged_keys:
+            continue
+        refs.append(db.collection('admin').document(f"{date_only}_{period}").collection('students').document(student_id))
+        record_dates.add((student_id, date_only))
+    for student_id, date_only in sorted(record_dates):
+        if (student_id, date_only) in logged_days or (
+                attendance_store.loaded and any(r.get('date_only') == date_only
+                                                for r in attendance_store.by_student(student_id))):
+            continue
+        refs.append(db.collection('attendance').document(student_id).collection('records').document(date_only))
+    
+    deleted = 0
+    for start in range(0, len(refs), FIRESTORE_BATCH_LIMIT):
+        chunk = refs[start:start + FIRESTORE_BATCH_LIMIT]
+        try:
+            batch = db.batch()
+            for ref in chunk:
+                batch.delete(ref)
+            batch.commit()
+            deleted += len(chunk)
+        except Exception as firebase_error:
+            logging.error(f"Firebase 배치 삭제 중 오류 ({len(chunk)}건): {firebase_error}")
+    logging.info(f"Firebase 문서 {deleted}/{len(refs)}건 삭제")
+    return deleted
+
 @app.route('/delete_records', methods=['POST'])
 def delete_records():
     """Delete selected attendance records (admin only)"""
@@ -1921,98 +2457,55 @@ def delete_records():
         return redirect(url_for('list_attendance'))
     
     try:
-        # CSV 파일에서 삭제
-        df = pd.read_csv('attendance.csv', encoding='utf-8')
-        
-        # record_ids는 두 가지 형식으로 전달됨
-        # 1. "학번|날짜|교시" (교시별 출석현황에서)
-        # 2. "csv_학번_날짜시간" (출석목록에서)
-        records_to_delete = []
-        csv_indices_to_delete = []  # CSV 직접 삭제용
-        
+        # 날짜별로 묶어 출석 로그에서 한 번에 삭제 (파일은 다시 쓰지 않고 삭제 표시만 기록)
+        log_targets = {}       # 날짜 -> [(학번, 출석일시 또는 None, 교시 또는 None), ...]
+        firestore_keys = set() # Firestore에서 삭제할 (학번, 날짜, 교시)
         for record_id in record_ids:
-            try:
-                if '|' in record_id:
-                    # 교시별 출석현황에서의 형식: "20240001|2025-06-27|1교시"
-                    parts = record_id.split('|')
-                    if len(parts) == 3:
-                        student_id = parts[0]
-                        date_part = parts[1]
-                        period = parts[2]
-                        records_to_delete.append((student_id, date_part, period))
-                elif record_id.startswith('csv_'):
-                    # 출석목록에서의 형식: "csv_30101_2025-05-14 08:41:37"
-                    parts = record_id[4:].split('_', 1)  # "csv_" 제거 후 첫 번째 '_'로만 분할
-                    if len(parts) == 2:
-                        student_id = parts[0]
-                        full_date = parts[1]
-                        date_part = full_date[:10]  # 날짜 부분만 추출
-                        
-                        # CSV에서 정확한 행 찾기 (전체 시간까지 매칭)
-                        for csv_idx, (_, row) in enumerate(df.iterrows()):
-                            if (str(row.get('학번', '')) == student_id and
-                                str(row.get('출석일', '')) == full_date):
-                                csv_indices_to_delete.append(csv_idx)
-                                break
-            except (ValueError, IndexError):
+            parsed = _parse_record_id(record_id)
+            if parsed is None:
+                logging.warning(f"해석할 수 없는 기록 ID: {record_id}")
                 continue
-        
-        # 변수 초기화
-        indices_to_delete = []
-        firebase_records_to_delete = []
-        
-        # 교시별 출석현황에서의 삭제 처리
-        if records_to_delete:
-            for student_id, date_part, period in records_to_delete:
-                logging.info(f"삭제할 기록 찾는 중: 학번={student_id}, 날짜={date_part}, 교시={period}")
-                
-                # CSV에서 해당 기록 찾기
-                found = False
-                for csv_idx, (_, row) in enumerate(df.iterrows()):
-                    row_student_id = str(row.get('학번', ''))
-                    row_date = str(row.get('출석일', ''))[:10]  # '출석일' 컬럼 사용
-                    row_period = str(row.get('교시', ''))
-                    
-                    if (row_student_id == student_id and
-                        row_date == date_part and
-                        row_period == period):
-                        indices_to_delete.append(csv_idx)
-                        firebase_records_to_delete.append({
-                            'student_id': student_id,
-                            'date_only': date_part,
-                            'period': period
-                        })
-                        found = True
-                        logging.info(f"매칭된 기록 발견: 인덱스 {csv_idx}")
-                        break
-                
-                if not found:
-                    logging.warning(f"매칭되는 기록을 찾을 수 없음: {student_id}|{date_part}|{period}")
-        
-        # 출석목록에서의 삭제 처리 (이미 csv_indices_to_delete에 추가됨)
-        indices_to_delete.extend(csv_indices_to_delete)
-        
-        # 중복 제거
-        indices_to_delete = list(set(indices_to_delete))
-        
-        if indices_to_delete:
-            # CSV에서 삭제
-            df = df.drop(indices_to_delete)
-            df.to_csv('attendance.csv', index=False, encoding='utf-8')
-            
-            # Firebase에서도 삭제
-            if db:
-                for record in firebase_records_to_delete:
-                    try:
-                        student_id = str(record.get('student_id', ''))
-                        date_str = record.get('date_only', '')
-                        
-                        # Firebase에서 삭제
-                        db.collection('attendance').document(student_id).collection('records').document(date_str).delete()
-                    except Exception as firebase_error:
-                        logging.error(f"Firebase 삭제 중 오류: {firebase_error}")
-        
-        flash(f'{len(indices_to_delete)}개의 기록이 삭제되었습니다.', 'success')
+            student_id, date_part, datetime_str, period, source = parsed
+            if source == 'firebase':
+                firestore_keys.add((student_id, date_part, period))
+            else:
+                log_targets.setdefault(date_part, []).append((student_id, datetime_str, period))
+                if period:
+                    firestore_keys.add((student_id, date_part, period))
+        
+        deleted_rows, rollup_changes = attendance_log.delete(log_targets)
+        mirror_rollups(rollup_changes)
+        
+        # 출석 저장소 증분 갱신 (로그 기록 + 같은 학번/날짜/교시의 Firebase 기록)
+        deleted_keys = []
+        for row in deleted_rows:
+            record = _log_row_to_record(row)
+            firestore_keys.add(record_key(record))
+            if attendance_store.remove(record['id']):
+                deleted_keys.append(record['id'])
+        # 같은 학번/날짜/교시의 출석 로그 행이 아직 남아 있으면 Firebase 기록과 반영 대기 중인 저널 항목은 유지
+        firestore_keys -= logged_rows(firestore_keys)[0]
+        for key in firestore_keys:
+            for stored in attendance_store.by_student(key[0]):
+                if stored.get('source') != 'csv' and record_key(stored) == key:
+                    attendance_store.remove(stored['id'])
+                    deleted_keys.append(stored['id'])
+            attendance_status_cache.invalidate(key[0])
+        
+        # 아직 Firestore에 반영되지 않은 저널 항목도 취소 (반영 시 출석 로그에 다시 추가되지 않도록)
+        checkin_journal.discard(lambda data: record_key(data) in firestore_keys)
+        
+        # Firebase에서도 삭제 (attendance, admin 두 경로를 배치 쓰기로)
+        if db and firestore_keys:
+            delete_firestore_records(sorted(firestore_keys))
+        # 모든 워커의 해당 날짜 Firestore 조회 캐시 무효화 (Firestore에만 있던 기록은 출석 로그 파티션이 그대로이므로)
+        deleted_dates = {key[1] for key in firestore_keys}
+        attendance_log.mark_remote_change(deleted_dates)
+        for date_part in deleted_dates:
+            day_loader.invalidate(date_part)
+        
+        deleted_count = max(len(deleted_rows), len(deleted_keys))
+        flash(f'{deleted_count}개의 기록이 삭제되었습니다.', 'success')
     except Exception as e:
         flash(f'기록 삭제 중 오류가 발생했습니다: {e}', 'danger')
     
@@ -2042,251 +2535,51 @@ def stats():
     end_date = request.args.get('end_date', default_end_date)
     view_mode = request.args.get('view_mode', 'total')  # 'total' 또는 'weekly'
     
-    # 날짜 문자열을 datetime 객체로 변환
-    start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-    end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-    
-    # 출석 기록 불러오기
-    records = load_attendance()
-    
-    # 기간 내 출석 기록만 필터링
-    filtered_records = []
-    for record in records:
-        try:
-            # 문자열 날짜를 datetime 객체로 변환
-            record_date_str = record.get('date', '').split()[0]  # '2025-05-22' 형식으로 추출
-            record_date = datetime.strptime(record_date_str, '%Y-%m-%d').date()
-            
-            # 날짜 범위 확인
-            if start_date_obj <= record_date <= end_date_obj:
-                filtered_records.append(record)
-        except (ValueError, AttributeError, IndexError):
-            continue
-            
-    # 주차별 데이터 구성 (view_mode가 'weekly'일 때 사용)
-    weekly_stats = []
-    
-    if view_mode == 'weekly':
-        # 시작일부터 종료일까지의 주차별 데이터 구성
-        current_week_start = start_date_obj - timedelta(days=start_date_obj.weekday())  # 해당 주의 월요일
-        
-        while current_week_start <= end_date_obj:
-            current_week_end = current_week_start + timedelta(days=6)  # 주의 일요일
-            
-            # 이번 주 레이블 (월/일 ~ 월/일)
-            week_label = f"{current_week_start.month}/{current_week_start.day} ~ {current_week_end.month}/{current_week_end.day}"
-            
-            # 이번 주 기록 필터링
-            weekly_records = []
-            for record in filtered_records:
-                try:
-                    record_date_str = record.get('date', '').split()[0]
-                    record_date = datetime.strptime(record_date_str, '%Y-%m-%d').date()
-                    if current_week_start <= record_date <= current_week_end:
-                        weekly_records.append(record)
-                except (ValueError, AttributeError):
-                    continue
-            
-            # 이번 주 요일별 교시 데이터 준비
-            week_data = {
-                'label': week_label,
-                'start_date': current_week_start,
-                'end_date': current_week_end,
-                'records_count': len(weekly_records),
-                'weekday_period_data': {}
-            }
-            
-            # 요일별 교시 카운팅
-            all_periods_week = set()
-            weekday_period_data_week = {}
-            
-            for record in weekly_records:
-                try:
-                    record_date_str = record.get('date', '').split()[0]
-                    record_date = datetime.strptime(record_date_str, '%Y-%m-%d').date()
-                    weekday = record_date.weekday()
-                    weekday_name = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일'][weekday]
-                    period = record.get('period', '미지정')
-                    
-                    # 모든 교시 목록 수집
-                    all_periods_week.add(period)
-                    
-                    # 요일별 교시 데이터 추가
-                    if weekday_name not in weekday_period_data_week:
-                        weekday_period_data_week[weekday_name] = Counter()
-                    weekday_period_data_week[weekday_name][period] += 1
-                    
-                except (ValueError, AttributeError, IndexError):
-                    continue
-            
-            # 교시 정렬 함수
-            def period_sort_key_week(period):
-                if '교시' in period:
-                    try:
-                        return int(period.split('교시')[0])
-                    except ValueError:
-                        return 999
-                elif period == '시간 외':
-                    return 998
-                else:
-                    return 999
-            
-            # 정렬된 교시 목록
-            sorted_periods_week = sorted(all_periods_week, key=period_sort_key_week)
-            
-            # 요일 순서대로 정렬
-            weekday_order = {'월요일': 0, '화요일': 1, '수요일': 2, '목요일': 3, '금요일': 4, '토요일': 5, '일요일': 6}
-            
-            # 요일별 교시 데이터 정렬
-            weekday_period_stats_week = []
-            for weekday_name in sorted(weekday_period_data_week.keys(), key=lambda x: weekday_order.get(x, 7)):
-                period_counts = []
-                for period in sorted_periods_week:
-                    count = weekday_period_data_week.get(weekday_name, Counter()).get(period, 0)
-                    period_counts.append((period, count))
-                weekday_period_stats_week.append((weekday_name, period_counts))
-            
-            week_data['weekday_period_stats'] = weekday_period_stats_week
-            week_data['sorted_periods'] = sorted_periods_week
-            
-            weekly_stats.append(week_data)
-            
-            # 다음 주로 이동
-            current_week_start = current_week_end + timedelta(days=1)
-    
-    # 총 방문자 수
-    total_visitors = len(filtered_records)
-    
-    # 요일별 통계
-    weekday_counter = Counter()
-    
-    # 요일별 교시 통계를 위한 딕셔너리 (2차원 데이터)
-    weekday_period_data = {}
-    all_periods = set()
-    
-    for record in filtered_records:
-        try:
-            record_date_str = record.get('date', '').split()[0]
-            record_date = datetime.strptime(record_date_str, '%Y-%m-%d').date()
-            # 요일 이름 (0:월요일 ~ 6:일요일로 변환)
-            weekday = record_date.weekday()
-            weekday_name = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일'][weekday]
-            period = record.get('period', '미지정')
-            
-            # 요일별 카운터 증가
-            weekday_counter[weekday_name] += 1
-            
-            # 모든 교시 목록 수집
-            all_periods.add(period)
-            
-            # 요일별 교시 데이터 추가
-            if weekday_name not in weekday_period_data:
-                weekday_period_data[weekday_name] = Counter()
-            weekday_period_data[weekday_name][period] += 1
-            
-        except (ValueError, AttributeError, IndexError):
-            continue
-    
-    # 요일 순서대로 정렬
-    weekday_order = {'월요일': 0, '화요일': 1, '수요일': 2, '목요일': 3, '금요일': 4, '토요일': 5, '일요일': 6}
-    weekday_stats = sorted(weekday_counter.items(), key=lambda x: weekday_order.get(x[0], 7))
-    
-    # 최대 요일 카운트 (그래프 비율용)
-    max_day_count = max(weekday_counter.values()) if weekday_counter else 1
-    
-    # 교시 정렬 함수
-    def period_sort_key(period):
-        if '교시' in period:
-            try:
-                return int(period.split('교시')[0])
-            except ValueError:
-                return 999
-        elif period == '시간 외':
-            return 998
-        else:
-            return 999
-    
-    # 정렬된 교시 목록 생성
-    sorted_periods = sorted(all_periods, key=period_sort_key)
-    
-    # 요일별 교시 데이터 정렬
-    weekday_period_stats = []
-    for weekday_name, _ in weekday_stats:  # 요일 순서 유지
-        period_counts = []
-        for period in sorted_periods:
-            count = weekday_period_data.get(weekday_name, Counter()).get(period, 0)
-            period_counts.append((period, count))
-        weekday_period_stats.append((weekday_name, period_counts))
-    
-    # 교시별 통계
-    period_counter = Counter()
-    for record in filtered_records:
-        period = record.get('period', '미지정')
-        period_counter[period] += 1
-    
-    # 교시 순서대로 정렬 (1교시부터 오름차순)
-    def period_sort_key(item):
-        period = item[0]
-        if '교시' in period:
-            try:
-                return int(period.split('교시')[0])
-            except ValueError:
-                return 999
-        elif period == '시간 외':
-            return 998
-        else:
-            return 999
-    
-    period_stats = sorted(period_counter.items(), key=period_sort_key)
-    
-    # 최대 교시 카운트 (그래프 비율용)
-    max_period_count = max(period_counter.values()) if period_counter else 1
-    
-    # 학생별 통계 (방문 빈도 상위 10명)
-    student_counter = Counter()
-    student_names = {}  # 학번별 이름 저장
+    # 날짜 형식 확인
+    try:
+        datetime.strptime(start_date, '%Y-%m-%d')
+        datetime.strptime(end_date, '%Y-%m-%d')
+    except ValueError:
+        flash('날짜 형식이 올바르지 않습니다. (YYYY-MM-DD)', 'warning')
+        start_date, end_date = default_start_date, default_end_date
     
-    for record in filtered_records:
-        student_id = record.get('student_id', '')
-        name = record.get('name', '')
-        if student_id:
-            student_counter[student_id] += 1
-            student_names[student_id] = name
+    # 통계 집계(NumPy)는 통계 화면을 처음 열 때 로드 - 앱 시작 시간에서 제외
+    from attendance_stats import compute_stats, merge_counts, rollup_counts
     
-    # 상위 10명 학생 추출
-    top_students = []
-    for student_id, count in student_counter.most_common(10):
-        top_students.append({
-            'student_id': student_id,
-            'name': student_names.get(student_id, ''),
-            'count': count
-        })
+    # 기간 내 출석 로그는 주별 사전 집계(rollup)로 합산하고, 로그에 없는 Firebase 기록만 추가
+    counts = merge_counts(rollup_counts(attendance_log, start_date, end_date),
+                          firestore_only_counts(start_date, end_date))
     
-    # 최대 학생 방문 횟수 (그래프 비율용)
-    max_student_count = max(student_counter.values()) if student_counter else 1
+    # 요일별/교시별/요일×교시/상위 학생/주차별 통계를 한 번에 집계
+    stats_data = compute_stats(counts, start_date, end_date, weekly=(view_mode == 'weekly'))
     
     return render_template('stats.html', 
                            start_date=start_date,
                            end_date=end_date,
-                           total_visitors=total_visitors,
-                           weekday_stats=weekday_stats,
-                           max_day_count=max_day_count,
-                           period_stats=period_stats,
-                           max_period_count=max_period_count,
-                           top_students=top_students,
-                           max_student_count=max_student_count,
-                           weekday_period_stats=weekday_period_stats,
-                           sorted_periods=sorted_periods,
                            view_mode=view_mode,
-                           weekly_stats=weekly_stats)
+                           **stats_data)
 
 @app.route('/health')
 def health():
     return 'OK', 200
 
+@app.route('/api/cache_stats')
+def cache_stats():
+    """캐시 적중/실패 통계 API (관리자 전용)"""
+    if not session.get('admin'):
+        return jsonify({"error": "관리자 권한이 필요합니다."}), 403
+    
+    attendance_status_cache.purge_expired()
+    return jsonify({
+        'attendance_status': attendance_status_cache.stats(),
+        'checkin_journal': checkin_journal.stats(),
+        'firestore': firestore_status.stats()
+    })
+
 @app.route('/debug_firebase')
 def debug_firebase():
     """Firebase 디버그 페이지 (관리자만)"""
+    from firebase_admin import firestore
     if not session.get('admin'):
         return redirect(url_for('admin_login'))
     
@@ -2380,6 +2673,7 @@ def debug_firebase():
 @app.route('/add_test_attendance')
 def add_test_attendance():
     """테스트용 학번 20202 출석 데이터 추가"""
+    from firebase_admin import firestore
     try:
         if not db:
             return "Firebase 연결 실패", 500
@@ -2417,6 +2711,7 @@ def add_test_attendance():
 @app.route('/add_sample_data')
 def add_sample_data():
     """샘플 출석 데이터 추가 (관리자만)"""
+    from firebase_admin import firestore
     if not session.get('admin'):
         flash('관리자 로그인이 필요합니다.', 'warning')
         return redirect(url_for('admin_login'))
@@ -2487,11 +2782,13 @@ def backup_students_to_firebase():
     try:
         if not db:
             return False, "Firebase 연결 오류"
+        from firebase_admin import firestore
             
         if not os.path.exists('students.xlsx'):
             return False, "students.xlsx 파일이 없습니다"
             
-        # Excel 파일 읽기
+        # Excel 파일 읽기 (백업한 파일의 수정 시간도 기록 - 실시간 감시에서 자신의 백업은 복원하지 않도록)
+        source_mtime = os.path.getmtime('students.xlsx')
         import openpyxl
         wb = openpyxl.load_workbook('students.xlsx')
         ws = wb.active
@@ -2536,7 +2833,8 @@ def backup_students_to_firebase():
             'student_count': student_count,
             'headers': headers,
             'students': students_data,
-            'file_name': 'students.xlsx'
+            'file_name': 'students.xlsx',
+            'source_mtime': source_mtime
         }
         
         # 백업 저장
@@ -2550,20 +2848,39 @@ def backup_students_to_firebase():
         logging.error(f"학생 데이터 백업 실패: {e}")
         return False, f"❌ 백업 실패: {str(e)}"
 
-def restore_students_from_firebase():
-    """Firebase에서 학생 데이터를 복원하여 students.xlsx 생성"""
+def students_backup_is_newer(backup_data):
+    """
+    Firebase 명단 백업이 로컬 students.xlsx보다 최신인지 (로컬 파일이 없으면 True)
+    - 로컬 파일 그대로를 백업한 것(수정 시간이 같음)이면 False
+    """
     try:
-        if not db:
-            return False, "Firebase 연결 오류"
+        local_mtime = os.path.getmtime('students.xlsx')
+    except OSError:
+        return True
+    if backup_data.get('source_mtime') == local_mtime:
+        return False
+    return backup_data['backup_date'] > datetime.fromtimestamp(local_mtime, tz=KST)
+
+def restore_students_from_firebase(backup_data=None):
+    """
+    Firebase에서 학생 데이터를 복원하여 students.xlsx 생성
+    
+    Args:
+        backup_data: 이미 받은 백업 문서 내용 (실시간 감시 스냅샷) - 없으면 Firebase에서 조회
+    """
+    try:
+        if backup_data is None:
+            if not db:
+                return False, "Firebase 연결 오류"
             
-        # 백업 데이터 가져오기
-        backup_ref = db.collection('backups').document('students_backup')
-        backup_doc = backup_ref.get()
-        
-        if not backup_doc.exists:
-            return False, "Firebase에 백업된 학생 데이터가 없습니다"
-        
-        backup_data = backup_doc.to_dict()
+            # 백업 데이터 가져오기
+            backup_ref = db.collection('backups').document('students_backup')
+            backup_doc = backup_ref.get()
+            
+            if not backup_doc.exists:
+                return False, "Firebase에 백업된 학생 데이터가 없습니다"
+            
+            backup_data = backup_doc.to_dict()
         students = backup_data.get('students', [])
         headers = backup_data.get('headers', [])
         
@@ -2586,12 +2903,12 @@ def restore_students_from_firebase():
                 value = student.get(header, '')
                 ws.cell(row=row, column=col, value=value)
         
-        # 파일 저장
-        wb.save('students.xlsx')
+        # 파일 저장 (다른 워커가 읽는 중에 반쯤 쓴 파일을 보지 않도록 임시 파일로 저장 후 교체)
+        wb.save('students.xlsx.tmp')
+        os.replace('students.xlsx.tmp', 'students.xlsx')
         
-        # 캐시 초기화
-        global _student_data_cache
-        _student_data_cache = None
+        # 학생 데이터 캐시 새로고침
+        load_student_data(force_reload=True)
         
         logging.info(f"Firebase에서 학생 데이터 {len(students)}명 복원 완료")
         return True, f"✅ 학생 데이터 {len(students)}명 복원 완료"
@@ -2626,6 +2943,7 @@ def auto_restore_on_startup():
         
         # 2. Firebase 백업 타임스탬프 확인
         firebase_backup_time = None
+        backup_data = None
         if db:
             try:
                 backup_ref = db.collection('backups').document('students_backup')
@@ -2646,10 +2964,12 @@ def auto_restore_on_startup():
             if success:
                 logging.info("✅ Firebase 복원 완료")
         elif firebase_backup_time and local_file_time:
-            # 둘 다 있음 -> 최신 것 선택
-            if firebase_backup_time > local_file_time:
+            # 둘 다 있음 -> 최신 것 선택 (로컬 파일 그대로를 백업한 것이면 둘 다 하지 않음)
+            if backup_data.get('source_mtime') == os.path.getmtime('students.xlsx'):
+                logging.info("📁 Firebase 백업이 로컬 파일과 같음")
+            elif students_backup_is_newer(backup_data):
                 logging.info("☁️ Firebase 백업이 더 최신 - 복원 시작")
-                success, message = restore_students_from_firebase()
+                success, message = restore_students_from_firebase(backup_data)
                 if success:
                     logging.info("✅ 최신 데이터 복원 완료")
             else:
@@ -2751,6 +3071,7 @@ def get_schedule():
 @app.route('/api/schedule/update', methods=['POST'])
 def update_schedule():
     """시간표 업데이트 API"""
+    from firebase_admin import firestore
     if not session.get('admin'):
         return jsonify({"error": "관리자 권한이 필요합니다."}), 403
     
@@ -2774,6 +3095,8 @@ def update_schedule():
             'updated_by': 'admin'
         })
         
+        invalidate_schedule_cache()
+        
         logging.info(f"시간표 업데이트 완료: {len(periods)}개 교시")
         return jsonify({
             "success": True,
@@ -2793,6 +3116,7 @@ def reset_schedule():
         # Firebase에서 시간표 삭제 (기본 시간표 사용)
         schedule_ref = db.collection('settings').document('schedule')
         schedule_ref.delete()
+        invalidate_schedule_cache()
         
         logging.info("시간표가 기본값으로 리셋되었습니다.")
         return jsonify({
@@ -2803,9 +3127,6 @@ def reset_schedule():
         logging.error(f"시간표 리셋 실패: {e}")
         return jsonify({"error": str(e)}), 500
 
-# 앱 시작 시 자동 복원 실행
-auto_restore_on_startup()
-
 def save_new_schedule_to_firebase():
     """새 시간표를 Firebase에 저장 (앱 시작 시 1회 실행)"""
     try:
@@ -2826,11 +3147,165 @@ def save_new_schedule_to_firebase():
             'periods': new_schedule,
             'updated_at': datetime.now(KST).isoformat()
         })
+        invalidate_schedule_cache()
         logging.info("새 시간표(7교시)가 Firebase에 저장되었습니다.")
     except Exception as e:
         logging.error(f"시간표 Firebase 저장 실패: {e}")
 
-save_new_schedule_to_firebase()
+STARTUP_SYNC_PATH = os.path.join(ATTENDANCE_LOG_DIR, '.startup_sync')
+_server_id = None  # create_app()을 실행한 프로세스(gunicorn preload에서는 마스터) 식별자 - 워커는 fork로 물려받음
+
+def _claim_startup_sync():
+    """이번 서버 실행의 Firestore 시작 동기화를 이 워커가 맡았는지 (워커 여러 개 중 처음 확인한 하나만 True)"""
+    if _server_id is None:
+        return False
+    with attendance_log.locked():
+        try:
+            with open(STARTUP_SYNC_PATH, 'r', encoding='utf-8') as f:
+                if f.read().strip() == _server_id:
+                    return False
+        except OSError:
+            pass
+        with open(STARTUP_SYNC_PATH, 'w', encoding='utf-8') as f:
+            f.write(_server_id)
+    return True
+
+def sync_firestore_on_startup():
+    """
+    Firestore를 쓰는 앱 시작 작업 (요청 처리와 별도 스레드에서 실행)
+    - 명단 자동 복원/백업과 시간표 저장은 서버 실행마다 워커 하나에서만
+    - 시간표는 워커마다 미리 로드 (그 전에 온 요청은 get_cached_schedule()에서 직접 조회)
+    - Firestore 클라이언트 생성(firebase_admin import, 인증)도 여기서 처음 일어나 첫 요청이 기다리지 않음
+    """
+    if _claim_startup_sync():
+        with _startup_step('명단 자동 복원'):
+            auto_restore_on_startup()
+        with _startup_step('시간표 저장'):
+            save_new_schedule_to_firebase()
+    with _startup_step('시간표 로드'):
+        get_cached_schedule()
+
+def start_background_tasks():
+    """출석 저널 반영 스레드, Firestore 시작 동기화, 시간표/경고/명단 백업 실시간 감시(선택) 시작"""
+    checkin_journal.start()
+    threading.Thread(target=sync_firestore_on_startup, name='firestore-startup-sync', daemon=True).start()
+    start_cache_watchers()
+
+# ================== [앱 시작] ==================
+
+# 앱 시작 단계별 소요 시간 (초) - /api/startup_stats
+startup_timings = {'import': None, 'steps': [], 'total': None, 'first_request': None}
+# import부터 첫 요청까지 목표 시간
+# 측정값 (Firestore 설정 없음, 저장소의 students.xlsx 552명): 재시작 0.19~0.25초,
+# 기존 attendance.csv 가져오기와 첫 압축(NumPy 로드)이 있는 최초 시작 0.39~0.55초 -> 최초 시작도 넘지 않는 0.75초
+STARTUP_TARGET_SECONDS = float(os.environ.get('STARTUP_TARGET_SECONDS', 0.75))
+_app_created = False
+
+@contextlib.contextmanager
+def _startup_step(name):
+    """앱 시작 단계 실행 시간 기록 (실패해도 다음 단계 계속)"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        logging.error(f"앱 시작 단계 실패 ({name}): {e}")
+    finally:
+        startup_timings['steps'].append((name, round(time.perf_counter() - started, 3)))
+
+def create_app():
+    """
+    앱 시작 작업을 실행하고 Flask 앱 반환 (gunicorn 'app:create_app()', asgi.py, python app.py)
+    - 로깅 설정(LOG_LEVEL, 기본 INFO), 출석 로그 정리, 저널 확인, 명단 미리 로드 (로컬 파일만 사용)
+    - Firestore를 쓰는 시작 작업(명단 복원, 시간표 저장/로드)과 Firestore 클라이언트 생성은
+      start_background_tasks()의 시작 동기화 스레드에서 실행 (sync_firestore_on_startup)
+    - 단계별 소요 시간은 startup_timings에 기록
+    - 여러 번 호출해도 시작 작업은 한 번만 실행
+    """
+    global _app_created, _server_id
+    if _app_created:
+        return app
+    _app_created = True
+    startup_timings['import'] = round(time.perf_counter() - _startup_origin, 3)
+    
+    # 로깅 설정
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    # 기존 단일 attendance.csv를 날짜별 출석 로그로 가져오기 (최초 1회)
+    with _startup_step('기존 출석 CSV 가져오기'):
+        attendance_log.import_legacy_csv(LEGACY_ATTENDANCE_CSV)
+    
+    # 마감된 날짜의 출석 로그를 월별 열 단위 보관 파일로 압축
+    with _startup_step('출석 로그 압축'):
+        archive_before = (datetime.now(KST).date() - timedelta(days=ATTENDANCE_ARCHIVE_AFTER_DAYS)).strftime('%Y-%m-%d')
+        attendance_log.compact(archive_before)
+    
+    # 통계용 주별 집계가 없으면 출석 로그 전체로 구축
+    with _startup_step('출석 통계 집계 구축'):
+        attendance_log.ensure_rollups()
+    
+    # 출석 로그에 없는 저널 항목을 다시 추가 (Firestore 반영 스레드는 start_background_tasks()에서 시작)
+    with _startup_step('출석 저널 확인'):
+        replay_checkin_journal()
+    
+    # Firestore 연결이 끊겼다가 복구되면 오프라인 구간의 출석을 다시 맞추고 닫힌 실시간 감시 다시 시작
+    firestore_status.on_recover(reconcile_after_offline)
+    firestore_status.on_recover(lambda offline_since: start_cache_watchers())
+    
+    # 첫 요청이 엑셀 파싱을 기다리지 않도록 학생 명단 미리 로드
+    with _startup_step('학생 명단 로드'):
+        load_student_data()
+    
+    # 명단 자동 복원, 시간표 저장/로드처럼 Firestore를 쓰는 단계는 start_background_tasks()의 별도 스레드에서 실행
+    _server_id = f"{os.getpid()}-{time.time()}"
+    
+    # gunicorn preload에서는 스레드를 fork 전에 만들지 않고 워커마다 init_worker()에서 시작
+    if os.environ.get('DEFER_BACKGROUND_TASKS', '0').lower() not in ('1', 'true', 'yes'):
+        start_background_tasks()
+    
+    startup_timings['total'] = round(time.perf_counter() - _startup_origin, 3)
+    steps = ', '.join(f"{name} {seconds:.3f}" for name, seconds in startup_timings['steps'])
+    logging.info(f"앱 시작 완료: {startup_timings['total']:.3f}초 (import {startup_timings['import']:.3f}, {steps})")
+    return app
+
+def init_worker():
+    """
+    gunicorn fork 이후 워커마다 실행 (gunicorn.conf.py의 post_fork 훅)
+    - Firestore 클라이언트와 병렬 읽기 스레드 풀은 워커에서 처음 사용할 때 새로 생성
+    - 첫 요청 시간은 fork 시점부터 다시 측정
+    """
+    global _startup_origin
+    _startup_origin = time.perf_counter()
+    startup_timings['first_request'] = None
+    db.reset()
+    reset_fanout_executor()
+    start_background_tasks()
+
+@app.before_request
+def _record_first_request():
+    """프로세스 시작(워커는 fork)부터 첫 요청까지 걸린 시간 기록"""
+    if startup_timings['first_request'] is not None:
+        return
+    elapsed = round(time.perf_counter() - _startup_origin, 3)
+    startup_timings['first_request'] = elapsed
+    if not _app_created:
+        logging.error("create_app()을 호출하지 않고 요청을 처리 중입니다 - 명단 복원, 출석 저널 확인, 실시간 감시가 실행되지 않았습니다 "
+                      "(진입점에서 'from app import create_app; app = create_app()' 사용)")
+    if elapsed > STARTUP_TARGET_SECONDS:
+        logging.warning(f"첫 요청까지 {elapsed:.3f}초 (목표 {STARTUP_TARGET_SECONDS}초 초과)")
+    else:
+        logging.info(f"첫 요청까지 {elapsed:.3f}초")
+
+@app.route('/api/startup_stats')
+def startup_stats():
+    """앱 시작 단계별 소요 시간 API (관리자 전용)"""
+    if not session.get('admin'):
+        return jsonify({"error": "관리자 권한이 필요합니다."}), 403
+    
+    return jsonify(dict(startup_timings,
+                        steps=[{'name': name, 'seconds': seconds} for name, seconds in startup_timings['steps']],
+                        target=STARTUP_TARGET_SECONDS,
+                        firestore_client=db.created))
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0')
+    create_app().run(debug=True, host='0.0.0.0')
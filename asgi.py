@@ -0,0 +1,199 @@
+"""
+ASGI 진입점 (uvicorn asgi:application - requirements.txt의 uvicorn, a2wsgi 필요)
+- 출석 확인 조회 API는 이벤트 루프에서 직접 처리
+  /lookup_name, /api/check_attendance, /check_attendance_status (허용 메서드는 Flask 경로와 동일)
+  주간 출석 확인의 Firestore 조회는 firestore.AsyncClient로 보내므로 응답을 기다리는 요청끼리 겹쳐서 처리
+- 그 밖의 경로(/attendance 출석 등록 포함)는 a2wsgi로 기존 Flask 앱을 스레드 풀에서 실행
+  (요청/응답 본문을 버퍼링하지 않고 스트리밍, 출석 등록은 출석 로그 + 저널 fsync만 하므로 스레드 점유 시간이 짧음)
+- 응답 형식은 app.py의 같은 경로와 동일 (응답 생성 함수 공유)
+- 스레드 풀 크기는 ASGI_WSGI_THREADS 환경변수 (기본 16)
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+
+import app as flask_app
+
+ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 16))
+
+
+class AttendanceASGI:
+    """출석 확인 API 비동기 처리 + 나머지 경로 Flask(WSGI) 위임"""
+
+    def __init__(self, wsgi_app, threads=ASGI_WSGI_THREADS):
+        self.wsgi_app = wsgi_app
+        self._wsgi = WSGIMiddleware(wsgi_app, workers=threads)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi-check')
+        self._client = None
+        self._client_created = False
+        self._client_lock = threading.Lock()
+        self._routes = {
+            '/lookup_name': self.lookup_name,
+            '/api/check_attendance': self.check_attendance,
+            '/check_attendance_status': self.check_attendance_status,
+        }
+        # Flask 경로에서 허용하는 메서드만 직접 처리 (HEAD/OPTIONS와 허용되지 않은 메서드는 Flask가 응답)
+        self._methods = {rule.rule: rule.methods & {'GET', 'POST'}
+                         for rule in wsgi_app.url_map.iter_rules() if rule.rule in self._routes}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        handler = self._routes.get(scope['path'])
+        if handler and scope['method'] in self._methods.get(scope['path'], ()):
+            params = self._params(scope, await self._read_body(receive))
+            try:
+                payload = await handler(params)
+            except Exception as e:
+                logging.error(f"비동기 출석 확인 처리 오류 ({scope['path']}): {e}")
+                payload = {'error': str(e)}
+            await self._send_json(send, payload)
+            return
+
+        await self._wsgi(scope, receive, send)
+
+    # ---------- 출석 확인 API ----------
+
+    async def lookup_name(self, params):
+        # 학생 명단은 메모리 캐시 (파일이 바뀐 경우에만 다시 읽으므로 스레드에서 실행)
+        return await self._run(flask_app.lookup_student, params.get('student_id', '').strip())
+
+    async def check_attendance(self, params):
+        student_id = params.get('student_id')
+        if not student_id:
+            return {'error': '학번이 필요합니다.', 'has_attendance': False}
+
+        warning_response = await self._run(flask_app.attendance_warning_response, student_id)
+        if warning_response:
+            return warning_response
+
+        try:
+            cached = flask_app.attendance_status_cache.peek(student_id) is not None
+            weekly_status = await self.check_weekly_attendance_limit(student_id)
+            return flask_app.attendance_check_response(student_id, weekly_status, cached)
+        except Exception as e:
+            logging.error(f"출석 확인 API 오류: {e}")
+            return {'error': str(e), 'has_attendance': False}
+
+    async def check_attendance_status(self, params):
+        student_id = params.get('student_id')
+        if not student_id:
+            return {'error': '학번이 필요합니다.', 'already_attended': False}
+
+        try:
+            weekly_status = await self.check_weekly_attendance_limit(student_id)
+            return flask_app.attendance_status_response(student_id, weekly_status)
+        except Exception as e:
+            logging.error(f"출석 상태 확인 중 오류: {e}")
+            return {'error': str(e), 'already_attended': False}
+
+    async def check_weekly_attendance_limit(self, student_id):
+        """app.check_weekly_attendance_limit()과 같은 확인 - Firestore 조회만 비동기"""
+        status = await self._run(flask_app.cached_weekly_status, student_id)
+        if status is not None:
+            return status
+
+        sunday_str, saturday_str = flask_app.get_week_bounds(datetime.now(flask_app.KST))
+        remote_changes = await self._run(flask_app.attendance_log.remote_changes, sunday_str, saturday_str)
+        local_dates = await self._run(flask_app.local_week_dates, student_id, sunday_str, saturday_str)
+
+        remote_dates = None
+        client = await self._firestore()
+        if flask_app.firestore_status.available(client):
+            try:
+                query = flask_app.week_records_query(client, student_id, sunday_str, saturday_str)
+                week_records = await asyncio.wait_for(query.get(), flask_app.FIRESTORE_CHECK_TIMEOUT)
+                flask_app.firestore_status.mark_success()
+                remote_dates = {record.to_dict().get('date_only', '') for record in week_records}
+            except Exception as e:
+                flask_app.firestore_status.mark_failure(e)
+                logging.warning(f"Firestore 주간 출석 확인 실패, 출석 로그로 확인: {e}")
+
+        return flask_app.store_weekly_status(student_id, (sunday_str, saturday_str), remote_changes,
+                                             local_dates, remote_dates)
+
+    # ---------- 내부 함수 ----------
+
+    async def _firestore(self):
+        """AsyncClient (Firebase 설정이 없거나 생성에 실패하면 None)"""
+        if not self._client_created:
+            await self._run(self._create_client)
+        return self._client
+
+    def _create_client(self):
+        """
+        init_firestore()와 같은 인증 정보(app.firebase_credentials)로 AsyncClient 생성 (처음 사용할 때 1회)
+        - import와 인증 정보 파싱이 이벤트 루프를 막지 않도록 스레드에서 실행
+        - 동기 클라이언트(app.db)는 만들지 않음
+        """
+        with self._client_lock:
+            if self._client_created:
+                return
+            try:
+                from google.cloud import firestore as cloud_firestore
+                cred = flask_app.firebase_credentials()
+                self._client = cloud_firestore.AsyncClient(project=cred.project_id,
+                                                           credentials=cred.get_credential())
+            except Exception as e:
+                logging.warning(f"Firestore AsyncClient 생성 실패 (출석 로그로만 확인): {e}")
+            self._client_created = True
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._client is not None:
+                    self._client.close()
+                self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    @staticmethod
+    def _params(scope, body):
+        """쿼리 문자열 + (POST) 폼 본문 - 쿼리 문자열 값 우선"""
+        params = {}
+        content_type = dict(scope['headers']).get(b'content-type', b'')
+        if scope['method'] == 'POST' and content_type.startswith(b'application/x-www-form-urlencoded'):
+            params.update((k, v[0]) for k, v in parse_qs(body.decode('utf-8')).items())
+        params.update((k, v[0]) for k, v in parse_qs(scope['query_string'].decode('latin-1')).items())
+        return params
+
+    @staticmethod
+    async def _send_json(send, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('latin-1')),
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+application = AttendanceASGI(flask_app.create_app())
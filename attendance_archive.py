@@ -0,0 +1,156 @@
+"""
+마감된 출석 로그의 열(column) 단위 보관 형식 (NumPy .npz)
+- 월별 파일 하나에 열 배열로 저장: day(int32, 1970-01-01 기준 일수), second(int32, 자정 이후 초)
+- 학번/교시/이름/좌석은 사전(dictionary) 인코딩: 고유값 배열 + 정수 코드 배열
+- 통계처럼 기간 필터와 그룹 집계가 필요한 곳에서 행 단위 파이썬 루프 없이 벡터 연산 가능
+"""
+import os
+
+import numpy as np
+
+# 사전 인코딩하는 문자열 열 (열 이름, 출석 로그 헤더)
+DICT_COLUMNS = [
+    ('student', '학번'),
+    ('period', '교시'),
+    ('name', '이름'),
+    ('seat', '공강좌석번호'),
+]
+
+
+def day_number(date_only):
+    """날짜 문자열(YYYY-MM-DD)을 1970-01-01 기준 일수로 변환"""
+    return int(np.datetime64(date_only, 'D').astype(np.int32))
+
+
+def empty_columns():
+    """행이 없는 열 묶음"""
+    columns = {
+        'day': np.zeros(0, dtype=np.int32),
+        'second': np.zeros(0, dtype=np.int32),
+    }
+    for column, _ in DICT_COLUMNS:
+        columns[column] = np.zeros(0, dtype=np.int32)
+        columns[f'{column}_values'] = np.zeros(0, dtype=str)
+    return columns
+
+
+def _valid_date(date_string):
+    """출석일 문자열이 열 형식으로 손실 없이 저장 가능한지 확인"""
+    try:
+        timestamp = np.datetime64(date_string, 's')
+    except ValueError:
+        return False
+    return not np.isnat(timestamp) and str(timestamp).replace('T', ' ') == date_string
+
+
+def encode_rows(rows, strict=True):
+    """
+    출석 로그 행(한글 헤더 dict) 목록을 열 묶음으로 변환
+
+    Args:
+        strict: True이면 출석일을 해석할 수 없는 행이 있을 때 None 반환,
+                False이면 해당 행만 제외
+    Returns:
+        열 이름 -> NumPy 배열 딕셔너리
+    """
+    if not strict:
+        rows = [row for row in rows if _valid_date(str(row.get('출석일') or ''))]
+    if not rows:
+        return empty_columns()
+
+    date_strings = [str(row.get('출석일') or '') for row in rows]
+    try:
+        timestamps = np.array(date_strings, dtype='datetime64[s]')
+    except ValueError:
+        return None
+    if np.isnat(timestamps).any():
+        return None
+    # 다시 문자열로 되돌렸을 때 원본과 같아야 기록 ID(csv_학번_출석일)가 유지됨
+    restored = np.char.replace(np.datetime_as_string(timestamps), 'T', ' ')
+    if not np.array_equal(restored, np.array(date_strings)):
+        return None
+
+    days = timestamps.astype('datetime64[D]')
+    columns = {
+        'day': days.astype(np.int32),
+        'second': (timestamps - days).astype(np.int32),
+    }
+    for column, header in DICT_COLUMNS:
+        values, codes = np.unique(np.array([str(row.get(header) or '') for row in rows], dtype=str),
+                                  return_inverse=True)
+        columns[column] = codes.astype(np.int32)
+        columns[f'{column}_values'] = values
+    return columns
+
+
+def decode_rows(columns):
+    """열 묶음을 출석 로그 행(한글 헤더 dict) 목록으로 복원"""
+    if len(columns['day']) == 0:
+        return []
+    timestamps = columns['day'].astype('datetime64[D]') + columns['second'].astype('timedelta64[s]')
+    decoded = {'출석일': np.char.replace(np.datetime_as_string(timestamps), 'T', ' ').tolist()}
+    for column, header in DICT_COLUMNS:
+        decoded[header] = columns[f'{column}_values'][columns[column]].tolist()
+    headers = list(decoded)
+    return [dict(zip(headers, values)) for values in zip(*decoded.values())]
+
+
+def select(columns, mask):
+    """불리언 마스크에 해당하는 행만 남긴 열 묶음 (사전은 그대로 유지)"""
+    selected = dict(columns)
+    selected['day'] = columns['day'][mask]
+    selected['second'] = columns['second'][mask]
+    for column, _ in DICT_COLUMNS:
+        selected[column] = columns[column][mask]
+    return selected
+
+
+def day_range_mask(columns, start_date=None, end_date=None):
+    """날짜 범위(포함)에 해당하는 행 마스크"""
+    mask = np.ones(len(columns['day']), dtype=bool)
+    if start_date:
+        mask &= columns['day'] >= day_number(start_date)
+    if end_date:
+        mask &= columns['day'] <= day_number(end_date)
+    return mask
+
+
+def concat_columns(parts):
+    """
+    여러 열 묶음을 하나로 합치기
+    - 파일마다 사전이 다르므로 고유값을 합친 뒤 코드를 새 사전 기준으로 다시 매김
+    """
+    parts = [part for part in parts if len(part['day'])]
+    if not parts:
+        return empty_columns()
+    if len(parts) == 1:
+        return parts[0]
+
+    merged = {
+        'day': np.concatenate([part['day'] for part in parts]),
+        'second': np.concatenate([part['second'] for part in parts]),
+    }
+    for column, _ in DICT_COLUMNS:
+        values = np.unique(np.concatenate([part[f'{column}_values'] for part in parts]))
+        merged[column] = np.concatenate([
+            np.searchsorted(values, part[f'{column}_values']).astype(np.int32)[part[column]]
+            for part in parts
+        ])
+        merged[f'{column}_values'] = values
+    return merged
+
+
+def write_archive(path, columns):
+    """열 묶음을 .npz 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **columns)
+    os.replace(tmp_path, path)
+
+
+def read_archive(path):
+    """.npz 파일에서 열 묶음 읽기"""
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
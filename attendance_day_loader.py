@@ -0,0 +1,120 @@
+"""
+교시별 출석 현황용 날짜 단위 Firestore 조회
+- 전체 admin 컬렉션 대신 선택한 날짜의 admin/{날짜}_{교시}/students 문서만 조회
+  1. students 컬렉션 그룹에서 date_only가 같은 문서를 쿼리 한 번으로 조회
+  2. 컬렉션 그룹 색인이 없는 등 쿼리가 실패하면 교시 목록의 문서를 병렬로 조회 (firestore_fanout)
+- 지난 날짜는 더 바뀌지 않으므로 한 번 읽은 결과를 계속 사용
+  (출석 로그의 날짜 서명 - 파티션 정보 + Firestore 변경 번호 - 이 바뀌면 다시 조회, 다른 워커의 추가/삭제 반영)
+- 오늘 날짜는 짧은 시간(today_ttl초)만 캐시
+- 교시별 조회 중 하나라도 실패하면 일부만 조회된 결과이므로 캐시하지 않음
+"""
+import logging
+import threading
+import time
+
+from firestore_fanout import READ_TIMEOUT, fan_out
+
+
+def _is_failed_precondition(error):
+    """컬렉션 그룹 색인이 없을 때의 오류인지 확인 (google-cloud가 없으면 False)"""
+    try:
+        from google.api_core.exceptions import FailedPrecondition
+    except ImportError:
+        return False
+    return isinstance(error, FailedPrecondition)
+
+
+class FirestoreDayLoader:
+    """날짜별 admin 출석 문서 조회와 캐시"""
+
+    def __init__(self, periods, today_ttl=10):
+        """
+        Args:
+            periods: 컬렉션 그룹 쿼리를 쓸 수 없을 때 조회할 교시 목록
+            today_ttl: 오늘 날짜 조회 결과 캐시 시간 (초)
+        """
+        self.periods = list(periods)
+        self.today_ttl = today_ttl
+        self._cache = {}  # 날짜 -> (조회 시각, 날짜 서명, 기록 목록)
+        self._lock = threading.Lock()
+        self._group_query_available = True
+
+    def load(self, db, date_only, today, signature=None):
+        """
+        해당 날짜의 Firestore admin 출석 기록 목록
+
+        Args:
+            db: Firestore 클라이언트
+            date_only: 조회할 날짜 (YYYY-MM-DD)
+            today: 오늘 날짜 (YYYY-MM-DD) - 이전 날짜는 계속 캐시
+            signature: 출석 로그의 해당 날짜 서명 (AttendanceLog.day_signature - 바뀌면 캐시 무효)
+        Returns:
+            기록 딕셔너리 목록 (id: firebase_{날짜}_{교시}_{학번}, source: firebase)
+        """
+        with self._lock:
+            cached = self._cache.get(date_only)
+        if cached and cached[1] == signature and (date_only < today or time.time() - cached[0] < self.today_ttl):
+            return cached[2]
+
+        records, complete = self._fetch(db, date_only)
+        if complete:
+            with self._lock:
+                self._cache[date_only] = (time.time(), signature, records)
+        return records
+
+    def invalidate(self, date_only=None):
+        """해당 날짜(없으면 전체) 캐시 삭제 - 이 워커에서 추가/삭제한 경우"""
+        with self._lock:
+            if date_only is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(date_only, None)
+
+    # ---------- 내부 함수 ----------
+
+    def _fetch(self, db, date_only):
+        """(기록 목록, 모든 교시를 조회했는지 여부)"""
+        if self._group_query_available:
+            try:
+                query = db.collection_group('students').where('date_only', '==', date_only)
+                docs = query.get(timeout=READ_TIMEOUT)
+                records = [self._to_record(doc) for doc in docs if self._is_admin_doc(doc)]
+                logging.debug(f"Firestore {date_only} 출석 {len(records)}건 조회 (컬렉션 그룹)")
+                return [record for record in records if record], True
+            except Exception as e:
+                if _is_failed_precondition(e):
+                    # 컬렉션 그룹 색인이 없음 - 이후에는 교시별 조회만 사용
+                    logging.warning(f"컬렉션 그룹 쿼리 색인 없음, 교시별 조회로 전환: {e}")
+                    self._group_query_available = False
+                else:
+                    # 시간 초과/연결 오류 - 이번 조회만 교시별로
+                    logging.warning(f"컬렉션 그룹 쿼리 실패, 이번 조회는 교시별로: {e}")
+
+        records = []
+        complete = True
+        for date_period, docs, error in fan_out(
+                lambda key, timeout: db.collection('admin').document(key).collection('students').get(timeout=timeout),
+                [f"{date_only}_{period}" for period in self.periods]):
+            if error:
+                logging.warning(f"Firebase {date_period} 조회 실패 (결과 캐시 안 함): {error}")
+                complete = False
+                continue
+            records.extend(record for record in map(self._to_record, docs) if record)
+        logging.debug(f"Firestore {date_only} 출석 {len(records)}건 조회 (교시 {len(self.periods)}개)")
+        return records, complete
+
+    @staticmethod
+    def _is_admin_doc(doc):
+        """admin/{날짜}_{교시}/students/{학번} 경로의 문서인지 확인"""
+        parent = doc.reference.parent.parent
+        return parent is not None and parent.parent.id == 'admin'
+
+    @staticmethod
+    def _to_record(doc):
+        data = doc.to_dict()
+        if not data:
+            return None
+        date_period = doc.reference.parent.parent.id
+        data['id'] = f"firebase_{date_period}_{doc.id}"
+        data['source'] = 'firebase'
+        return data
@@ -0,0 +1,623 @@
+"""
+날짜별로 분할된 출석 로그 파일
+- attendance.csv 하나에 계속 추가하는 대신 날짜별 파일에 저장
+  구조: {log_dir}/YYYY/MM/YYYY-MM-DD.csv (헤더: 출석일,교시,학번,이름,공강좌석번호)
+- manifest.json에 파티션 목록과 행 수를 기록하여 날짜 범위 조회 시 필요한 파일만 열기
+- 기존 attendance.csv는 최초 1회 파티션으로 가져옴 (원본 파일은 그대로 둠)
+- 마감된 날짜는 compact()로 월별 열 단위 보관 파일(archive/YYYY-MM.npz)로 압축
+- 여러 gunicorn 워커가 같은 디렉터리를 쓰므로 쓰기는 파일 잠금 안에서 manifest를 다시 읽은 뒤 수행
+- 행 추가/삭제 시 주별 통계 집계(rollups/)도 같은 잠금 안에서 증분 갱신
+- 삭제는 파일을 다시 쓰지 않고 manifest에 파티션 내 행 위치(tombstone)만 기록,
+  읽을 때 마스크로 제외하고 compact() 때 실제로 제거
+- Firestore에만 있는 기록을 바꾼 날짜는 manifest에 변경 번호를 올려 다른 워커의 날짜별 Firestore 캐시도 무효화
+- NumPy(보관 파일, 열 묶음)는 import 비용이 커서 보관 파일/열 묶음을 처음 다룰 때 함수 안에서 import
+  (앱 시작과 출석 확인/등록처럼 날짜 파티션 CSV만 쓰는 경로는 NumPy를 불러오지 않음)
+"""
+import contextlib
+import csv
+import io
+import json
+import logging
+import os
+import threading
+
+from attendance_rollups import AttendanceRollups
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경 - 프로세스 간 잠금 없이 동작
+    fcntl = None
+
+CSV_HEADER = ['출석일', '교시', '학번', '이름', '공강좌석번호']
+MANIFEST_VERSION = 1
+ROLLUP_VERSION = 1
+
+
+def _net_changes(removed, added):
+    """집계에서 뺀 키와 더한 키 목록을 {키: 증감}으로 합치기 (0인 키 제외)"""
+    changes = {}
+    for key in removed:
+        changes[key] = changes.get(key, 0) - 1
+    for key in added:
+        changes[key] = changes.get(key, 0) + 1
+    return {key: delta for key, delta in changes.items() if delta}
+
+
+class AttendanceLog:
+    """날짜별 출석 로그 파티션과 manifest 관리"""
+
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+        self.manifest_path = os.path.join(log_dir, 'manifest.json')
+        self.lock_path = os.path.join(log_dir, '.lock')
+        self._lock = threading.RLock()
+        self._lock_depth = 0  # 파일 잠금 중첩 횟수 (flock은 같은 프로세스에서도 재진입 불가)
+        self._manifest_mtime = None
+        self._archive_cache = {}  # 보관 파일 경로 -> (수정 시각, 열 묶음)
+        self._csv_cache = {}      # 파티션 경로 -> (inode, 읽은 바이트 수, 헤더, 행 목록) - 추가된 부분만 이어 읽기
+        self.rollups = AttendanceRollups(os.path.join(log_dir, 'rollups'))
+        self._manifest = self._read_manifest()
+
+    # ---------- 조회 ----------
+
+    def dates(self, start_date=None, end_date=None):
+        """기록이 있는 날짜 목록 (오름차순, 범위 지정 가능)"""
+        with self._lock:
+            self._refresh_manifest()
+            return sorted(d for d in self._manifest['partitions']
+                          if (start_date is None or d >= start_date) and
+                          (end_date is None or d <= end_date))
+
+    def read_partition(self, date_only):
+        """해당 날짜 파티션의 행 목록 (dict, 한글 헤더 키, 삭제 표시된 행 제외)"""
+        with self._lock:
+            self._refresh_manifest()
+            archive = self._archive_of(date_only)
+            if archive:
+                from attendance_archive import decode_rows, select
+                columns = self._load_archive(archive)
+                return decode_rows(select(columns, self._live_mask(archive, columns, date_only, date_only)))
+
+            deleted = set(self._deleted_of(date_only))
+            rows = self._read_csv(date_only)
+            return [row for offset, row in enumerate(rows) if offset not in deleted] if deleted else rows
+
+    def read_range(self, start_date=None, end_date=None):
+        """날짜 범위에 해당하는 파티션만 열어 행 목록 반환 (보관 파일은 파일당 1회만 읽음)"""
+        rows = []
+        read_archives = set()
+        with self._lock:
+            for date_only in self.dates(start_date, end_date):
+                archive = self._archive_of(date_only)
+                if not archive:
+                    rows.extend(self.read_partition(date_only))
+                elif archive not in read_archives:
+                    from attendance_archive import decode_rows, select
+                    read_archives.add(archive)
+                    columns = self._load_archive(archive)
+                    rows.extend(decode_rows(select(columns, self._live_mask(archive, columns, start_date, end_date))))
+        return rows
+
+    def read_columns(self, start_date=None, end_date=None):
+        """
+        날짜 범위의 기록을 열 묶음(NumPy 배열)으로 반환
+        - 보관 파일은 그대로, 아직 열려 있는 날짜 파티션은 인코딩하여 합침
+        - 출석일을 해석할 수 없는 행은 제외
+        """
+        from attendance_archive import concat_columns, empty_columns, encode_rows, select
+        parts = []
+        read_archives = set()
+        with self._lock:
+            for date_only in self.dates(start_date, end_date):
+                archive = self._archive_of(date_only)
+                if not archive:
+                    parts.append(encode_rows(self.read_partition(date_only), strict=False))
+                elif archive not in read_archives:
+                    read_archives.add(archive)
+                    columns = self._load_archive(archive)
+                    parts.append(select(columns, self._live_mask(archive, columns, start_date, end_date)))
+        return concat_columns(parts) if parts else empty_columns()
+
+    def find_student(self, student_id, start_date, end_date):
+        """기간 내 해당 학생의 행 목록 (출석일 오름차순) - 주간 출석 제한 확인용"""
+        student_id = str(student_id)
+        rows = []
+        with self._lock:
+            for date_only in self.dates(start_date, end_date):
+                rows.extend(row for row in self.read_partition(date_only) if str(row.get('학번') or '') == student_id)
+        return sorted(rows, key=lambda row: str(row.get('출석일') or ''))
+
+    def partition_info(self, date_only):
+        """해당 날짜의 manifest 항목 (행 수, 보관 파일, 삭제 표시) - 없으면 None"""
+        with self._lock:
+            self._refresh_manifest()
+            entry = self._manifest['partitions'].get(date_only)
+            return json.loads(json.dumps(entry)) if entry else None
+
+    def day_signature(self, date_only):
+        """날짜별 Firestore 조회 캐시 서명 (파티션 정보, Firestore 변경 번호) - 어느 워커에서 바뀌어도 달라짐"""
+        with self._lock:
+            self._refresh_manifest()
+            entry = self._manifest['partitions'].get(date_only)
+            return (json.dumps(entry, sort_keys=True) if entry else None,
+                    self._manifest.get('remote_changes', {}).get(date_only, 0))
+
+    def remote_changes(self, start_date, end_date):
+        """기간 내 Firestore 전용 기록 변경 번호 합계 (mark_remote_change - 어느 워커에서 바꿔도 커짐)"""
+        with self._lock:
+            self._refresh_manifest()
+            return sum(count for date_only, count in self._manifest.get('remote_changes', {}).items()
+                       if start_date <= date_only <= end_date)
+
+    def partition_path(self, date_only):
+        """날짜 문자열(YYYY-MM-DD)에 해당하는 파티션 파일 경로"""
+        year, month = date_only[:4], date_only[5:7]
+        return os.path.join(self.log_dir, year, month, f"{date_only}.csv")
+
+    # ---------- 쓰기 ----------
+
+    def locked(self):
+        """
+        쓰기 잠금 (다른 워커와 함께 확인 후 추가해야 하는 경우)
+        예: with log.locked(): 이번 주 기록 확인 -> 없으면 append()
+        """
+        return self._write_lock()
+
+    def append(self, datetime_str, period, student_id, name, seat):
+        """
+        출석 1건을 해당 날짜 파티션에 추가
+
+        Returns:
+            통계 집계 변경분 {(날짜, 교시, 학번): 증감}
+        """
+        date_only = datetime_str[:10]
+        path = self.partition_path(date_only)
+        with self._write_lock():
+            if self._archive_of(date_only):
+                # 이미 보관된 날짜에 추가하는 경우 (관리자 수동 추가) - 날짜 파티션으로 되돌린 뒤 추가
+                self._reopen_archived(date_only)
+            new_file = not os.path.exists(path)
+            if new_file:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+                if new_file:
+                    f.write(','.join(CSV_HEADER) + '\n')
+                writer.writerow([datetime_str, period, student_id, name, seat])
+            partition = self._manifest['partitions'].setdefault(date_only, {'rows': 0})
+            partition['rows'] += 1
+            self._write_manifest()
+            added = self.rollups.apply([dict(zip(CSV_HEADER, [datetime_str, period, student_id, name, seat]))])
+            return _net_changes([], added)
+
+    def mark_remote_change(self, dates):
+        """
+        Firestore에만 있는 기록을 추가/삭제한 날짜의 변경 번호 증가 (출석 로그 파티션은 그대로인 경우)
+
+        Args:
+            dates: 날짜 문자열(YYYY-MM-DD) 목록
+        """
+        dates = sorted(set(dates))
+        if not dates:
+            return
+        with self._write_lock():
+            changes = self._manifest.setdefault('remote_changes', {})
+            for date_only in dates:
+                changes[date_only] = changes.get(date_only, 0) + 1
+            self._write_manifest()
+
+    def rewrite_partition(self, date_only, rows):
+        """
+        파티션 전체를 주어진 행으로 교체 (기존 CSV 가져오기 등)
+        - 행이 없으면 파티션 파일과 manifest 항목 삭제
+        - 보관된 날짜는 보관 파일에서 빼고 날짜 파티션으로 다시 씀
+
+        Returns:
+            통계 집계 변경분 {(날짜, 교시, 학번): 증감}
+        """
+        path = self.partition_path(date_only)
+        with self._write_lock():
+            old_rows = self.read_partition(date_only)
+            if self._archive_of(date_only):
+                self._drop_archived_day(date_only)
+            if not rows:
+                if os.path.exists(path):
+                    os.remove(path)
+                self._manifest['partitions'].pop(date_only, None)
+            else:
+                self._write_partition(date_only, rows)
+            self._write_manifest()
+            return _net_changes(self.rollups.apply(old_rows, -1), self.rollups.apply(rows, 1))
+
+    def delete(self, targets):
+        """
+        여러 날짜의 행을 한 번에 삭제 (파일은 그대로 두고 manifest에 삭제 표시만 기록)
+        - 날짜마다 파티션을 한 번 읽어 (학번, 출석일시), (학번, 교시) -> 행 위치 색인을 만든 뒤 조회
+        - 날짜 파티션(CSV)의 모든 행이 삭제되면 파일과 manifest 항목 제거
+
+        Args:
+            targets: {날짜: [(학번, 출석일시 또는 None, 교시 또는 None), ...]}
+                     출석일시가 있으면 학번+출석일시, 없으면 학번+교시가 같은 행 중
+                     아직 삭제되지 않은 첫 행 1개씩 삭제
+        Returns:
+            (삭제된 행 목록, 통계 집계 변경분 {(날짜, 교시, 학번): 증감})
+        """
+        removed = []
+        with self._write_lock():
+            for date_only, matches in sorted(targets.items()):
+                entry = self._manifest['partitions'].get(date_only)
+                if entry is None:
+                    continue
+                rows = self._read_physical(date_only)
+                deleted = set(entry.get('deleted', ()))
+
+                by_time, by_period = {}, {}
+                for offset, row in enumerate(rows):
+                    if offset in deleted:
+                        continue
+                    student_id = str(row.get('학번') or '')
+                    by_time.setdefault((student_id, str(row.get('출석일') or '')), []).append(offset)
+                    by_period.setdefault((student_id, str(row.get('교시') or '')), []).append(offset)
+
+                matched = set()
+                for student_id, datetime_str, period in matches:
+                    offsets = by_time.get((student_id, datetime_str)) if datetime_str \
+                        else by_period.get((student_id, period))
+                    offset = next((o for o in offsets or () if o not in matched), None)
+                    if offset is None:
+                        logging.warning(f"삭제할 출석 로그 행 없음: {student_id}, {datetime_str or period} ({date_only})")
+                        continue
+                    matched.add(offset)
+                if not matched:
+                    continue
+
+                removed.extend(rows[offset] for offset in sorted(matched))
+                deleted |= matched
+                if len(deleted) >= len(rows) and not entry.get('archive'):
+                    os.remove(self.partition_path(date_only))
+                    del self._manifest['partitions'][date_only]
+                else:
+                    entry['deleted'] = sorted(deleted)
+
+            if not removed:
+                return [], {}
+            self._write_manifest()
+            return removed, _net_changes(self.rollups.apply(removed, -1), [])
+
+    def compact(self, before_date):
+        """
+        before_date 이전의 마감된 날짜 파티션을 월별 보관 파일로 압축
+        - 삭제 표시된 행은 이때 실제로 제거 (삭제 표시가 있는 기존 보관 파일도 다시 씀)
+
+        Returns:
+            보관 파일로 옮긴 날짜 수
+        """
+        with self._write_lock():
+            by_month = {}
+            for date_only, entry in self._manifest['partitions'].items():
+                if date_only < before_date and not entry.get('archive'):
+                    by_month.setdefault(date_only[:7], []).append(date_only)
+            vacuumed = self._vacuum_archives({entry['archive'] for date_only, entry in
+                                              self._manifest['partitions'].items()
+                                              if entry.get('archive') and entry.get('deleted') and
+                                              date_only[:7] not in by_month})
+
+            compacted = 0
+            for month, month_dates in sorted(by_month.items()):
+                compacted += self._compact_month(month, month_dates)
+
+            if compacted or vacuumed:
+                self._write_manifest()
+            if compacted:
+                logging.info(f"출석 로그 {compacted}개 날짜를 보관 파일로 압축 ({before_date} 이전)")
+            return compacted
+
+    def _compact_month(self, month, month_dates):
+        """한 달치 날짜 파티션을 보관 파일(기존 보관 파일이 있으면 합침)로 옮기고 옮긴 날짜 수 반환"""
+        import numpy as np
+        from attendance_archive import concat_columns, encode_rows, select
+
+        parts = []
+        archived_dates = []
+        for date_only in sorted(month_dates):
+            columns = encode_rows(self.read_partition(date_only))
+            if columns is None:
+                logging.warning(f"출석일 형식이 다른 행이 있어 보관하지 않음: {date_only}")
+                continue
+            parts.append(columns)
+            archived_dates.append(date_only)
+        if not archived_dates:
+            return 0
+
+        archive = f"archive/{month}.npz"
+        if os.path.exists(os.path.join(self.log_dir, archive)):
+            existing = self._load_archive(archive)
+            parts.insert(0, select(existing, self._live_mask(archive, existing)))
+        columns = concat_columns(parts)
+        columns = select(columns, np.lexsort((columns['second'], columns['day'])))
+        self._save_archive(archive, columns)
+        self._reset_archived_days(archive, columns)
+
+        for date_only in archived_dates:
+            os.remove(self.partition_path(date_only))
+            if not self._archive_of(date_only):
+                # 모든 행이 삭제 표시된 날짜
+                del self._manifest['partitions'][date_only]
+        return len(archived_dates)
+
+    def ensure_rollups(self):
+        """
+        통계 집계가 없거나 형식이 바뀐 경우 전체 로그로 다시 구축
+
+        Returns:
+            다시 구축했는지 여부
+        """
+        with self._write_lock():
+            if self._manifest.get('rollups') == ROLLUP_VERSION:
+                return False
+            self.rollups.clear()
+            self.rollups.apply(self.read_range(), 1)
+            self._manifest['rollups'] = ROLLUP_VERSION
+            self._write_manifest()
+            logging.info("출석 통계 집계(rollups) 전체 재구축 완료")
+            return True
+
+    def import_legacy_csv(self, csv_path):
+        """
+        기존 단일 attendance.csv를 날짜별 파티션으로 가져오기 (최초 1회)
+        - manifest에 가져온 파일의 크기와 수정 시간을 기록하여 중복 가져오기 방지
+        """
+        if not os.path.exists(csv_path):
+            return 0
+        stat = os.stat(csv_path)
+        source = {'path': csv_path, 'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+        with self._write_lock():
+            if self._manifest.get('legacy_source', {}).get('path') == csv_path:
+                return 0
+
+            by_date = {}
+            with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    date_only = (row.get('출석일') or '')[:10]
+                    if len(date_only) == 10:
+                        by_date.setdefault(date_only, []).append(row)
+
+            for date_only, rows in by_date.items():
+                self.rewrite_partition(date_only, self.read_partition(date_only) + rows)
+
+            self._manifest['legacy_source'] = source
+            self._write_manifest()
+            imported = sum(len(rows) for rows in by_date.values())
+            logging.info(f"{csv_path}에서 {imported}개 출석 기록을 {len(by_date)}개 날짜 파티션으로 가져옴")
+            return imported
+
+    # ---------- 보관 파일 ----------
+
+    def _archive_of(self, date_only):
+        entry = self._manifest['partitions'].get(date_only)
+        return entry.get('archive') if entry else None
+
+    def _load_archive(self, archive):
+        """보관 파일 읽기 (수정 시각이 같으면 메모리의 열 묶음 재사용)"""
+        from attendance_archive import empty_columns, read_archive
+        path = os.path.join(self.log_dir, archive)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return empty_columns()
+        cached = self._archive_cache.get(archive)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        columns = read_archive(path)
+        self._archive_cache[archive] = (mtime, columns)
+        return columns
+
+    def _save_archive(self, archive, columns):
+        from attendance_archive import write_archive
+        path = os.path.join(self.log_dir, archive)
+        self._archive_cache.pop(archive, None)
+        if len(columns['day']) == 0:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        write_archive(path, columns)
+
+    def _live_mask(self, archive, columns, start_date=None, end_date=None):
+        """
+        보관 파일 열 묶음에서 날짜 범위에 해당하고 삭제 표시되지 않은 행 마스크
+        - 보관 파일은 날짜순으로 정렬되어 있으므로 날짜 시작 위치 + 삭제 표시 위치로 계산
+        """
+        import numpy as np
+        from attendance_archive import day_number, day_range_mask
+        mask = day_range_mask(columns, start_date, end_date)
+        for date_only, entry in self._manifest['partitions'].items():
+            if (entry.get('deleted') and entry.get('archive') == archive and
+                    (start_date is None or date_only >= start_date) and
+                    (end_date is None or date_only <= end_date)):
+                first = np.searchsorted(columns['day'], day_number(date_only))
+                mask[first + np.asarray(entry['deleted'], dtype=np.int64)] = False
+        return mask
+
+    def _vacuum_archives(self, archives):
+        """삭제 표시가 있는 보관 파일에서 해당 행을 실제로 제거한 뒤 다시 저장"""
+        if not archives:
+            return 0
+        from attendance_archive import select
+        for archive in sorted(archives):
+            columns = self._load_archive(archive)
+            columns = select(columns, self._live_mask(archive, columns))
+            self._save_archive(archive, columns)
+            self._reset_archived_days(archive, columns)
+        logging.info(f"삭제 표시된 행 정리: 보관 파일 {len(archives)}개")
+        return len(archives)
+
+    def _reset_archived_days(self, archive, columns):
+        """보관 파일 내용 기준으로 해당 월의 manifest 항목(행 수, 보관 표시) 재작성 - 삭제 표시 제거"""
+        import numpy as np
+        for date_only in [d for d, entry in self._manifest['partitions'].items() if entry.get('archive') == archive]:
+            del self._manifest['partitions'][date_only]
+        days, counts = np.unique(columns['day'], return_counts=True)
+        for day, count in zip(days.astype('datetime64[D]').astype(str), counts):
+            self._manifest['partitions'][str(day)] = {'rows': int(count), 'archive': archive}
+
+    def _drop_archived_day(self, date_only):
+        """보관 파일에서 해당 날짜의 행을 제거하고 manifest에서 보관 표시 해제"""
+        from attendance_archive import day_number, select
+        archive = self._archive_of(date_only)
+        columns = self._load_archive(archive)
+        self._save_archive(archive, select(columns, columns['day'] != day_number(date_only)))
+        del self._manifest['partitions'][date_only]['archive']
+
+    def _reopen_archived(self, date_only):
+        """보관된 날짜를 다시 날짜 파티션(CSV)으로 되돌림"""
+        rows = self.read_partition(date_only)
+        self._drop_archived_day(date_only)
+        self._write_partition(date_only, rows)
+
+    # ---------- 내부 함수 ----------
+
+    def _deleted_of(self, date_only):
+        entry = self._manifest['partitions'].get(date_only)
+        return entry.get('deleted', ()) if entry else ()
+
+    def _read_csv(self, date_only):
+        """
+        날짜 파티션 CSV 읽기
+        - 같은 파일에 행만 추가된 경우 마지막으로 읽은 위치 이후만 읽어 이어 붙임
+        - 파일이 교체되었거나 행 수가 manifest와 다르면 처음부터 다시 읽음
+        """
+        path = self.partition_path(date_only)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._csv_cache.pop(path, None)
+            return []
+
+        cached = self._csv_cache.get(path)
+        if cached and cached[0] == stat.st_ino and cached[1] == stat.st_size:
+            return list(cached[3])
+        rows = self._read_csv_from(path, stat, cached if cached and cached[0] == stat.st_ino else None)
+        entry = self._manifest['partitions'].get(date_only)
+        if cached and entry and len(rows) != entry.get('rows'):
+            rows = self._read_csv_from(path, stat, None)
+        return list(rows)
+
+    def _read_csv_from(self, path, stat, cached):
+        with open(path, 'rb') as f:
+            offset = cached[1] if cached and cached[1] <= stat.st_size else 0
+            if offset:
+                f.seek(offset - 1)
+                if f.read(1) != b'\n':
+                    offset = 0
+            f.seek(offset)
+            data = f.read()
+        # 다른 워커가 쓰는 중일 수 있는 마지막 줄(줄바꿈 전)은 다음에 읽음
+        end = data.rfind(b'\n') + 1
+        reader = csv.reader(io.StringIO(data[:end].decode('utf-8'), newline=''))
+        if offset:
+            header, rows = cached[2], list(cached[3])
+        else:
+            header, rows = next(reader, None) or CSV_HEADER, []
+        rows.extend(dict(zip(header, values)) for values in reader if values)
+        self._csv_cache[path] = (stat.st_ino, offset + end, header, rows)
+        return rows
+
+    def _read_physical(self, date_only):
+        """삭제 표시와 관계없이 파티션에 저장된 순서 그대로의 행 목록 (삭제 표시 위치 계산용)"""
+        archive = self._archive_of(date_only)
+        if archive:
+            from attendance_archive import day_number, decode_rows, select
+            columns = self._load_archive(archive)
+            return decode_rows(select(columns, columns['day'] == day_number(date_only)))
+        return self._read_csv(date_only)
+
+    def _write_partition(self, date_only, rows):
+        path = self.partition_path(date_only)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_HEADER, quoting=csv.QUOTE_ALL,
+                                    extrasaction='ignore')
+            f.write(','.join(CSV_HEADER) + '\n')
+            writer.writerows(rows)
+        os.replace(tmp_path, path)
+        self._manifest['partitions'][date_only] = {'rows': len(rows)}
+
+    @contextlib.contextmanager
+    def _write_lock(self):
+        """스레드 잠금 + 프로세스 간 파일 잠금, 잠금 후 다른 워커가 바꾼 manifest 다시 읽기"""
+        with self._lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+
+            os.makedirs(self.log_dir, exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._lock_depth = 1
+                try:
+                    self._refresh_manifest()
+                    yield
+                finally:
+                    self._lock_depth = 0
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ---------- manifest ----------
+
+    def _manifest_stat(self):
+        try:
+            return os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh_manifest(self):
+        """다른 워커가 manifest를 바꾼 경우 다시 읽기"""
+        mtime = self._manifest_stat()
+        if mtime is not None and mtime != self._manifest_mtime:
+            self._manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        self._manifest_mtime = self._manifest_stat()
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {'version': MANIFEST_VERSION, 'partitions': self._scan_partitions()}
+
+    def _scan_partitions(self):
+        """manifest가 없거나 손상된 경우 디렉터리를 훑어 파티션 목록 재구성"""
+        partitions = {}
+        if not os.path.isdir(self.log_dir):
+            return partitions
+        for root, _, files in os.walk(self.log_dir):
+            for file_name in files:
+                path = os.path.join(root, file_name)
+                if file_name.endswith('.csv'):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        rows = max(sum(1 for _ in f) - 1, 0)
+                    partitions[file_name[:-4]] = {'rows': rows}
+                elif file_name.endswith('.npz'):
+                    import numpy as np
+                    from attendance_archive import read_archive
+                    archive = os.path.relpath(path, self.log_dir).replace(os.sep, '/')
+                    days, counts = np.unique(read_archive(path)['day'], return_counts=True)
+                    for day, count in zip(days.astype('datetime64[D]').astype(str), counts):
+                        partitions.setdefault(str(day), {'rows': int(count), 'archive': archive})
+        return partitions
+
+    def _write_manifest(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest_mtime = self._manifest_stat()
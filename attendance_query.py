@@ -0,0 +1,102 @@
+"""
+/list 출석 기록 조회 계층
+- 정확히 일치하는 조건(학번, 날짜, 날짜+교시)은 저장소 인덱스로 필터
+- 검색어는 저장소의 검색 색인(학번 접두사 트라이, 이름 자모/초성 색인)으로 조회
+- 정렬은 미리 계산한 정렬 키 인덱스 사용, 이전/다음 페이지는 커서(keyset) 방식으로 조회
+"""
+import base64
+import json
+import re
+
+# 정렬 가능한 필드
+SORT_FIELDS = ('date', 'student_id', 'name', 'period', 'seat')
+
+_DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$')
+
+
+def _date_key(record):
+    """'YYYY-MM-DD HH:MM:SS'는 문자열 순서가 시간 순서와 같음 - 형식이 다르면 가장 오래된 것으로 취급"""
+    value = str(record.get('date') or '')
+    return (1, value) if _DATETIME_RE.match(value) else (0, '')
+
+
+def _text_key(field):
+    def key(record):
+        value = record.get(field)
+        return (1, str(value).lower() if value is not None else '')
+    return key
+
+
+SORT_KEYS = {field: _text_key(field) for field in SORT_FIELDS}
+SORT_KEYS['date'] = _date_key
+
+
+def encode_cursor(entry):
+    """(정렬 키, 기록 키)를 URL에 넣을 수 있는 문자열로 변환"""
+    if entry is None:
+        return ''
+    return base64.urlsafe_b64encode(json.dumps(entry, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    커서 문자열을 (정렬 키, 기록 키)로 복원 (잘못된 값이면 None)
+    - 정렬 키는 SORT_KEYS가 만드는 (형식 일치 여부 0/1, 문자열) 형태만 허용
+      (다른 형태는 저장소의 정렬 키와 비교할 때 TypeError가 나므로 여기서 거름)
+    """
+    if not cursor:
+        return None
+    try:
+        sort_key, key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (ValueError, TypeError):
+        return None
+    if not (isinstance(sort_key, list) and len(sort_key) == 2 and type(sort_key[0]) is int and
+            sort_key[0] in (0, 1) and isinstance(sort_key[1], str) and isinstance(key, str)):
+        return None
+    return (tuple(sort_key), key)
+
+
+def query_records(store, sort_by='date', sort_direction='desc', page=1, limit=50, search='', search_field='all',
+                  student_id=None, date_only=None, period=None, after=None, before=None):
+    """
+    출석 기록 한 페이지 조회
+
+    Args:
+        store: AttendanceStore
+        page: 페이지 번호 (커서가 없을 때 위치 계산, 커서가 있을 때는 표시용)
+        after, before: 다음/이전 페이지 커서 문자열
+    Returns:
+        {'records', 'current_page', 'total_pages', 'total_count', 'next_cursor', 'prev_cursor'}
+    """
+    if sort_by not in SORT_KEYS:
+        sort_by = 'date'
+    descending = sort_direction.lower() == 'desc'
+    limit = max(1, limit)
+
+    # 1. 인덱스 조건 -> 2. 검색어 (인덱스 결과 안에서만 검색)
+    ids = store.filter_ids(student_id=student_id, date_only=date_only, period=period)
+    if search:
+        ids = store.search(search, search_field, ids)
+
+    after_entry, before_entry = decode_cursor(after), decode_cursor(before)
+    if after_entry is None and before_entry is None:
+        # 페이지 번호 방식 - 전체 개수를 먼저 알아야 마지막 페이지로 보정 가능
+        total_count = len(ids) if ids is not None else len(store)
+        total_pages = max((total_count + limit - 1) // limit, 1)
+        page = min(max(1, page), total_pages)
+        records, first, last, total_count = store.page(sort_by, SORT_KEYS[sort_by], descending, limit,
+                                                       offset=(page - 1) * limit, ids=ids)
+    else:
+        records, first, last, total_count = store.page(sort_by, SORT_KEYS[sort_by], descending, limit,
+                                                       after=after_entry, before=before_entry, ids=ids)
+        total_pages = max((total_count + limit - 1) // limit, 1)
+        page = min(max(1, page), total_pages)
+
+    return {
+        'records': records,
+        'current_page': page,
+        'total_pages': total_pages,
+        'total_count': total_count,
+        'next_cursor': encode_cursor(last) if page < total_pages else '',
+        'prev_cursor': encode_cursor(first) if page > 1 else ''
+    }
@@ -0,0 +1,132 @@
+"""
+출석 통계용 사전 집계(rollup)
+- 주(월요일 시작)마다 파일 하나: {rollup_dir}/YYYY-MM-DD.json (해당 주 월요일 날짜)
+  {"days": {날짜: {교시: 횟수}}, "students": {학번: [횟수, 최근 이름]}}
+- AttendanceLog가 행 추가/삭제 시 파일 잠금 안에서 증분 갱신
+- /stats는 원본 행 대신 최대 수십 개의 작은 주별 파일만 합산
+"""
+import json
+import os
+import shutil
+from datetime import date, timedelta
+
+
+def week_start(date_only):
+    """해당 날짜가 속한 주의 월요일 (YYYY-MM-DD)"""
+    day = date.fromisoformat(date_only)
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def week_starts(start_date, end_date):
+    """기간과 겹치는 주의 월요일 목록"""
+    monday = date.fromisoformat(week_start(start_date))
+    end = date.fromisoformat(end_date)
+    mondays = []
+    while monday <= end:
+        mondays.append(monday.isoformat())
+        monday += timedelta(days=7)
+    return mondays
+
+
+class AttendanceRollups:
+    """주별 출석 집계 파일 관리 (쓰기 잠금은 AttendanceLog가 담당)"""
+
+    def __init__(self, rollup_dir):
+        self.rollup_dir = rollup_dir
+        self._cache = {}  # 월요일 -> (수정 시각, 집계 데이터)
+
+    # ---------- 조회 ----------
+
+    def day_counts(self, start_date, end_date):
+        """기간 내 {(날짜, 교시): 횟수}"""
+        counts = {}
+        for monday in week_starts(start_date, end_date):
+            for date_only, periods in self._load(monday)['days'].items():
+                if start_date <= date_only <= end_date:
+                    for period, count in periods.items():
+                        counts[(date_only, period)] = count
+        return counts
+
+    def student_counts(self, monday):
+        """해당 주의 {학번: [횟수, 최근 이름]}"""
+        return self._load(monday)['students']
+
+    # ---------- 갱신 ----------
+
+    def apply(self, rows, sign=1):
+        """
+        출석 로그 행(한글 헤더 dict)을 집계에 더하거나(sign=1) 빼기(sign=-1)
+
+        Returns:
+            변경된 (날짜, 교시, 학번) 목록 - Firestore 미러 갱신용
+        """
+        by_week = {}
+        for row in rows:
+            date_only = str(row.get('출석일') or '')[:10]
+            try:
+                by_week.setdefault(week_start(date_only), []).append((date_only, row))
+            except ValueError:
+                continue
+
+        changed = []
+        for monday, week_rows in by_week.items():
+            data = self._load(monday)
+            for date_only, row in week_rows:
+                period = str(row.get('교시') or '')
+                student_id = str(row.get('학번') or '')
+                periods = data['days'].setdefault(date_only, {})
+                periods[period] = periods.get(period, 0) + sign
+                if periods[period] <= 0:
+                    del periods[period]
+                    if not periods:
+                        del data['days'][date_only]
+                if student_id:
+                    entry = data['students'].setdefault(student_id, [0, ''])
+                    entry[0] += sign
+                    if sign > 0:
+                        entry[1] = str(row.get('이름') or '')
+                    if entry[0] <= 0:
+                        del data['students'][student_id]
+                changed.append((date_only, period, student_id))
+            self._save(monday, data)
+        return changed
+
+    def clear(self):
+        """모든 집계 파일 삭제 (전체 재구축 전)"""
+        self._cache = {}
+        if os.path.isdir(self.rollup_dir):
+            shutil.rmtree(self.rollup_dir)
+
+    # ---------- 내부 함수 ----------
+
+    def _path(self, monday):
+        return os.path.join(self.rollup_dir, f"{monday}.json")
+
+    def _load(self, monday):
+        """주별 집계 읽기 (수정 시각이 같으면 메모리 재사용)"""
+        path = self._path(monday)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return {'days': {}, 'students': {}}
+        cached = self._cache.get(monday)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self._cache[monday] = (mtime, data)
+        return data
+
+    def _save(self, monday, data):
+        path = self._path(monday)
+        if not data['days'] and not data['students']:
+            self._cache.pop(monday, None)
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        self._cache[monday] = (os.stat(path).st_mtime_ns, data)
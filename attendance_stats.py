@@ -0,0 +1,216 @@
+"""
+출석 통계 집계 (NumPy 벡터 연산)
+- 입력은 {(날짜, 교시): 횟수}와 {학번: [횟수, 이름]} 형태의 집계값
+  (주별 rollup 파일 + 주 일부만 포함된 기간의 원본 행 + Firebase 전용 기록)
+- 요일/교시/요일×교시/주차별 표는 bincount, 상위 학생은 argpartition으로 계산
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from attendance_archive import DICT_COLUMNS, day_number, empty_columns
+from attendance_rollups import week_starts
+
+WEEKDAY_NAMES = ['월요일', '화요일', '수요일', '목요일', '금요일', '토요일', '일요일']
+TOP_STUDENTS = 10
+
+
+def period_sort_key(period):
+    """교시 정렬 기준 (1교시부터 오름차순, 시간 외와 기타는 뒤로)"""
+    if '교시' in period:
+        try:
+            return int(period.split('교시')[0])
+        except ValueError:
+            return 999
+    elif period == '시간 외':
+        return 998
+    else:
+        return 999
+
+
+def records_to_columns(records):
+    """
+    출석 기록 딕셔너리 목록(Firebase 기록 등)을 통계용 열 묶음으로 변환
+    - 날짜 부분만 사용하며 해석할 수 없는 기록은 제외
+    """
+    days = []
+    kept = []
+    for record in records:
+        try:
+            days.append(day_number(str(record.get('date', '')).split()[0]))
+            kept.append(record)
+        except (ValueError, IndexError):
+            continue
+    if not kept:
+        return empty_columns()
+
+    columns = {
+        'day': np.array(days, dtype=np.int32),
+        'second': np.zeros(len(kept), dtype=np.int32),
+    }
+    fields = {'student': 'student_id', 'period': 'period', 'name': 'name', 'seat': 'seat'}
+    for column, _ in DICT_COLUMNS:
+        default = '미지정' if column == 'period' else ''
+        values, codes = np.unique(np.array([str(r.get(fields[column], default)) for r in kept], dtype=str),
+                                  return_inverse=True)
+        columns[column] = codes.astype(np.int32)
+        columns[f'{column}_values'] = values
+    return columns
+
+
+def count_columns(columns):
+    """
+    열 묶음을 집계값으로 변환
+
+    Returns:
+        ({(날짜, 교시): 횟수}, {학번: [횟수, 최근 이름]})
+    """
+    if len(columns['day']) == 0:
+        return {}, {}
+    periods = columns['period_values']
+    n_periods = max(len(periods), 1)
+    keys, counts = np.unique(columns['day'].astype(np.int64) * n_periods + columns['period'], return_counts=True)
+    dates = (keys // n_periods).astype('datetime64[D]').astype(str)
+    day_counts = {(str(d), str(periods[p])): int(c) for d, p, c in zip(dates, keys % n_periods, counts)}
+
+    # 학번별 횟수와 가장 최근 기록의 이름
+    students = columns['student_values']
+    order = np.lexsort((columns['second'], columns['day']))
+    codes = columns['student'][order]
+    student_totals = np.bincount(codes, minlength=len(students))
+    latest = np.zeros(len(students), dtype=np.int64)
+    latest[codes] = columns['name'][order]  # 같은 학번이면 마지막(가장 최근) 값이 남음
+    student_counts = {str(students[i]): [int(student_totals[i]), str(columns['name_values'][latest[i]])]
+                      for i in np.flatnonzero(student_totals) if students[i]}
+    return day_counts, student_counts
+
+
+def merge_counts(target, source):
+    """집계값 합치기 (target에 더함)"""
+    day_counts, student_counts = target
+    for key, count in source[0].items():
+        day_counts[key] = day_counts.get(key, 0) + count
+    for student_id, (count, name) in source[1].items():
+        entry = student_counts.setdefault(student_id, [0, name])
+        entry[0] += count
+        entry[1] = name or entry[1]
+    return target
+
+
+def rollup_counts(attendance_log, start_date, end_date):
+    """
+    기간 내 집계값을 주별 rollup에서 계산
+    - 요일×교시 횟수는 rollup의 날짜별 값을 그대로 사용
+    - 학생별 횟수는 기간에 통째로 포함된 주는 rollup, 일부만 포함된 처음/마지막 주는 원본 행으로 계산
+    """
+    totals = (attendance_log.rollups.day_counts(start_date, end_date), {})
+    for monday in week_starts(start_date, end_date):
+        sunday = (date.fromisoformat(monday) + timedelta(days=6)).isoformat()
+        if start_date <= monday and sunday <= end_date:
+            merge_counts(totals, ({}, attendance_log.rollups.student_counts(monday)))
+        else:
+            _, partial = count_columns(attendance_log.read_columns(max(start_date, monday), min(end_date, sunday)))
+            merge_counts(totals, ({}, partial))
+    return totals
+
+
+def _weekday_period_table(matrix, periods):
+    """
+    요일×교시 행렬을 템플릿 형식으로 변환
+
+    Returns:
+        (출석이 있는 요일의 [(요일, [(교시, 횟수), ...]), ...], 정렬된 교시 목록)
+    """
+    period_idx = sorted(np.flatnonzero(matrix.sum(axis=0)), key=lambda i: period_sort_key(periods[i]))
+    sorted_periods = [periods[i] for i in period_idx]
+    table = []
+    for weekday in np.flatnonzero(matrix.sum(axis=1)):
+        table.append((WEEKDAY_NAMES[weekday],
+                      [(periods[i], int(matrix[weekday, i])) for i in period_idx]))
+    return table, sorted_periods
+
+
+def compute_stats(counts, start_date, end_date, weekly=False):
+    """
+    기간 내 출석 통계 계산
+
+    Args:
+        counts: ({(날짜, 교시): 횟수}, {학번: [횟수, 이름]}) - 기간 밖 날짜는 무시
+        start_date, end_date: 'YYYY-MM-DD' (포함)
+        weekly: 주차별(월~일) 요일×교시 표도 계산할지 여부
+    Returns:
+        stats.html 템플릿 변수 딕셔너리
+    """
+    day_counts, student_counts = counts
+    start_day, end_day = day_number(start_date), day_number(end_date)
+    items = [(key, count) for key, count in day_counts.items() if start_date <= key[0] <= end_date]
+
+    periods = sorted({period for (_, period), _ in items})
+    period_index = {period: i for i, period in enumerate(periods)}
+    n_periods = max(len(periods), 1)
+    days = np.array([date.fromisoformat(d).toordinal() for (d, _), _ in items], dtype=np.int64) \
+        - date(1970, 1, 1).toordinal()
+    period_codes = np.array([period_index[p] for (_, p), _ in items], dtype=np.int64)
+    weights = np.array([count for _, count in items], dtype=np.int64)
+
+    # 1970-01-01은 목요일 (월요일=0 기준 3)
+    weekdays = (days + 3) % 7
+
+    # 요일×교시 행렬 (요일별, 교시별 합계도 여기서 계산)
+    matrix = np.bincount(weekdays * n_periods + period_codes, weights=weights,
+                         minlength=7 * n_periods).astype(np.int64).reshape(7, n_periods)
+    weekday_counts = matrix.sum(axis=1)
+    period_counts = matrix.sum(axis=0)
+
+    weekday_stats = [(WEEKDAY_NAMES[i], int(weekday_counts[i])) for i in np.flatnonzero(weekday_counts)]
+    weekday_period_stats, sorted_periods = _weekday_period_table(matrix, periods)
+    period_stats = sorted(((periods[i], int(period_counts[i])) for i in np.flatnonzero(period_counts)),
+                          key=lambda item: period_sort_key(item[0]))
+
+    # 학생별 방문 횟수 - 상위 N명만 argpartition으로 선택 후 정렬
+    students = [sid for sid, (count, _) in student_counts.items() if sid and count > 0]
+    totals = np.array([student_counts[sid][0] for sid in students], dtype=np.int64)
+    candidates = np.arange(len(students))
+    if len(candidates) > TOP_STUDENTS:
+        candidates = np.argpartition(-totals, TOP_STUDENTS - 1)[:TOP_STUDENTS]
+    top_students = [{
+        'student_id': students[i],
+        'name': student_counts[students[i]][1],
+        'count': int(totals[i])
+    } for i in sorted(candidates, key=lambda i: (-totals[i], students[i]))]
+
+    # 주차별 (월요일 시작) 요일×교시 - 주차 번호로 한 번에 bincount
+    weekly_stats = []
+    if weekly:
+        first_monday = date.fromisoformat(start_date) - timedelta(days=date.fromisoformat(start_date).weekday())
+        first_monday_day = day_number(first_monday.isoformat())
+        n_weeks = (end_day - first_monday_day) // 7 + 1
+        week_idx = (days - first_monday_day) // 7
+        cube = np.bincount((week_idx * 7 + weekdays) * n_periods + period_codes, weights=weights,
+                           minlength=n_weeks * 7 * n_periods).astype(np.int64).reshape(n_weeks, 7, n_periods)
+        for week in range(n_weeks):
+            week_start = first_monday + timedelta(days=7 * week)
+            week_end = week_start + timedelta(days=6)
+            table, week_periods = _weekday_period_table(cube[week], periods)
+            weekly_stats.append({
+                'label': f"{week_start.month}/{week_start.day} ~ {week_end.month}/{week_end.day}",
+                'start_date': week_start,
+                'end_date': week_end,
+                'records_count': int(cube[week].sum()),
+                'weekday_period_data': {},
+                'weekday_period_stats': table,
+                'sorted_periods': week_periods
+            })
+
+    return {
+        'total_visitors': int(weights.sum()),
+        'weekday_stats': weekday_stats,
+        'max_day_count': max((count for _, count in weekday_stats), default=1),
+        'period_stats': period_stats,
+        'max_period_count': max((count for _, count in period_stats), default=1),
+        'top_students': top_students,
+        'max_student_count': int(totals.max()) if totals.size else 1,
+        'weekday_period_stats': weekday_period_stats,
+        'sorted_periods': sorted_periods,
+        'weekly_stats': weekly_stats
+    }
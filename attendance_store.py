@@ -0,0 +1,283 @@
+"""
+출석 기록 인메모리 저장소
+- load_attendance()가 매번 CSV와 Firebase 전체를 다시 읽지 않도록 한 번만 구축
+- save_attendance(), delete_records() 실행 시 증분으로 갱신
+- 날짜별, (날짜, 교시)별, 학번별, 출처(source)별 보조 인덱스 제공
+- /list용 정렬 인덱스(미리 계산한 정렬 키)와 검색 색인(search_index.SearchIndex) 보관
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+
+from search_index import SearchIndex
+
+# 검색 대상 필드와 색인 방식 (/list 검색창의 검색 필드와 같은 순서)
+# - 학번은 앞자리 일치, 이름은 한글 자모/초성 부분 일치, 날짜는 날짜 부분(YYYY-MM-DD)만 비교
+SEARCH_FIELDS = {
+    'student_id': 'prefix',
+    'name': 'hangul',
+    'seat': 'substring',
+    'period': 'substring',
+    'date': 'substring',
+}
+
+
+def record_key(record):
+    """
+    출석 기록의 정규 키 (student_id, date_only, period)
+    - CSV와 Firebase 기록을 같은 출석으로 판별할 때 사용
+    """
+    date_only = record.get('date_only') or str(record.get('date', ''))[:10]
+    return (str(record.get('student_id', '')), date_only, record.get('period', ''))
+
+
+class AttendanceStore:
+    """출석 기록과 보조 인덱스를 보관하는 프로세스 내 저장소"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._records = {}          # 기록 키 -> 기록(dict)
+        self._by_date = {}          # date_only -> 기록 키 집합
+        self._by_date_period = {}   # (date_only, period) -> 기록 키 집합
+        self._by_student = {}       # student_id -> 기록 키 집합
+        self._by_source = {}        # source('csv', 'firebase' 등) -> 기록 키 집합
+        self._search_index = SearchIndex(SEARCH_FIELDS)
+        self._sort_funcs = {}       # 정렬 인덱스 이름 -> 정렬 키 함수
+        self._sort_entries = {}     # 정렬 인덱스 이름 -> [(정렬 키, 기록 키), ...] (오름차순)
+        self._sort_keys = {}        # 정렬 인덱스 이름 -> {기록 키: 정렬 키}
+        self._sorted_cache = None   # 날짜 내림차순 정렬 결과 캐시
+        self.built_at = None
+
+    @property
+    def loaded(self):
+        return self.built_at is not None
+
+    def age(self):
+        """마지막 구축 이후 경과 시간(초)"""
+        if self.built_at is None:
+            return None
+        return time.time() - self.built_at
+
+    def build(self, records):
+        """전체 기록으로 저장소를 새로 구축"""
+        with self._lock:
+            self._records = {}
+            self._by_date = {}
+            self._by_date_period = {}
+            self._by_student = {}
+            self._by_source = {}
+            self._search_index.clear()
+            self._sort_funcs = {}
+            self._sort_entries = {}
+            self._sort_keys = {}
+            for record in records:
+                self._insert(record)
+            self._sorted_cache = None
+            self.built_at = time.time()
+
+    def invalidate(self):
+        """다음 load_attendance() 호출 시 다시 구축되도록 표시"""
+        with self._lock:
+            self.built_at = None
+
+    def add(self, record):
+        """기록 1건 추가 (같은 키가 있으면 교체)"""
+        with self._lock:
+            key = record['id']
+            if key in self._records:
+                self._remove(key)
+            self._insert(record)
+            self._sorted_cache = None
+
+    def remove(self, key):
+        """기록 1건 삭제, 삭제 여부 반환"""
+        with self._lock:
+            if key not in self._records:
+                return False
+            self._remove(key)
+            self._sorted_cache = None
+            return True
+
+    def all(self):
+        """모든 기록 (날짜 내림차순)"""
+        with self._lock:
+            if self._sorted_cache is None:
+                self._sorted_cache = sorted(self._records.values(),
+                                            key=lambda r: r.get('date', ''), reverse=True)
+            return list(self._sorted_cache)
+
+    def by_date(self, date_only):
+        """해당 날짜의 기록 (날짜 내림차순)"""
+        with self._lock:
+            return self._collect(self._by_date.get(date_only, ()))
+
+    def by_date_period(self, date_only, period):
+        """해당 날짜, 교시의 기록"""
+        with self._lock:
+            return self._collect(self._by_date_period.get((date_only, period), ()))
+
+    def by_student(self, student_id):
+        """해당 학생의 기록"""
+        with self._lock:
+            return self._collect(self._by_student.get(str(student_id), ()))
+
+    def by_source(self, source):
+        """해당 출처의 기록"""
+        with self._lock:
+            return self._collect(self._by_source.get(source, ()))
+
+    def sources(self):
+        """저장소에 있는 기록 출처 목록"""
+        with self._lock:
+            return list(self._by_source.keys())
+
+    def filter_ids(self, student_id=None, date_only=None, period=None):
+        """
+        정확히 일치하는 조건으로 인덱스에서 기록 키 집합 조회 (조건이 없으면 None = 전체)
+        - 교시 조건은 날짜와 함께 지정한 경우에만 사용
+        """
+        with self._lock:
+            candidates = []
+            if student_id:
+                candidates.append(self._by_student.get(str(student_id), set()))
+            if date_only and period:
+                candidates.append(self._by_date_period.get((date_only, period), set()))
+            elif date_only:
+                candidates.append(self._by_date.get(date_only, set()))
+            if not candidates:
+                return None
+            return set.intersection(*(set(keys) for keys in candidates))
+
+    def search(self, text, field='all', ids=None):
+        """
+        검색어와 일치하는 기록 키 집합 (대소문자 무시)
+        - 학번: 앞자리 일치 / 이름: 부분 일치, 입력 중인 글자('홍기')와 초성('ㅎㄱㄷ') 허용
+        - 좌석, 교시, 날짜: 부분 일치
+
+        Args:
+            field: SEARCH_FIELDS 중 하나 또는 'all'
+            ids: 이 집합 안에서만 검색 (None이면 전체)
+        """
+        with self._lock:
+            keys = self._search_index.search(text.strip(), field)
+            return keys if ids is None else keys & ids
+
+    def page(self, index, key_func, descending=False, limit=50, offset=0, after=None, before=None, ids=None):
+        """
+        정렬 인덱스로 한 페이지 조회 (정렬 키가 같으면 기록 키 순서)
+
+        Args:
+            index: 정렬 인덱스 이름 (처음 조회할 때 key_func로 구축 후 증분 갱신)
+            key_func: 기록 -> 정렬 키 (튜플)
+            offset: 페이지 번호 방식의 시작 위치 (after/before가 없을 때만 사용)
+            after: 이 (정렬 키, 기록 키) 다음 항목부터 조회 (다음 페이지 커서)
+            before: 이 (정렬 키, 기록 키) 바로 앞까지 조회 (이전 페이지 커서)
+            ids: 필터링된 기록 키 집합 (None이면 전체)
+        Returns:
+            (기록 목록, 첫 항목 커서, 마지막 항목 커서, 전체 개수)
+        """
+        with self._lock:
+            entries = self._sort_index(index, key_func)
+            if ids is not None:
+                keys = self._sort_keys[index]
+                if len(ids) * 8 > len(entries):
+                    # 검색 결과가 많으면 다시 정렬하지 않고 정렬 인덱스를 순서대로 걸러냄
+                    entries = [entry for entry in entries if entry[1] in ids]
+                else:
+                    entries = sorted((keys[key], key) for key in ids if key in keys)
+            total = len(entries)
+
+            # 오름차순 목록에서 [lo, hi) 구간을 고른 뒤 내림차순이면 뒤집음
+            if after is not None:
+                if descending:
+                    hi = bisect_left(entries, after)
+                    lo = max(hi - limit, 0)
+                else:
+                    lo = bisect_right(entries, after)
+                    hi = lo + limit
+            elif before is not None:
+                if descending:
+                    lo = bisect_right(entries, before)
+                    hi = lo + limit
+                else:
+                    hi = bisect_left(entries, before)
+                    lo = max(hi - limit, 0)
+            elif descending:
+                hi = max(total - offset, 0)
+                lo = max(hi - limit, 0)
+            else:
+                lo = offset
+                hi = offset + limit
+            selected = entries[lo:hi]
+            if descending:
+                selected = selected[::-1]
+
+            records = [self._records[key] for _, key in selected]
+            first = selected[0] if selected else None
+            last = selected[-1] if selected else None
+            return records, first, last, total
+
+    def dates(self):
+        """기록이 있는 날짜 목록"""
+        with self._lock:
+            return list(self._by_date.keys())
+
+    def __len__(self):
+        return len(self._records)
+
+    # ---------- 내부 함수 ----------
+
+    def _collect(self, keys):
+        records = [self._records[k] for k in keys]
+        return sorted(records, key=lambda r: r.get('date', ''), reverse=True)
+
+    def _insert(self, record):
+        key = record['id']
+        self._records[key] = record
+        date_only = record.get('date_only', '')
+        period = record.get('period', '')
+        student_id = str(record.get('student_id', ''))
+        self._by_date.setdefault(date_only, set()).add(key)
+        self._by_date_period.setdefault((date_only, period), set()).add(key)
+        self._by_student.setdefault(student_id, set()).add(key)
+        self._by_source.setdefault(record.get('source', ''), set()).add(key)
+        self._search_index.add(key, {
+            'student_id': student_id,
+            'name': record.get('name', ''),
+            'seat': record.get('seat', ''),
+            'period': period,
+            'date': date_only,
+        })
+        for index, key_func in self._sort_funcs.items():
+            sort_key = key_func(record)
+            self._sort_keys[index][key] = sort_key
+            insort(self._sort_entries[index], (sort_key, key))
+
+    def _sort_index(self, index, key_func):
+        """정렬 인덱스 반환 (없으면 전체 기록으로 한 번 구축)"""
+        if index not in self._sort_funcs:
+            keys = {key: key_func(record) for key, record in self._records.items()}
+            self._sort_funcs[index] = key_func
+            self._sort_keys[index] = keys
+            self._sort_entries[index] = sorted((sort_key, key) for key, sort_key in keys.items())
+        return self._sort_entries[index]
+
+    def _remove(self, key):
+        record = self._records.pop(key)
+        self._search_index.remove(key)
+        for index, keys in self._sort_keys.items():
+            entries = self._sort_entries[index]
+            position = bisect_left(entries, (keys.pop(key), key))
+            del entries[position]
+        date_only = record.get('date_only', '')
+        period = record.get('period', '')
+        student_id = str(record.get('student_id', ''))
+        for index, index_key in ((self._by_date, date_only),
+                                 (self._by_date_period, (date_only, period)),
+                                 (self._by_student, student_id),
+                                 (self._by_source, record.get('source', ''))):
+            keys = index.get(index_key)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[index_key]
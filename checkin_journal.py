@@ -0,0 +1,356 @@
+"""
+출석 등록 write-behind 저널
+- 출석은 저널 파일(JSON Lines, 추가 전용)에 기록하고 fsync한 뒤 바로 응답
+  {"op": "checkin", "id": ..., "data": {...}, "rollups": [...]} / {"op": "ack", "ids": [...]}
+- 백그라운드 스레드가 미반영 항목을 writer(Firestore 배치 쓰기)로 반영한 뒤 완료(ack) 기록
+- Firestore가 느리거나 연결되지 않으면 지수 백오프로 재시도, 앱이 다시 시작되면 미반영 항목부터 반영
+- 잘못된 인자/권한 오류처럼 재시도해도 실패하는 항목은 max_attempts번 실패하면 dead_letter.jsonl로 옮김
+  (한 항목 때문에 뒤의 출석이 모두 막히지 않도록)
+- 여러 gunicorn 워커가 같은 저널을 쓰므로 기록은 파일 잠금 안에서, 반영은 반영 잠금을 얻은 워커 하나만 수행
+  (반영 워커는 저널 파일 크기/수정 시간을 poll_interval마다 확인하여 다른 워커의 기록도 바로 반영)
+- 저널은 마지막으로 읽은 위치부터 새로 추가된 줄만 읽음 (다 반영되어 비울 때는 새 파일로 교체)
+- 기록 도중 중단되어 줄바꿈 없이 끝난 마지막 줄은 다음 기록 전에 잘라냄 (새 항목이 이어 붙어 손상되지 않도록)
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경 - 프로세스 간 잠금 없이 동작
+    fcntl = None
+
+
+class CheckinJournal:
+    """출석 저널 기록과 백그라운드 반영"""
+
+    def __init__(self, journal_dir, writer, batch_entries=200, max_backoff=60, idle_interval=30,
+                 permanent_error=None, max_attempts=3, poll_interval=0.5):
+        """
+        Args:
+            journal_dir: 저널 디렉터리 (checkins.jsonl, 잠금 파일)
+            writer: 항목 목록을 받아 원격 저장소에 한 번에 쓰는 함수 (실패 시 예외)
+            batch_entries: 한 번에 반영할 최대 항목 수 (Firestore 배치 500건 제한 고려)
+            max_backoff: 재시도 최대 대기 시간 (초)
+            idle_interval: 새 항목 알림이 없어도 저널을 다시 확인하는 주기 (초)
+            permanent_error: 오류가 재시도해도 소용없는 오류인지 판단하는 함수 (없으면 모두 일시적 오류로 처리)
+            max_attempts: 항목별 재시도 불가 오류 허용 횟수 (넘으면 dead_letter.jsonl로 이동)
+            poll_interval: 반영 스레드가 다른 워커의 기록을 확인하는 주기 (초)
+        """
+        self.journal_dir = journal_dir
+        self.path = os.path.join(journal_dir, 'checkins.jsonl')
+        self.dead_letter_path = os.path.join(journal_dir, 'dead_letter.jsonl')
+        self.lock_path = os.path.join(journal_dir, '.lock')
+        self.flusher_lock_path = os.path.join(journal_dir, '.flusher')
+        self._writer = writer
+        self._permanent_error = permanent_error or (lambda error: False)
+        self.max_attempts = max_attempts
+        self._attempts = {}  # 항목 ID -> 재시도 불가 오류 횟수
+        self.batch_entries = batch_entries
+        self.max_backoff = max_backoff
+        self.idle_interval = idle_interval
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats = {'appended': 0, 'flushed': 0, 'failures': 0, 'dead_lettered': 0,
+                       'last_error': None, 'last_flush': None}
+        # 증분 읽기 상태 (파일 잠금 안에서만 변경)
+        self._read_inode = None
+        self._read_first_line = b''   # 파일 첫 줄 - 비운 뒤 새 파일은 고유한 generation 줄로 시작
+        self._read_offset = 0
+        self._pending = {}   # 항목 ID -> 미반영 항목 (기록 순서)
+
+    # ---------- 기록 ----------
+
+    def append(self, entries):
+        """
+        항목들을 저널에 기록하고 fsync (반환 시점에 디스크에 안전하게 저장됨)
+
+        Args:
+            entries: [{'data': 출석 데이터, 'rollups': 통계 집계 변경분 목록}, ...]
+        Returns:
+            기록한 항목 ID 목록
+        """
+        lines = []
+        ids = []
+        for entry in entries:
+            entry_id = uuid.uuid4().hex
+            ids.append(entry_id)
+            lines.append(json.dumps(dict(entry, op='checkin', id=entry_id), ensure_ascii=False))
+        with self._file_lock():
+            self._write_lines(lines)
+        self._stats['appended'] += len(ids)
+        # create_app()을 거치지 않은 실행(모듈 수준 app 사용)에서도 반영되도록 처음 기록할 때 반영 스레드 시작
+        self.start()
+        self._wake.set()
+        return ids
+
+    def pending(self):
+        """아직 반영되지 않은 항목 목록 (기록 순서)"""
+        with self._file_lock():
+            return list(self._read().values())
+
+    def discard(self, predicate):
+        """
+        아직 반영되지 않은 항목 중 predicate(data)가 참인 항목을 반영하지 않고 완료 처리 (관리자 삭제)
+
+        Returns:
+            완료 처리한 항목 수
+        """
+        with self._file_lock():
+            ids = [entry_id for entry_id, entry in self._read().items() if predicate(entry['data'])]
+            if ids:
+                self._write_lines([json.dumps({'op': 'ack', 'ids': ids})])
+        return len(ids)
+
+    def stats(self):
+        """저널 상태 (관리자 확인용)"""
+        stats = dict(self._stats)
+        stats['pending'] = len(self.pending())
+        stats['flusher'] = self._thread is not None and self._thread.is_alive()
+        return stats
+
+    # ---------- 반영 ----------
+
+    def start(self):
+        """백그라운드 반영 스레드 시작 (이미 시작된 경우 무시)"""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='checkin-journal', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """반영 스레드를 바로 깨움 (연결 복구 등)"""
+        self._wake.set()
+
+    def flush(self):
+        """
+        미반영 항목을 batch_entries개씩 반영하고 완료 기록 (writer 실패 시 예외)
+
+        Returns:
+            반영한 항목 수
+        """
+        flushed = 0
+        while True:
+            pending = self.pending()[:self.batch_entries]
+            if not pending:
+                break
+            try:
+                self._writer(pending)
+                done = pending
+            except Exception as e:
+                if not self._permanent_error(e):
+                    raise
+                # 재시도 불가 오류 - 항목별로 다시 반영해 실패한 항목만 골라냄
+                done = self._flush_one_by_one(pending)
+            self._ack(done)
+            flushed += len(done)
+            self._stats['flushed'] += len(done)
+            self._stats['last_flush'] = time.time()
+        self._truncate_if_done()
+        return flushed
+
+    def _flush_one_by_one(self, entries):
+        """
+        항목을 1건씩 반영 (일시적 오류는 예외 그대로 - 백오프 후 재시도)
+        - 재시도 불가 오류가 max_attempts번 쌓인 항목은 dead_letter.jsonl로 옮기고 완료 처리
+
+        Returns:
+            반영에 성공한 항목 목록 (dead letter로 옮긴 항목 제외)
+        """
+        done = []
+        dead = []
+        last_error = None
+        for entry in entries:
+            try:
+                self._writer([entry])
+                done.append(entry)
+                self._attempts.pop(entry['id'], None)
+            except Exception as e:
+                if not self._permanent_error(e):
+                    self._ack(done)
+                    self._dead_letter(dead)
+                    raise
+                last_error = e
+                attempts = self._attempts.get(entry['id'], 0) + 1
+                self._attempts[entry['id']] = attempts
+                logging.warning(f"출석 저널 항목 반영 실패 ({attempts}/{self.max_attempts}회): {entry.get('data')} - {e}")
+                if attempts >= self.max_attempts:
+                    dead.append(dict(entry, error=str(e)))
+        self._dead_letter(dead)
+        if last_error is not None and not dead and not done:
+            # 모든 항목이 아직 재시도 횟수 안에서 실패 - 백오프 후 다시 시도
+            raise last_error
+        return done
+
+    def _dead_letter(self, entries):
+        """항목을 dead_letter.jsonl에 기록하고 저널에서 완료 처리"""
+        if not entries:
+            return
+        with self._file_lock():
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+                f.flush()
+                os.fsync(f.fileno())
+            self._write_lines([json.dumps({'op': 'ack', 'ids': [entry['id'] for entry in entries]})])
+        for entry in entries:
+            self._attempts.pop(entry['id'], None)
+        self._stats['dead_lettered'] += len(entries)
+        logging.error(f"출석 저널 항목 {len(entries)}건을 반영하지 못해 {self.dead_letter_path}로 옮김")
+
+    def _ack(self, entries):
+        if not entries:
+            return
+        with self._file_lock():
+            self._write_lines([json.dumps({'op': 'ack', 'ids': [entry['id'] for entry in entries]})])
+
+    def _run(self):
+        """반영 잠금을 얻은 워커만 저널을 비움 - 잠금을 가진 워커가 종료되면 다른 워커가 이어받음"""
+        os.makedirs(self.journal_dir, exist_ok=True)
+        with open(self.flusher_lock_path, 'a') as lock_file:
+            while not self._try_lock(lock_file):
+                time.sleep(self.idle_interval)
+
+            backoff = 1
+            while True:
+                try:
+                    flushed = self.flush()
+                    if flushed:
+                        logging.info(f"출석 저널 {flushed}건 Firestore 반영")
+                    backoff = 1
+                    self._wait_for_changes()
+                except Exception as e:
+                    self._stats['failures'] += 1
+                    self._stats['last_error'] = str(e)
+                    logging.warning(f"출석 저널 반영 실패, {backoff}초 후 재시도: {e}")
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+
+    def _wait_for_changes(self):
+        """같은 워커의 알림(wake) 또는 저널 파일 변경(다른 워커의 기록)까지 대기 (최대 idle_interval초)"""
+        last_state = self._file_state()
+        deadline = time.monotonic() + self.idle_interval
+        while time.monotonic() < deadline:
+            if self._wake.wait(self.poll_interval) or self._file_state() != last_state:
+                break
+        self._wake.clear()
+
+    def _file_state(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    @staticmethod
+    def _try_lock(lock_file):
+        if not fcntl:
+            return True
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    # ---------- 내부 함수 ----------
+
+    def _read(self):
+        """
+        마지막으로 읽은 위치 이후에 추가된 줄을 반영해 {항목 ID: 미반영 항목} 반환 (잠금 안에서 호출)
+        - 파일이 교체되었거나(비우기 - inode/첫 줄 변경) 줄어들었으면 처음부터 다시 읽음
+        - 줄바꿈으로 끝나지 않은 마지막 줄(기록 도중 중단)은 읽지 않음
+        """
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            self._read_inode, self._read_first_line, self._read_offset, self._pending = None, b'', 0, {}
+            return self._pending
+        with f:
+            stat = os.fstat(f.fileno())
+            first_line = f.readline()
+            if (stat.st_ino != self._read_inode or first_line != self._read_first_line
+                    or stat.st_size < self._read_offset):
+                self._read_inode, self._read_first_line, self._read_offset, self._pending = (
+                    stat.st_ino, first_line, 0, {})
+            f.seek(self._read_offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logging.error(f"출석 저널의 손상된 줄 무시: {line[:200]!r}")
+                continue
+            if record.get('op') == 'checkin':
+                self._pending[record['id']] = record
+            elif record.get('op') == 'ack':
+                for entry_id in record.get('ids', ()):
+                    self._pending.pop(entry_id, None)
+        self._read_offset += end
+        return self._pending
+
+    def _write_lines(self, lines):
+        """줄 추가 후 fsync (잠금 안에서 호출) - 이전 기록이 중단되어 남은 불완전한 마지막 줄은 먼저 잘라냄"""
+        os.makedirs(self.journal_dir, exist_ok=True)
+        with open(self.path, 'a+b') as f:
+            self._drop_torn_tail(f)
+            f.write(''.join(line + '\n' for line in lines).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _drop_torn_tail(f):
+        """파일이 줄바꿈으로 끝나지 않으면 마지막 줄바꿈 뒤를 잘라냄"""
+        size = f.seek(0, os.SEEK_END)
+        if not size:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        position = size
+        while position > 0:
+            start = max(position - 4096, 0)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        logging.error(f"출석 저널 끝의 불완전한 기록 {size - position}바이트 잘라냄")
+        f.truncate(position)
+        f.seek(position)
+
+    def _truncate_if_done(self):
+        """모든 항목이 반영되었으면 빈 저널 파일로 교체 (잠금 안에서 다시 확인 - 다른 워커는 inode 변경으로 감지)"""
+        with self._file_lock():
+            pending = self._read()
+            header = len(self._read_first_line) if self._read_first_line.startswith(b'{"op": "generation"') else 0
+            if pending or self._read_offset <= header:
+                return
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write((json.dumps({'op': 'generation', 'id': uuid.uuid4().hex}) + '\n').encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """스레드 잠금 + 프로세스 간 파일 잠금"""
+        with self._lock:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,47 @@
+"""
+Firestore 클라이언트 지연 생성
+- firebase_admin/google-cloud-firestore import와 클라이언트 생성(인증 정보 파싱, gRPC 채널)을
+  Firestore를 처음 사용할 때 한 번만 실행 (Firestore를 쓰지 않는 출석 확인 경로는 콜드 스타트 비용 없음)
+- `if not db`, `db.collection(...)`처럼 기존 클라이언트와 같은 방식으로 사용
+- gunicorn fork 이후 reset()하면 워커에서 처음 사용할 때 새로 생성
+"""
+import threading
+
+
+class LazyFirestoreClient:
+    """처음 사용할 때 factory()로 클라이언트를 만드는 대리 객체 (factory가 None을 반환하면 연결 없음)"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._created = False
+        self._lock = threading.Lock()
+
+    @property
+    def created(self):
+        """클라이언트 생성을 시도했는지 여부"""
+        return self._created
+
+    def get(self):
+        """Firestore 클라이언트 (연결 설정이 없거나 실패하면 None)"""
+        if not self._created:
+            with self._lock:
+                if not self._created:
+                    self._client = self._factory()
+                    self._created = True
+        return self._client
+
+    def reset(self):
+        """다음 사용 시 클라이언트를 새로 생성 (fork 이후 워커에서 호출)"""
+        with self._lock:
+            self._client = None
+            self._created = False
+
+    def __bool__(self):
+        return self.get() is not None
+
+    def __getattr__(self, name):
+        client = self.get()
+        if client is None:
+            raise AttributeError(f"Firebase DB 연결이 설정되지 않았습니다. ({name})")
+        return getattr(client, name)
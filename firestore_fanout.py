@@ -0,0 +1,77 @@
+"""
+Firestore 하위 컬렉션 읽기 병렬 처리
+- admin/{날짜}_{교시}/students처럼 문서마다 따로 읽어야 하는 하위 컬렉션을
+  크기가 정해진 스레드 풀에서 동시에 조회 (전체 소요 시간 ≈ 가장 느린 읽기 1회)
+- 동시 실행 수와 호출별 제한 시간은 환경변수로 조정
+  FIRESTORE_FANOUT_WORKERS (기본 8), FIRESTORE_READ_TIMEOUT (기본 10초)
+- 스레드 풀은 처음 사용할 때 생성 (gunicorn fork 이전에 스레드를 만들지 않도록)
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+FANOUT_WORKERS = int(os.environ.get('FIRESTORE_FANOUT_WORKERS', 8))
+READ_TIMEOUT = float(os.environ.get('FIRESTORE_READ_TIMEOUT', 10))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='firestore-read')
+        return _executor
+
+
+def reset_executor():
+    """fork 이후 워커에서 호출 - 부모 프로세스의 스레드 풀은 버리고 다음 사용 시 새로 생성"""
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+def fan_out(fetch, items, timeout=None):
+    """
+    항목마다 fetch(항목, 제한 시간)를 병렬로 실행
+
+    Args:
+        fetch: Firestore 읽기 함수 - 제한 시간(초)을 받아 get(timeout=...)에 전달
+        items: 읽을 대상 목록 (문서 참조, 문서 이름 등)
+        timeout: 호출별 제한 시간 (기본값: READ_TIMEOUT)
+    Returns:
+        입력 순서대로 [(항목, 결과, 오류), ...] - 실패하거나 시간 초과된 항목은 결과 None
+    """
+    items = list(items)
+    timeout = READ_TIMEOUT if timeout is None else timeout
+    if not items:
+        return []
+    if len(items) == 1:
+        return [_call(fetch, items[0], timeout)]
+
+    executor = _get_executor()
+    futures = [executor.submit(_call, fetch, item, timeout) for item in items]
+    # 호출마다 제한 시간을 넘기지 않으므로 대기 한도는 (대기열 차례 수 + 1) × 제한 시간
+    rounds = (len(items) + FANOUT_WORKERS - 1) // FANOUT_WORKERS
+    done, _ = wait(futures, timeout=timeout * (rounds + 1))
+
+    results = []
+    for item, future in zip(items, futures):
+        if future in done:
+            results.append(future.result())
+        else:
+            future.cancel()
+            results.append((item, None, TimeoutError(f"Firestore 읽기 시간 초과 ({timeout}초)")))
+    failed = sum(1 for _, _, error in results if error)
+    if failed:
+        logging.warning(f"Firestore 병렬 읽기 {len(items)}건 중 {failed}건 실패")
+    return results
+
+
+def _call(fetch, item, timeout):
+    try:
+        return item, fetch(item, timeout), None
+    except Exception as e:
+        return item, None, e
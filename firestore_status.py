@@ -0,0 +1,82 @@
+"""
+Firestore 연결 상태 (오프라인 모드 판정)
+- Firestore 호출이 실패하거나 시간 초과되면 오프라인으로 표시하고,
+  retry_after초 동안은 Firestore를 건너뛰고 로컬 데이터(출석 로그, 학생 명단 스냅샷)로 응답
+- retry_after초가 지나면 다음 호출 하나로 연결을 다시 확인
+- 오프라인에서 다시 연결되면 등록된 복구 함수(재동기화)를 별도 스레드에서 실행
+"""
+import logging
+import threading
+import time
+
+
+class FirestoreStatus:
+    """Firestore 연결 성공/실패 기록과 오프라인 구간"""
+
+    def __init__(self, retry_after=30):
+        """
+        Args:
+            retry_after: 실패 후 Firestore 호출을 다시 시도하기까지 대기 시간 (초)
+        """
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._offline_since = None   # 오프라인이 된 시각 (epoch 초)
+        self._failed_at = None       # 마지막 실패 시각
+        self._last_error = None
+        self._listeners = []
+
+    @property
+    def offline(self):
+        return self._offline_since is not None
+
+    def available(self, db):
+        """Firestore를 호출해도 되는지 여부 (연결 없음 또는 재시도 대기 중이면 False)"""
+        if not db:
+            return False
+        with self._lock:
+            return self._failed_at is None or time.time() - self._failed_at >= self.retry_after
+
+    def mark_failure(self, error):
+        """Firestore 호출 실패 기록 - 오프라인 모드로 전환"""
+        with self._lock:
+            now = time.time()
+            if self._offline_since is None:
+                self._offline_since = now
+                logging.warning(f"Firestore 연결 실패, 오프라인 모드로 전환: {error}")
+            self._failed_at = now
+            self._last_error = str(error)
+
+    def mark_success(self):
+        """Firestore 호출 성공 기록 - 오프라인이었다면 복구 함수 실행"""
+        with self._lock:
+            offline_since = self._offline_since
+            self._offline_since = None
+            self._failed_at = None
+            if offline_since is None:
+                return
+            listeners = list(self._listeners)
+        logging.info(f"Firestore 연결 복구 (오프라인 {time.time() - offline_since:.0f}초)")
+        for listener in listeners:
+            threading.Thread(target=self._run_listener, args=(listener, offline_since),
+                             name='firestore-recover', daemon=True).start()
+
+    def on_recover(self, listener):
+        """연결 복구 시 실행할 함수 등록 - listener(오프라인이 된 시각)"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def stats(self):
+        """연결 상태 (관리자 확인용)"""
+        with self._lock:
+            return {
+                'offline': self._offline_since is not None,
+                'offline_since': self._offline_since,
+                'last_error': self._last_error
+            }
+
+    @staticmethod
+    def _run_listener(listener, offline_since):
+        try:
+            listener(offline_since)
+        except Exception as e:
+            logging.error(f"Firestore 복구 후 재동기화 실패: {e}")
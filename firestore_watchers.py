@@ -0,0 +1,100 @@
+"""
+Firestore 실시간 감시 (on_snapshot)
+- 워커마다 설정/경고/백업 문서의 변경을 구독하여 로컬 캐시를 즉시 갱신
+- 여러 gunicorn 워커가 짧은 TTL 폴링 없이 같은 데이터를 보도록 하기 위함
+- FIRESTORE_WATCHERS=1 환경변수가 있을 때만 사용 (선택 기능)
+- 오류로 닫힌 감시는 watch_active()가 False를 반환하므로 호출한 곳은 TTL 조회로 대체하고,
+  다시 start_watchers()를 호출하면 닫힌 감시만 새로 시작
+"""
+import logging
+import os
+import threading
+
+_watches = []
+_received = set()  # 첫 스냅샷을 받은 감시 이름
+_lock = threading.Lock()
+
+
+def watchers_enabled():
+    """환경변수로 실시간 감시 사용 여부 확인"""
+    return os.environ.get('FIRESTORE_WATCHERS', '0').lower() in ('1', 'true', 'yes')
+
+
+def start_watchers(db, targets):
+    """
+    감시 시작 (이미 동작 중인 감시는 그대로 두고, 닫혔거나 시작하지 못한 감시만 시작)
+
+    Args:
+        db: Firestore 클라이언트
+        targets: [(이름, 문서/컬렉션 참조를 만드는 함수, 콜백), ...]
+                 콜백은 스냅샷 목록(list of DocumentSnapshot)을 받음
+    Returns:
+        시작된 감시 이름 목록
+    """
+    if not db:
+        return []
+
+    started = []
+    with _lock:
+        _prune_closed()
+        running = {name for name, _ in _watches}
+        for name, make_ref, callback in targets:
+            if name in running:
+                continue
+            try:
+                ref = make_ref(db)
+                watch = ref.on_snapshot(_wrap(name, callback))
+                _watches.append((name, watch))
+                started.append(name)
+                logging.info(f"Firestore 실시간 감시 시작: {name}")
+            except Exception as e:
+                logging.error(f"Firestore 실시간 감시 시작 실패 ({name}): {e}")
+    return started
+
+
+def stop_watchers():
+    """모든 감시 중지 (워커 종료 또는 fork 전 정리용)"""
+    with _lock:
+        for name, watch in _watches:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                logging.warning(f"Firestore 실시간 감시 중지 실패 ({name}): {e}")
+        _watches.clear()
+        _received.clear()
+
+
+def active_watchers():
+    """현재 동작 중인 감시 이름 목록"""
+    with _lock:
+        _prune_closed()
+        return [name for name, _ in _watches]
+
+
+def watch_active(name):
+    """해당 감시가 동작 중이고 첫 스냅샷을 받았는지 여부 (감시가 닫혔으면 False - TTL 조회로 대체)"""
+    with _lock:
+        _prune_closed()
+        return name in _received and any(watch_name == name for watch_name, _ in _watches)
+
+
+def _prune_closed():
+    """오류/연결 종료로 닫힌 감시 제거 (잠금 안에서 호출)"""
+    for name, watch in list(_watches):
+        if not getattr(watch, 'is_active', True):
+            logging.warning(f"Firestore 실시간 감시 종료됨, TTL 조회로 대체: {name}")
+            _watches.remove((name, watch))
+            _received.discard(name)
+
+
+def _wrap(name, callback):
+    """on_snapshot 콜백 래퍼 - 콜백 오류가 감시 스레드를 멈추지 않도록 처리"""
+    def on_snapshot(snapshots, changes, read_time):
+        try:
+            callback(snapshots)
+            with _lock:
+                _received.add(name)
+            logging.debug(f"Firestore 실시간 변경 반영: {name} ({len(changes)}건)")
+        except Exception as e:
+            logging.error(f"Firestore 실시간 변경 처리 실패 ({name}): {e}")
+    return on_snapshot
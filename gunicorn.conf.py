@@ -0,0 +1,42 @@
+"""
+gunicorn 운영 설정 (Procfile: gunicorn -c gunicorn.conf.py 'app:create_app()')
+- gthread 워커: 워커 수는 CPU 수 기준, 워커마다 스레드 여러 개로 요청 처리
+  (출석 확인/등록은 대부분 로컬 로그와 메모리 캐시만 사용하므로 스레드로 충분)
+- preload_app: 마스터에서 app을 한 번만 import (pandas, 학생 명단 스냅샷, 시간표)하고
+  워커는 fork로 이를 copy-on-write 공유
+- post_fork: 워커마다 Firestore 클라이언트를 새로 만들고 저널 반영 스레드/실시간 감시 시작
+- 값은 환경변수로 조정 (WEB_CONCURRENCY, GUNICORN_THREADS, GUNICORN_KEEPALIVE, GUNICORN_TIMEOUT, PORT)
+"""
+import multiprocessing
+import os
+
+# app.py가 import 시점에 스레드를 만들지 않도록 (fork 이후 init_worker()에서 시작)
+os.environ.setdefault('DEFER_BACKGROUND_TASKS', '1')
+# fork 전에 사용한 gRPC 채널이 워커에서 멈추지 않도록 gRPC fork 지원 사용
+os.environ.setdefault('GRPC_ENABLE_FORK_SUPPORT', '1')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# 워커별 메모리 캐시(출석 저장소, 명단)를 여러 벌 두지 않도록 프로세스는 CPU 수만큼, 동시성은 스레드로 확보
+# (워커 하나가 재시작되는 동안에도 응답하도록 최소 2개)
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, multiprocessing.cpu_count())))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+preload_app = True
+
+# 키오스크는 같은 연결로 학생마다 조회/등록을 반복하므로 연결을 오래 유지
+# (앞단 프록시의 유휴 연결 제한 시간보다 길게 두어 끊긴 연결로 요청하는 경우 방지)
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 75))
+# 관리자 엑셀 업로드/전체 조회처럼 오래 걸리는 요청 고려
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    import app
+    app.init_worker()
+    server.log.info(f"워커 {worker.pid} 초기화 완료 (Firestore 클라이언트, 백그라운드 작업)")
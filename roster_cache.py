@@ -0,0 +1,186 @@
+"""
+학생 명단(students.xlsx) 캐시
+- 파일의 수정 시간/크기가 바뀌었거나 앱이 직접 파일을 수정한 경우에만 다시 로드
+- 외부 변경 감지 시 백그라운드 스레드에서 다시 읽고 완료 후 원자적으로 교체
+  (요청은 엑셀 파싱을 기다리지 않고 기존 캐시를 그대로 사용)
+- 파싱 결과를 바이너리 스냅샷(students.roster.pkl)으로 저장하여
+  원본 해시가 같으면 엑셀 파싱 없이 1ms 이내로 로드
+- 파싱에 실패해 대체 명단을 쓰는 경우(RosterFallback)는 스냅샷을 만들지 않음
+"""
+import hashlib
+import logging
+import os
+import pickle
+import threading
+
+SNAPSHOT_MAGIC = b'ROSTER'
+SNAPSHOT_VERSION = 1
+
+
+class RosterFallback(Exception):
+    """명단 파일을 읽지 못해 대체 명단을 사용하는 경우 loader가 발생 (스냅샷 저장 안 함)"""
+
+    def __init__(self, students, error):
+        super().__init__(str(error))
+        self.students = students
+
+
+def file_hash(path):
+    """파일 내용의 SHA-256 해시 - 파일이 없으면 None"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def write_snapshot(snapshot_path, source_hash, data):
+    """
+    명단 스냅샷 저장 (임시 파일에 쓴 뒤 교체하여 원자적으로 저장)
+    형식: MAGIC(6바이트) + 버전(1바이트) + pickle({'source_hash', 'students'})
+    """
+    # 워커/스레드가 동시에 저장해도 서로의 임시 파일을 덮어쓰지 않도록 고유 이름 사용
+    tmp_path = f"{snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(bytes([SNAPSHOT_VERSION]))
+            pickle.dump({'source_hash': source_hash, 'students': data}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_snapshot(snapshot_path, source_hash):
+    """
+    원본 해시가 일치하는 스냅샷이면 명단 반환, 아니면 None
+    (파일 없음, 형식/버전 불일치, 원본 변경 모두 None)
+    """
+    try:
+        with open(snapshot_path, 'rb') as f:
+            header = f.read(len(SNAPSHOT_MAGIC) + 1)
+            if header[:-1] != SNAPSHOT_MAGIC or header[-1] != SNAPSHOT_VERSION:
+                return None
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, IndexError):
+        return None
+    if payload.get('source_hash') != source_hash:
+        return None
+    return payload.get('students')
+
+
+class RosterCache:
+    """파일 서명 기반으로 무효화되는 학생 명단 캐시"""
+
+    def __init__(self, path, loader, snapshot_path=None):
+        """
+        Args:
+            path: 명단 파일 경로
+            loader: 파일을 읽어 {학번: (이름, 좌석번호)} 딕셔너리를 반환하는 함수
+                (읽지 못해 대체 명단을 쓰는 경우 RosterFallback 발생)
+            snapshot_path: 바이너리 스냅샷 경로 (기본값: 확장자를 .roster.pkl로 변경)
+        """
+        self.path = path
+        self.snapshot_path = snapshot_path or f"{os.path.splitext(path)[0]}.roster.pkl"
+        self._loader = loader
+        self._data = None
+        self._signature = None
+        self._load_lock = threading.Lock()     # 파일 파싱은 한 번에 하나만 (get()은 첫 로드 때만 사용)
+        self._swap_lock = threading.Lock()     # 명단/서명 교체
+        self._reload_lock = threading.Lock()   # 백그라운드 재로딩 예약 여부
+        self._reloading = False
+
+    def file_signature(self):
+        """파일 서명 (수정 시간 ns, 크기) - 파일이 없으면 None"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self):
+        """
+        현재 명단 반환
+        - 첫 호출 시에만 동기적으로 로드
+        - 파일 서명이 바뀌었으면 백그라운드 재로딩을 예약하고 기존 캐시 반환
+        """
+        data = self._data
+        if data is None:
+            with self._load_lock:
+                # 동시에 들어온 첫 요청은 먼저 로드한 결과를 그대로 사용
+                if self._data is not None:
+                    return self._data
+                return self._reload_locked()
+
+        if self.file_signature() != self._signature:
+            self._schedule_reload()
+        return data
+
+    def reload(self):
+        """명단을 즉시 다시 읽어 교체 (앱이 파일을 직접 수정한 뒤 호출)"""
+        with self._load_lock:
+            return self._reload_locked()
+
+    def _reload_locked(self):
+        """파일을 읽고 명단/서명만 짧게 잠가 교체 (_load_lock 안에서 호출 - get()은 기존 명단 계속 사용)"""
+        signature = self.file_signature()
+        data = self._load_data()
+        # 새 딕셔너리를 완성한 뒤 한 번에 교체
+        with self._swap_lock:
+            self._data = data
+            self._signature = signature
+        logging.debug(f"학생 명단 캐시 갱신: {len(data)}명")
+        return data
+
+    def refresh(self):
+        """백그라운드에서 명단을 다시 읽도록 예약 (기존 캐시는 계속 사용)"""
+        if self._data is None:
+            self.reload()
+        else:
+            self._schedule_reload()
+
+    def _load_data(self):
+        """스냅샷이 최신이면 스냅샷에서, 아니면 원본을 파싱한 뒤 스냅샷 재생성 (대체 명단은 저장 안 함)"""
+        source_hash = file_hash(self.path)
+        if source_hash is not None:
+            data = read_snapshot(self.snapshot_path, source_hash)
+            if data is not None:
+                logging.debug("학생 명단 스냅샷 사용")
+                return data
+
+        try:
+            data = self._loader()
+        except RosterFallback as fallback:
+            logging.warning(f"학생 명단을 읽지 못해 대체 명단 사용 (스냅샷 저장 안 함): {fallback}")
+            return fallback.students
+        if source_hash is None:
+            return data
+
+        try:
+            write_snapshot(self.snapshot_path, source_hash, data)
+            logging.info(f"학생 명단 스냅샷 생성: {self.snapshot_path}")
+        except Exception as e:
+            logging.warning(f"학생 명단 스냅샷 저장 실패: {e}")
+        return data
+
+    def _schedule_reload(self):
+        with self._reload_lock:
+            if self._reloading:
+                return
+            self._reloading = True
+
+        def worker():
+            try:
+                self.reload()
+            except Exception as e:
+                logging.error(f"학생 명단 백그라운드 로딩 실패: {e}")
+            finally:
+                with self._reload_lock:
+                    self._reloading = False
+
+        threading.Thread(target=worker, name='roster-reload', daemon=True).start()
@@ -0,0 +1,229 @@
+"""
+관리자 검색용 인메모리 색인
+- 학번: 접두사 트라이 (입력 중인 학번 앞자리로 바로 조회)
+- 이름: 한글 자모 분해 2-gram + 초성 색인 ('홍기'처럼 입력 중인 글자, 'ㅎㄱㄷ' 같은 초성 검색 지원)
+- 좌석/교시/날짜: 고유값 부분 일치
+- 같은 값을 가진 기록은 고유값 하나에 묶어 색인하므로 색인 크기는 기록 수가 아니라 고유값 수에 비례
+"""
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+CHOSEONG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+# 겹모음/겹받침은 입력 순서대로 나누어 입력 중인 글자도 일치하도록 함 (예: '과' 입력 중 '고')
+JUNGSEONG = ['ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅗㅏ', 'ㅗㅐ', 'ㅗㅣ', 'ㅛ', 'ㅜ', 'ㅜㅓ',
+             'ㅜㅔ', 'ㅜㅣ', 'ㅠ', 'ㅡ', 'ㅡㅣ', 'ㅣ']
+JONGSEONG = ['', 'ㄱ', 'ㄲ', 'ㄱㅅ', 'ㄴ', 'ㄴㅈ', 'ㄴㅎ', 'ㄷ', 'ㄹ', 'ㄹㄱ', 'ㄹㅁ', 'ㄹㅂ', 'ㄹㅅ', 'ㄹㅌ',
+             'ㄹㅍ', 'ㄹㅎ', 'ㅁ', 'ㅂ', 'ㅂㅅ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+# 단독으로 입력된 겹자모 (호환 자모)
+COMPOUND_JAMO = {'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+                 'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ', 'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ',
+                 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ'}
+
+
+def decompose(text):
+    """한글 음절을 자모로 분해 (한글이 아닌 문자는 소문자로 유지)"""
+    parts = []
+    for char in str(text).lower():
+        code = ord(char)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            offset = code - HANGUL_BASE
+            parts.append(CHOSEONG[offset // 588])
+            parts.append(JUNGSEONG[(offset % 588) // 28])
+            parts.append(JONGSEONG[offset % 28])
+        else:
+            parts.append(COMPOUND_JAMO.get(char, char))
+    return ''.join(parts)
+
+
+def initials(text):
+    """한글 음절의 초성만 추출 (예: '홍길동' -> 'ㅎㄱㄷ')"""
+    parts = []
+    for char in str(text).lower():
+        code = ord(char)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            parts.append(CHOSEONG[(code - HANGUL_BASE) // 588])
+        else:
+            parts.append(char)
+    return ''.join(parts)
+
+
+def is_initials_query(text):
+    """초성으로만 이루어진 검색어인지 확인"""
+    return bool(text) and all(char in CHOSEONG for char in text)
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class PrefixTrie:
+    """문자열 접두사 트라이"""
+
+    def __init__(self):
+        self._root = {}
+        self._end = object()  # 단어 끝 표시 키
+
+    def add(self, word):
+        node = self._root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[self._end] = True
+
+    def remove(self, word):
+        path = [self._root]
+        for char in word:
+            node = path[-1].get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].pop(self._end, None)
+        # 비어 있는 노드 정리
+        for depth in range(len(word), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][word[depth - 1]]
+
+    def starts_with(self, prefix):
+        """접두사로 시작하는 모든 단어"""
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        words = []
+        stack = [(node, prefix)]
+        while stack:
+            node, word = stack.pop()
+            for char, child in node.items():
+                if char is self._end:
+                    words.append(word)
+                else:
+                    stack.append((child, word + char))
+        return words
+
+
+class HangulNameIndex:
+    """이름 고유값의 자모 2-gram / 초성 2-gram 색인"""
+
+    def __init__(self):
+        self._jamo = {}        # 이름 -> 자모 분해 문자열
+        self._initials = {}    # 이름 -> 초성 문자열
+        self._jamo_grams = {}  # 자모 2-gram -> 이름 집합
+        self._initial_grams = {}
+
+    def add(self, name):
+        jamo, first = decompose(name), initials(name)
+        self._jamo[name] = jamo
+        self._initials[name] = first
+        for gram in _bigrams(jamo):
+            self._jamo_grams.setdefault(gram, set()).add(name)
+        for gram in _bigrams(first):
+            self._initial_grams.setdefault(gram, set()).add(name)
+
+    def remove(self, name):
+        jamo, first = self._jamo.pop(name, ''), self._initials.pop(name, '')
+        for grams, text in ((self._jamo_grams, jamo), (self._initial_grams, first)):
+            for gram in _bigrams(text):
+                names = grams.get(gram)
+                if names is not None:
+                    names.discard(name)
+                    if not names:
+                        del grams[gram]
+
+    def search(self, query):
+        """검색어와 일치하는 이름 집합 (초성만 입력하면 초성 비교, 그 외에는 자모 부분 일치)"""
+        query = str(query).lower()
+        if is_initials_query(query):
+            texts, grams, needle = self._initials, self._initial_grams, query
+        else:
+            texts, grams, needle = self._jamo, self._jamo_grams, decompose(query)
+
+        query_grams = _bigrams(needle)
+        if not query_grams:
+            return {name for name, text in texts.items() if needle in text}
+        postings = sorted((grams.get(gram, set()) for gram in query_grams), key=len)
+        candidates = set(postings[0])
+        for names in postings[1:]:
+            candidates &= names
+            if not candidates:
+                break
+        return {name for name in candidates if needle in texts[name]}
+
+
+class SearchIndex:
+    """
+    필드별 검색 색인
+
+    Args:
+        fields: {필드 이름: 'prefix' | 'hangul' | 'substring'}
+    """
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self._values = {}                                   # 키 -> {필드: 정규화된 값}
+        self._postings = {field: {} for field in fields}    # 필드 -> {값: 키 집합}
+        self._matchers = {field: PrefixTrie() if mode == 'prefix' else HangulNameIndex() if mode == 'hangul' else None
+                          for field, mode in fields.items()}
+
+    def add(self, key, values):
+        """키(기록 ID 또는 학번)와 필드 값 색인 (같은 키가 있으면 교체)"""
+        if key in self._values:
+            self.remove(key)
+        normalized = {field: str(values.get(field) or '').lower() for field in self.fields}
+        self._values[key] = normalized
+        for field, value in normalized.items():
+            keys = self._postings[field].get(value)
+            if keys is None:
+                keys = self._postings[field][value] = set()
+                if self._matchers[field] is not None:
+                    self._matchers[field].add(value)
+            keys.add(key)
+
+    def remove(self, key):
+        normalized = self._values.pop(key, None)
+        if normalized is None:
+            return
+        for field, value in normalized.items():
+            keys = self._postings[field].get(value)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._postings[field][value]
+                if self._matchers[field] is not None:
+                    self._matchers[field].remove(value)
+
+    def clear(self):
+        self.__init__(self.fields)
+
+    def search(self, text, field='all'):
+        """
+        검색어와 일치하는 키 집합
+
+        Args:
+            field: 색인한 필드 이름 또는 'all' (모든 필드 중 하나라도 일치)
+        """
+        text = str(text).lower()
+        if field == 'all':
+            keys = set()
+            for name in self.fields:
+                keys |= self.search(text, name)
+            return keys
+        if field not in self.fields:
+            return set()
+
+        postings = self._postings[field]
+        mode = self.fields[field]
+        if mode == 'prefix':
+            values = self._matchers[field].starts_with(text)
+        elif mode == 'hangul':
+            values = self._matchers[field].search(text)
+        else:
+            values = [value for value in postings if text in value]
+
+        keys = set()
+        for value in values:
+            keys |= postings.get(value, set())
+        return keys
+
+    def __len__(self):
+        return len(self._values)
@@ -0,0 +1,137 @@
+"""
+날짜별 출석 로그(AttendanceLog)와 주별 통계 집계 테스트
+- 삭제 표시(tombstone), 보관 파일 압축(compact), 집계 증분 갱신, 워커 간 manifest 공유 확인
+"""
+import os
+
+from attendance_log import AttendanceLog
+
+
+def add_rows(log, rows):
+    for datetime_str, period, student_id in rows:
+        log.append(datetime_str, period, student_id, f'이름{student_id}', '1')
+
+
+def student_ids(rows):
+    return [row['학번'] for row in rows]
+
+
+def test_append_and_read(tmp_path):
+    """날짜별 파티션에 기록하고 날짜 범위로 읽기"""
+    log = AttendanceLog(str(tmp_path))
+    add_rows(log, [('2025-03-03 09:00:00', '1교시', '10101'),
+                   ('2025-03-03 10:00:00', '2교시', '10102'),
+                   ('2025-03-04 09:00:00', '1교시', '10103')])
+
+    assert log.dates() == ['2025-03-03', '2025-03-04']
+    assert student_ids(log.read_partition('2025-03-03')) == ['10101', '10102']
+    assert student_ids(log.read_range('2025-03-04', '2025-03-04')) == ['10103']
+    assert os.path.exists(log.partition_path('2025-03-03'))
+
+
+def test_delete_marks_tombstones(tmp_path):
+    """삭제는 파일을 다시 쓰지 않고 삭제 표시만 남기며, 모든 행이 삭제되면 파티션 제거"""
+    log = AttendanceLog(str(tmp_path))
+    add_rows(log, [('2025-03-03 09:00:00', '1교시', '10101'),
+                   ('2025-03-03 10:00:00', '2교시', '10102'),
+                   ('2025-03-04 09:00:00', '1교시', '10103')])
+    size = os.path.getsize(log.partition_path('2025-03-03'))
+
+    removed, changes = log.delete({'2025-03-03': [('10101', '2025-03-03 09:00:00', None)],
+                                   '2025-03-04': [('10103', None, '1교시')]})
+    assert student_ids(removed) == ['10101', '10103']
+    assert changes == {('2025-03-03', '1교시', '10101'): -1, ('2025-03-04', '1교시', '10103'): -1}
+    assert student_ids(log.read_partition('2025-03-03')) == ['10102']
+    assert log.partition_info('2025-03-03')['deleted'] == [0]
+    assert os.path.getsize(log.partition_path('2025-03-03')) == size
+    assert log.dates() == ['2025-03-03']
+    assert not os.path.exists(log.partition_path('2025-03-04'))
+
+    # 이미 삭제된 행은 다시 삭제되지 않음
+    assert log.delete({'2025-03-03': [('10101', '2025-03-03 09:00:00', None)]}) == ([], {})
+
+
+def test_rollups_follow_append_and_delete(tmp_path):
+    """행 추가/삭제 시 주별 집계가 같이 갱신"""
+    log = AttendanceLog(str(tmp_path))
+    add_rows(log, [('2025-03-03 09:00:00', '1교시', '10101'),
+                   ('2025-03-03 09:05:00', '1교시', '10102'),
+                   ('2025-03-05 09:00:00', '2교시', '10101')])
+
+    assert log.rollups.day_counts('2025-03-03', '2025-03-09') == {('2025-03-03', '1교시'): 2,
+                                                                  ('2025-03-05', '2교시'): 1}
+    assert log.rollups.student_counts('2025-03-03') == {'10101': [2, '이름10101'], '10102': [1, '이름10102']}
+
+    log.delete({'2025-03-03': [('10102', None, '1교시')]})
+    assert log.rollups.day_counts('2025-03-03', '2025-03-03') == {('2025-03-03', '1교시'): 1}
+    assert '10102' not in log.rollups.student_counts('2025-03-03')
+
+
+def test_ensure_rollups_rebuilds(tmp_path):
+    """집계 파일이 지워져도 ensure_rollups()로 전체 로그에서 다시 구축"""
+    log = AttendanceLog(str(tmp_path))
+    add_rows(log, [('2025-03-03 09:00:00', '1교시', '10101')])
+    log.ensure_rollups()
+    log.rollups.clear()
+    log._manifest.pop('rollups', None)
+
+    assert log.ensure_rollups() is True
+    assert log.rollups.day_counts('2025-03-03', '2025-03-03') == {('2025-03-03', '1교시'): 1}
+    assert log.ensure_rollups() is False
+
+
+def test_compact_moves_days_to_archive(tmp_path):
+    """마감된 날짜를 월별 보관 파일로 옮긴 뒤에도 같은 행을 읽고, 삭제 표시된 행은 압축 때 제거"""
+    log = AttendanceLog(str(tmp_path))
+    add_rows(log, [('2025-03-03 09:00:00', '1교시', '10101'),
+                   ('2025-03-03 10:00:00', '2교시', '10102'),
+                   ('2025-03-04 09:00:00', '1교시', '10103'),
+                   ('2025-04-01 09:00:00', '1교시', '10104')])
+    log.delete({'2025-03-03': [('10102', None, '2교시')]})
+
+    assert log.compact('2025-04-01') == 2
+    assert os.path.exists(os.path.join(str(tmp_path), 'archive', '2025-03.npz'))
+    assert not os.path.exists(log.partition_path('2025-03-03'))
+    assert os.path.exists(log.partition_path('2025-04-01'))
+    assert student_ids(log.read_partition('2025-03-03')) == ['10101']
+    assert student_ids(log.read_range('2025-03-01', '2025-04-30')) == ['10101', '10103', '10104']
+    assert len(log.read_columns('2025-03-01', '2025-04-30')['day']) == 3
+    assert log.compact('2025-04-01') == 0
+
+
+def test_delete_and_append_after_compact(tmp_path):
+    """보관된 날짜도 삭제 표시 후 다음 압축 때 제거되고, 추가하면 날짜 파티션으로 되돌아감"""
+    log = AttendanceLog(str(tmp_path))
+    add_rows(log, [('2025-03-03 09:00:00', '1교시', '10101'),
+                   ('2025-03-03 10:00:00', '2교시', '10102'),
+                   ('2025-03-04 09:00:00', '1교시', '10103')])
+    log.compact('2025-04-01')
+
+    removed, _ = log.delete({'2025-03-03': [('10101', '2025-03-03 09:00:00', None)]})
+    assert student_ids(removed) == ['10101']
+    assert student_ids(log.read_partition('2025-03-03')) == ['10102']
+    log.compact('2025-04-01')
+    assert not log.partition_info('2025-03-03').get('deleted')
+    assert student_ids(log.read_range('2025-03-01', '2025-03-31')) == ['10102', '10103']
+
+    add_rows(log, [('2025-03-04 11:00:00', '3교시', '10105')])
+    assert os.path.exists(log.partition_path('2025-03-04'))
+    assert student_ids(log.read_partition('2025-03-04')) == ['10103', '10105']
+    assert student_ids(log.read_range('2025-03-01', '2025-03-31')) == ['10102', '10103', '10105']
+
+
+def test_other_worker_sees_changes(tmp_path):
+    """같은 디렉터리를 쓰는 다른 워커의 추가/삭제/Firestore 변경 번호가 보여야 함"""
+    first = AttendanceLog(str(tmp_path))
+    second = AttendanceLog(str(tmp_path))
+    add_rows(first, [('2025-03-03 09:00:00', '1교시', '10101')])
+    assert student_ids(second.read_partition('2025-03-03')) == ['10101']
+
+    signature = second.day_signature('2025-03-03')
+    first.mark_remote_change(['2025-03-03', '2025-03-10'])
+    assert second.day_signature('2025-03-03') != signature
+    assert second.remote_changes('2025-03-03', '2025-03-09') == 1
+    assert second.remote_changes('2025-03-01', '2025-03-31') == 2
+
+    second.delete({'2025-03-03': [('10101', None, '1교시')]})
+    assert first.dates() == []
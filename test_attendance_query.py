@@ -0,0 +1,67 @@
+"""
+/list 조회 계층(attendance_query) 테스트
+- 커서 인코딩/검증과 커서(keyset) 페이지 이동 확인
+"""
+import base64
+import json
+
+from attendance_query import decode_cursor, encode_cursor, query_records
+from attendance_store import AttendanceStore
+
+
+def make_store(count=7):
+    store = AttendanceStore()
+    store.build([{'id': f'r{i}', 'date': f'2025-03-{i + 1:02d} 09:00:00', 'date_only': f'2025-03-{i + 1:02d}',
+                  'student_id': str(10101 + i), 'name': f'학생{i}', 'period': '1교시', 'seat': str(i)}
+                 for i in range(count)])
+    return store
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii')
+
+
+def test_cursor_round_trip():
+    entry = ((1, '2025-03-01 09:00:00'), 'r0')
+    assert decode_cursor(encode_cursor(entry)) == entry
+    assert decode_cursor(encode_cursor(((1, '홍길동'), 'r1'))) == ((1, '홍길동'), 'r1')
+    assert encode_cursor(None) == ''
+
+
+def test_invalid_cursor_is_ignored():
+    """정렬 키와 비교할 수 없는 커서는 None (조회 시 TypeError 대신 첫 페이지)"""
+    for cursor in ['', 'not base64!', raw_cursor('text'), raw_cursor([1, 2, 3]), raw_cursor([[1, 2], 'r0']),
+                   raw_cursor([['1', 'a'], 'r0']), raw_cursor([[2, 'a'], 'r0']), raw_cursor([[True, 'a'], 'r0']),
+                   raw_cursor([[1, 'a', 'b'], 'r0']), raw_cursor([[1, 'a'], 5]), raw_cursor({'a': 1})]:
+        assert decode_cursor(cursor) is None, cursor
+
+    store = make_store()
+    result = query_records(store, limit=3, after=raw_cursor([[1, 2], 'r0']))
+    assert [record['id'] for record in result['records']] == ['r6', 'r5', 'r4']
+
+
+def test_cursor_paging_matches_offset_paging():
+    """다음/이전 커서로 이동한 결과가 페이지 번호로 조회한 결과와 같아야 함"""
+    store = make_store()
+    first = query_records(store, limit=3)
+    assert [record['id'] for record in first['records']] == ['r6', 'r5', 'r4']
+    assert first['total_pages'] == 3 and first['prev_cursor'] == ''
+
+    second = query_records(store, page=2, limit=3, after=first['next_cursor'])
+    assert [record['id'] for record in second['records']] == \
+           [record['id'] for record in query_records(store, page=2, limit=3)['records']]
+
+    back = query_records(store, page=1, limit=3, before=second['prev_cursor'])
+    assert [record['id'] for record in back['records']] == ['r6', 'r5', 'r4']
+
+    last = query_records(store, page=3, limit=3, after=second['next_cursor'])
+    assert [record['id'] for record in last['records']] == ['r0']
+    assert last['next_cursor'] == ''
+
+
+def test_filters_and_search():
+    store = make_store()
+    result = query_records(store, sort_by='student_id', sort_direction='asc', search='1010', search_field='student_id')
+    assert [record['id'] for record in result['records']] == ['r0', 'r1', 'r2', 'r3', 'r4', 'r5', 'r6']
+    assert query_records(store, date_only='2025-03-02')['total_count'] == 1
+    assert query_records(store, sort_by='unknown', limit=1)['records'][0]['id'] == 'r6'
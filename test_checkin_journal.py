@@ -0,0 +1,125 @@
+"""
+출석 저널(CheckinJournal) 테스트
+- 반영 스레드 없이 flush()를 직접 호출해 기록/반영/완료 처리 확인
+"""
+import json
+import os
+
+import pytest
+
+from checkin_journal import CheckinJournal
+
+
+def make_journal(tmp_path, writer, **kwargs):
+    journal = CheckinJournal(str(tmp_path), writer, **kwargs)
+    journal.start = lambda: None  # 테스트에서는 백그라운드 반영 스레드 대신 flush() 직접 호출
+    return journal
+
+
+def checkin(student_id):
+    return {'data': {'student_id': student_id, 'date': '2025-03-03 09:00:00'}, 'rollups': []}
+
+
+def test_append_and_flush(tmp_path):
+    """기록한 항목이 순서대로 반영되고 반영 후 미반영 항목이 없어야 함"""
+    written = []
+    journal = make_journal(tmp_path, written.extend)
+    ids = journal.append([checkin('10101'), checkin('10102')])
+
+    assert [entry['id'] for entry in journal.pending()] == ids
+    assert journal.flush() == 2
+    assert [entry['data']['student_id'] for entry in written] == ['10101', '10102']
+    assert journal.pending() == []
+    assert journal.flush() == 0
+
+
+def test_batch_entries(tmp_path):
+    """batch_entries개씩 나누어 반영"""
+    batches = []
+    journal = make_journal(tmp_path, lambda entries: batches.append(len(entries)), batch_entries=2)
+    journal.append([checkin(str(10101 + i)) for i in range(5)])
+
+    assert journal.flush() == 5
+    assert batches == [2, 2, 1]
+
+
+def test_other_worker_sees_pending(tmp_path):
+    """같은 디렉터리를 쓰는 다른 워커의 저널도 미반영 항목과 완료 처리를 보아야 함"""
+    first = make_journal(tmp_path, lambda entries: None)
+    second = make_journal(tmp_path, lambda entries: None)
+    first.append([checkin('10101')])
+    assert [entry['data']['student_id'] for entry in second.pending()] == ['10101']
+
+    first.flush()
+    assert second.pending() == []
+    second.append([checkin('10102')])
+    assert [entry['data']['student_id'] for entry in first.pending()] == ['10102']
+
+
+def test_torn_line_is_dropped(tmp_path):
+    """기록 도중 종료되어 남은 잘린 줄은 다음 기록 전에 제거되어 새 항목과 섞이지 않아야 함"""
+    journal = make_journal(tmp_path, lambda entries: None)
+    journal.append([checkin('10101')])
+    with open(journal.path, 'ab') as f:
+        f.write(b'{"op": "checkin", "id": "torn", "da')
+
+    other = make_journal(tmp_path, lambda entries: None)
+    other.append([checkin('10102')])
+
+    assert [entry['data']['student_id'] for entry in other.pending()] == ['10101', '10102']
+    with open(journal.path, encoding='utf-8') as f:
+        for line in f:
+            json.loads(line)
+
+
+def test_transient_error_keeps_entries(tmp_path):
+    """일시적 오류는 예외를 그대로 올리고 항목은 저널에 남아야 함"""
+    def writer(entries):
+        raise ConnectionError('offline')
+
+    journal = make_journal(tmp_path, writer)
+    journal.append([checkin('10101')])
+
+    with pytest.raises(ConnectionError):
+        journal.flush()
+    assert len(journal.pending()) == 1
+
+
+def test_permanent_error_moves_to_dead_letter(tmp_path):
+    """재시도 불가 오류가 max_attempts번 쌓인 항목만 dead_letter.jsonl로 옮기고 나머지는 반영"""
+    written = []
+
+    def writer(entries):
+        if any(entry['data']['student_id'] == 'bad' for entry in entries):
+            raise ValueError('invalid document')
+        written.extend(entries)
+
+    journal = make_journal(tmp_path, writer, max_attempts=3,
+                           permanent_error=lambda error: isinstance(error, ValueError))
+    journal.append([checkin('10101'), checkin('bad'), checkin('10102')])
+
+    # 정상 항목은 반영, 실패한 항목은 재시도 횟수(1, 2회째) 안이라 남고 백오프를 위해 예외
+    with pytest.raises(ValueError):
+        journal.flush()
+    assert [entry['data']['student_id'] for entry in written] == ['10101', '10102']
+    assert [entry['data']['student_id'] for entry in journal.pending()] == ['bad']
+    assert not os.path.exists(journal.dead_letter_path)
+
+    # 3회째: max_attempts 도달 - dead letter로 이동
+    assert journal.flush() == 0
+    assert journal.pending() == []
+    with open(journal.dead_letter_path, encoding='utf-8') as f:
+        dead = [json.loads(line) for line in f]
+    assert [entry['data']['student_id'] for entry in dead] == ['bad']
+    assert dead[0]['error'] == 'invalid document'
+
+
+def test_discard(tmp_path):
+    """discard()로 완료 처리한 항목은 반영하지 않아야 함"""
+    written = []
+    journal = make_journal(tmp_path, written.extend)
+    journal.append([checkin('10101'), checkin('10102')])
+
+    assert journal.discard(lambda data: data['student_id'] == '10101') == 1
+    journal.flush()
+    assert [entry['data']['student_id'] for entry in written] == ['10102']
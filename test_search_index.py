@@ -0,0 +1,63 @@
+"""
+관리자 검색 색인(SearchIndex) 테스트
+- 학번 접두사, 이름 자모/초성 부분 일치, 고유값 부분 일치, 교체/삭제 확인
+"""
+from search_index import SearchIndex, decompose, initials, is_initials_query
+
+FIELDS = {'student_id': 'prefix', 'name': 'hangul', 'seat': 'substring'}
+
+
+def make_index():
+    index = SearchIndex(FIELDS)
+    index.add('a', {'student_id': '10101', 'name': '홍길동', 'seat': '12'})
+    index.add('b', {'student_id': '10102', 'name': '김과학', 'seat': '112'})
+    index.add('c', {'student_id': '20101', 'name': '홍길순', 'seat': '3'})
+    return index
+
+
+def test_jamo_helpers():
+    assert initials('홍길동') == 'ㅎㄱㄷ'
+    assert decompose('과') == 'ㄱㅗㅏ'
+    assert is_initials_query('ㅎㄱ')
+    assert not is_initials_query('홍ㄱ')
+    assert not is_initials_query('')
+
+
+def test_student_id_prefix():
+    index = make_index()
+    assert index.search('1010', 'student_id') == {'a', 'b'}
+    assert index.search('2', 'student_id') == {'c'}
+    assert index.search('0101', 'student_id') == set()
+
+
+def test_name_partial_and_initials():
+    """입력 중인 글자('홍기', '고')와 초성('ㅎㄱㄷ')으로도 검색"""
+    index = make_index()
+    assert index.search('홍길', 'name') == {'a', 'c'}
+    assert index.search('홍기', 'name') == {'a', 'c'}
+    assert index.search('길순', 'name') == {'c'}
+    assert index.search('김고', 'name') == {'b'}
+    assert index.search('ㅎㄱㄷ', 'name') == {'a'}
+    assert index.search('ㄱㅅ', 'name') == {'c'}
+
+
+def test_substring_and_all_fields():
+    index = make_index()
+    assert index.search('12', 'seat') == {'a', 'b'}
+    assert index.search('12', 'all') == {'a', 'b'}
+    assert index.search('1', 'unknown') == set()
+
+
+def test_replace_and_remove():
+    """같은 키를 다시 색인하면 이전 값은 검색되지 않고, 삭제한 키는 어디서도 검색되지 않음"""
+    index = make_index()
+    index.add('a', {'student_id': '30101', 'name': '이몽룡', 'seat': '7'})
+    assert index.search('10101', 'student_id') == set()
+    assert index.search('ㅇㅁㄹ', 'name') == {'a'}
+
+    index.remove('c')
+    assert index.search('홍', 'all') == set()
+    assert len(index) == 2
+    index.remove('missing')
+    index.clear()
+    assert len(index) == 0 and index.search('1', 'all') == set()
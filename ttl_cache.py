@@ -0,0 +1,89 @@
+"""
+크기 제한 + 만료 시간이 있는 LRU 캐시
+- 학생별 출석 상태처럼 키 단위로 무효화해야 하는 캐시용
+- 적중/실패 횟수를 기록하여 캐시 효과 확인 가능
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """스레드 안전한 LRU + TTL 캐시"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # 키 -> (저장 시각, 값)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """만료되지 않은 값 반환 (없으면 default)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            stored_at, value = entry
+            if time.time() - stored_at >= self.ttl:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key, default=None):
+        """통계와 사용 순서에 영향 없이 만료되지 않은 값 확인"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.time() - entry[0] >= self.ttl:
+                return default
+            return entry[1]
+
+    def set(self, key, value):
+        """값 저장 (가장 오래 사용되지 않은 항목부터 제거)"""
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """키 하나만 무효화"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def purge_expired(self):
+        """만료된 항목 일괄 제거, 제거한 개수 반환"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (stored_at, _) in self._data.items() if now - stored_at >= self.ttl]
+            for key in expired:
+                del self._data[key]
+            return len(expired)
+
+    def stats(self):
+        """적중/실패 통계"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0
+            }
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,130 @@
+"""
+활성 경고 학생 목록 (인메모리)
+- 출석 확인 시 Firestore 조회 없이 딕셔너리 조회로 경고 여부 판단
+- 만료 시간을 최소 힙으로 관리하여 만료된 경고는 자동으로 제외
+  (Firestore의 active 값을 바꾸지 않아도 됨)
+"""
+import heapq
+import math
+import threading
+import time
+
+
+def _expiry_timestamp(expiry_date):
+    """만료일(datetime)을 epoch 초로 변환 (없으면 무기한)"""
+    if not expiry_date:
+        return math.inf
+    try:
+        return expiry_date.timestamp()
+    except (AttributeError, OverflowError, ValueError):
+        return math.inf
+
+
+class WarningRegistry:
+    """학번별 활성 경고와 만료 힙"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_student = {}   # 학번 -> {경고 ID: 경고 데이터}
+        self._by_id = {}        # 경고 ID -> (학번, 만료 epoch 초)
+        self._heap = []         # (만료 epoch 초, 경고 ID)
+        self.loaded_at = None
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def age(self):
+        """마지막 전체 로드 이후 경과 시간(초)"""
+        if self.loaded_at is None:
+            return None
+        return time.time() - self.loaded_at
+
+    def load(self, warnings, loaded_at=None):
+        """
+        전체 경고로 다시 구성
+
+        Args:
+            warnings: [(경고 ID, 경고 데이터), ...] - active가 아닌 경고는 무시
+            loaded_at: 조회를 시작한 시각 (epoch 초, 기본값: 현재) - 이후의 변경 표시와 비교할 기준
+        """
+        with self._lock:
+            self._by_student = {}
+            self._by_id = {}
+            self._heap = []
+            for warning_id, data in warnings:
+                if data and data.get('active'):
+                    self._add(warning_id, data)
+            heapq.heapify(self._heap)
+            self.loaded_at = loaded_at or time.time()
+
+    def add(self, warning_id, data):
+        """경고 1건 추가"""
+        with self._lock:
+            self._discard(warning_id)
+            self._add(warning_id, data)
+
+    def remove(self, warning_id):
+        """경고 1건 해제/삭제"""
+        with self._lock:
+            self._discard(warning_id)
+
+    def clear(self):
+        """모든 경고 삭제"""
+        with self._lock:
+            self._by_student = {}
+            self._by_id = {}
+            self._heap = []
+
+    def get(self, student_id):
+        """학생의 활성 경고 데이터 (없으면 None)"""
+        with self._lock:
+            self._sweep()
+            warnings = self._by_student.get(student_id)
+            if not warnings:
+                return None
+            return next(iter(warnings.values()))
+
+    def is_active(self, warning_id):
+        """경고 ID가 아직 유효한지 확인"""
+        with self._lock:
+            self._sweep()
+            return warning_id in self._by_id
+
+    def student_ids(self):
+        """현재 경고 중인 학번 집합"""
+        with self._lock:
+            self._sweep()
+            return set(self._by_student)
+
+    # ---------- 내부 함수 ----------
+
+    def _add(self, warning_id, data):
+        student_id = data.get('student_id')
+        expiry = _expiry_timestamp(data.get('expiry_date'))
+        if expiry <= time.time():
+            return
+        self._by_student.setdefault(student_id, {})[warning_id] = data
+        self._by_id[warning_id] = (student_id, expiry)
+        heapq.heappush(self._heap, (expiry, warning_id))
+
+    def _discard(self, warning_id):
+        entry = self._by_id.pop(warning_id, None)
+        if entry is None:
+            return
+        student_id, _ = entry
+        warnings = self._by_student.get(student_id)
+        if warnings is not None:
+            warnings.pop(warning_id, None)
+            if not warnings:
+                del self._by_student[student_id]
+        # 힙 항목은 _sweep()에서 만료 시 함께 정리 (지연 삭제)
+
+    def _sweep(self):
+        """만료 시간이 지난 경고를 힙에서 꺼내 제거"""
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            expiry, warning_id = heapq.heappop(self._heap)
+            entry = self._by_id.get(warning_id)
+            if entry is not None and entry[1] == expiry:
+                self._discard(warning_id)